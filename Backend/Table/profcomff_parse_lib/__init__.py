@@ -2,6 +2,7 @@ from .timetable.core.parse_timetable import parse_timetable
 from .timetable.core.parse_name import parse_name
 from .timetable.parse_all import parse_all
 from .timetable.manual_edit import manual_edit
+from .timetable.overrides import apply_overrides
 from .timetable.multiple_lessons import multiple_lessons
 from .timetable.flatten import flatten
 from .database.groups_to_array import all_to_array
@@ -10,7 +11,8 @@ from .database.id_instead_name import to_id
 from .timetable.calc_date import calc_date
 from .database.delete_lessons import delete_lessons, delete_lesson
 from .database.add_lessons import add_lessons, post_event, check_date
+from .database.fingerprint import add_fingerprints, lesson_fingerprint
 
-__all__ = ["parse_timetable", "parse_name", "parse_all", "manual_edit", "multiple_lessons", "flatten",
+__all__ = ["parse_timetable", "parse_name", "parse_all", "manual_edit", "apply_overrides", "multiple_lessons", "flatten",
            "all_to_array", "completion", "to_id", "calc_date", "delete_lessons", "delete_lesson", "add_lessons",
-           "post_event", "check_date"]
+           "post_event", "check_date", "add_fingerprints", "lesson_fingerprint"]
@@ -0,0 +1,360 @@
+"""
+Командная строка для конвейера расписания:
+
+    python -m profcomff_parse_lib fetch --jobs 8 --cache-dir cache --output pages.json
+    python -m profcomff_parse_lib parse --from-snapshot pages.json --jobs 4 --output lessons.json
+    python -m profcomff_parse_lib diff applied.json lessons.json --output diff.json
+    python -m profcomff_parse_lib apply --from-snapshot diff.json --base test --output applied.json
+
+Таблицы пишутся в колоночном формате: .json — {колонка: [значения]},
+.parquet (нужен pyarrow) или .csv (только для таблиц без колонок-списков,
+например снимка страниц); "-" — JSON в stdout.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+_logger = logging.getLogger(__name__)
+
+# [[курс, поток, количество групп], ...]
+SOURCES = [
+    [1, 1, 6], [1, 2, 6], [1, 3, 6],
+    [2, 1, 6], [2, 2, 6], [2, 3, 6],
+    [3, 1, 10], [3, 2, 8],
+    [4, 1, 10], [4, 2, 10],
+    [5, 1, 13], [5, 2, 11],
+    [6, 1, 11], [6, 2, 10]
+]
+
+USER_AGENT = "Mozilla/5.0 (Linux; Android 7.0; SM-G930V Build/NRD90M) AppleWebKit/537.36 " \
+             "(KHTML, like Gecko) Chrome/59.0.3071.125 Mobile Safari/537.36"
+HEADERS = {"User-Agent": USER_AGENT}
+TIMEOUT = 30
+
+
+# ---------------- Таблицы ----------------
+
+def write_table(table, path):
+    """Сохраняет DataFrame в колоночном формате по расширению файла."""
+    if path.endswith(".parquet"):
+        table.to_parquet(path, index=False)
+    elif path.endswith(".csv"):
+        columns = _list_columns(table)
+        if columns:
+            # В CSV список превратился бы в строку "['1', '2']" и не прочитался бы обратно
+            raise ValueError(f"CSV не хранит списки (колонки {', '.join(columns)}): используйте .json или .parquet")
+        table.to_csv(path, index=False)
+    else:
+        columns = {column: table[column].tolist() for column in table.columns}
+        text = json.dumps(columns, ensure_ascii=False, default=_json_default)
+        if path == "-":
+            sys.stdout.write(text + "\n")
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(text)
+
+
+def read_table(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    with open(path, encoding="utf-8") as file:
+        return pd.DataFrame(json.load(file))
+
+
+def _list_columns(table):
+    return [
+        column for column in table.columns
+        if table[column].dtype == object
+        and table[column].map(lambda value: isinstance(value, (list, tuple, set)) or getattr(value, "ndim", 0) > 0).any()
+    ]
+
+
+def _json_default(value):
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Не сериализуется в JSON: {type(value)}")
+
+
+def _entities_path(path):
+    return os.path.splitext(path)[0] + ".entities.json"
+
+
+# ---------------- fetch ----------------
+
+def source_urls(sources=None):
+    return [
+        f'http://ras.phys.msu.ru/table/{course}/{stream}/{group}.htm'
+        for course, stream, count in (sources or SOURCES)
+        for group in range(1, count + 1)
+    ]
+
+
+def _cache_paths(cache_dir, url):
+    name = hashlib.sha1(url.encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, name + ".htm"), os.path.join(cache_dir, name + ".meta.json")
+
+
+def fetch_page(url, cache_dir=None):
+    """
+    Загружает страницу. С cache_dir запрос условный (ETag / Last-Modified),
+    и при ответе 304 или ошибке сети берется копия из кэша.
+    """
+    headers = dict(HEADERS)
+    cached = None
+    if cache_dir:
+        page_path, meta_path = _cache_paths(cache_dir, url)
+        if os.path.exists(page_path) and os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as file:
+                meta = json.load(file)
+            with open(page_path, encoding="utf-8") as file:
+                cached = file.read()
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response = requests.get(url, headers=headers, timeout=TIMEOUT)
+    except requests.RequestException as e:
+        _logger.warning(f"Страница {url} недоступна: {e}")
+        return {"url": url, "raw_html": cached, "status": "cached" if cached is not None else "failed"}
+
+    if response.status_code == 304 and cached is not None:
+        return {"url": url, "raw_html": cached, "status": "not_modified"}
+    if response.status_code != 200:
+        _logger.warning(f"Страница {url} вернула {response.status_code}")
+        return {"url": url, "raw_html": cached, "status": "cached" if cached is not None else "failed"}
+
+    if cache_dir:
+        with open(page_path, "w", encoding="utf-8") as file:
+            file.write(response.text)
+        with open(meta_path, "w", encoding="utf-8") as file:
+            json.dump({"url": url, "etag": response.headers.get("ETag"),
+                       "last_modified": response.headers.get("Last-Modified")}, file)
+    return {"url": url, "raw_html": response.text, "status": "fetched"}
+
+
+def fetch_pages(urls, jobs=1, cache_dir=None):
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        pages = list(executor.map(lambda url: fetch_page(url, cache_dir), urls))
+
+    statuses = pd.Series([page["status"] for page in pages]).value_counts().to_dict()
+    _logger.info(f"Страницы: {statuses}")
+    return pd.DataFrame([page for page in pages if page["raw_html"] is not None], columns=["url", "raw_html", "status"])
+
+
+# ---------------- parse ----------------
+
+def _parse_page(raw_html):
+    from .timetable.core.parse_timetable import parse_timetable
+    return parse_timetable(raw_html)
+
+
+def parse_pages(pages, jobs=1, rules=None):
+    """
+    Разбирает страницы в таблицу пар. Разбор HTML идет в jobs процессах,
+    дальнейшие шаги — как в main.py. Без rules применяются встроенные
+    правки default_overrides, как в manual_edit; пустой список их отключает.
+
+    Returns:
+        (lessons, {'groups', 'places', 'teachers', 'subjects'})
+    """
+    from . import parse_name, parse_all, multiple_lessons, flatten, all_to_array, apply_overrides
+    from .timetable.manual_edit import default_overrides
+
+    raw_pages = pages["raw_html"].tolist()
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            parsed = list(executor.map(_parse_page, raw_pages))
+    else:
+        parsed = [_parse_page(raw_html) for raw_html in raw_pages]
+    results = pd.concat(parsed) if parsed else pd.DataFrame()
+
+    lessons = parse_name(results)
+    lessons, places, groups, teachers, subjects = parse_all(lessons)
+    if rules is None:
+        rules = default_overrides()
+    if rules:
+        lessons, problems = apply_overrides(lessons, rules)
+        for problem in problems:
+            _logger.warning(f"Правка не применена: {problem}")
+    lessons = multiple_lessons(lessons)
+    lessons = flatten(lessons)
+    lessons = all_to_array(lessons)
+    entities = {"groups": groups, "places": places, "teachers": teachers, "subjects": subjects}
+    return lessons, entities
+
+
+# ---------------- diff ----------------
+
+def diff_lessons(old, new):
+    """
+    Сравнивает два снимка по отпечаткам пар. Колонка 'action': create —
+    новая пара, delete — пропавшая, remember — без изменений (с events_id
+    из старого снимка, если он там есть). Одинаковые пары сопоставляются
+    поштучно, по порядку: у каждой свои events_id, лишние удаляются
+    или создаются.
+    """
+    from .database.fingerprint import add_fingerprints
+
+    old = add_fingerprints(old.copy())
+    new = add_fingerprints(new.copy())
+    if "events_id" not in old.columns:
+        old["events_id"] = [[] for _ in range(len(old))]
+
+    # отпечаток -> позиции еще не сопоставленных пар старого снимка
+    unmatched = defaultdict(list)
+    for position, fingerprint in enumerate(old["fingerprint"]):
+        unmatched[fingerprint].append(position)
+
+    matched = set()
+    events, actions = [], []
+    for fingerprint in new["fingerprint"]:
+        if unmatched[fingerprint]:
+            position = unmatched[fingerprint].pop(0)
+            matched.add(position)
+            events.append(old["events_id"].iat[position])
+            actions.append("remember")
+        else:
+            events.append([])
+            actions.append("create")
+
+    deleted = old.iloc[[position for position in range(len(old)) if position not in matched]].copy()
+    deleted["action"] = "delete"
+    kept = new.copy()
+    kept["events_id"] = events
+    kept["action"] = actions
+    return pd.concat([kept, deleted], ignore_index=True)
+
+
+# ---------------- apply ----------------
+
+def apply_diff(diff, headers, base, semester_start, begin=None, end=None, entities=None):
+    """
+    Применяет diff к API расписания: удаляет события пропавших пар
+    (начиная с begin) и создает события новых пар на [begin, end).
+    Возвращает снимок пар с events_id — старый снимок для следующего diff.
+    """
+    from . import completion, to_id, calc_date, delete_lesson, post_event, check_date
+
+    begin = begin or datetime.datetime.now().strftime("%m/%d/%Y")
+    end = end or (datetime.datetime.now() + datetime.timedelta(days=1)).strftime("%m/%d/%Y")
+
+    for _, row in diff[diff["action"] == "delete"].iterrows():
+        for event_id in row["events_id"]:
+            if check_date(event_id, base, begin):
+                delete_lesson(headers, event_id, base)
+
+    applied = diff[diff["action"] != "delete"].reset_index(drop=True)
+    created = applied[applied["action"] == "create"]
+    if not created.empty:
+        if entities:
+            completion(entities["groups"], entities["places"], entities["teachers"], headers, base)
+        # to_id заменяет имена на id прямо в списках, поэтому списки копируются
+        with_ids = created.drop(columns=["events_id", "action", "fingerprint"]).reset_index(drop=True)
+        for column in ("place", "group", "teacher"):
+            with_ids[column] = with_ids[column].map(list)
+        with_ids = to_id(with_ids, headers, base)
+        with_ids["row"] = created.index
+        for _, event in calc_date(with_ids, begin, end, semester_start).iterrows():
+            applied.at[event["row"], "events_id"] = list(applied.at[event["row"], "events_id"]) + [post_event(headers, event, base)]
+
+    return applied.drop(columns=["action"])
+
+
+# ---------------- main ----------------
+
+def _add_fetch_options(parser):
+    parser.add_argument("--jobs", type=int, default=1, help="Число параллельных загрузок / процессов разбора")
+    parser.add_argument("--cache-dir", help="Каталог кэша страниц для условных запросов")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m profcomff_parse_lib", description="Конвейер расписания")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fetch = commands.add_parser("fetch", help="Загрузить страницы расписания")
+    _add_fetch_options(fetch)
+    fetch.add_argument("--output", default="-", help="Файл снимка страниц")
+
+    parse = commands.add_parser("parse", help="Разобрать страницы в таблицу пар")
+    _add_fetch_options(parse)
+    parse.add_argument("--from-snapshot", help="Снимок страниц из fetch вместо загрузки")
+    parse.add_argument("--rules", help="JSON со списком ручных правок (см. apply_overrides); "
+                                       "по умолчанию — встроенные default_overrides")
+    parse.add_argument("--output", default="-", help="Файл таблицы пар")
+
+    diff = commands.add_parser("diff", help="Сравнить два снимка пар")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--output", default="-")
+
+    apply = commands.add_parser("apply", help="Применить diff к API расписания")
+    apply.add_argument("--from-snapshot", required=True, help="Результат diff")
+    apply.add_argument("--entities", help="Сущности из parse (*.entities.json) для дополнения API")
+    apply.add_argument("--base", default="test", help="Окружение API: test или prod")
+    apply.add_argument("--token", default=os.getenv("token"), help="Токен API (по умолчанию из $token)")
+    apply.add_argument("--semester-start", required=True, help="Начало семестра, ММ/ДД/ГГГГ")
+    apply.add_argument("--begin", help="Начало периода, ММ/ДД/ГГГГ (по умолчанию сегодня)")
+    apply.add_argument("--end", help="Конец периода, ММ/ДД/ГГГГ (по умолчанию завтра)")
+    apply.add_argument("--output", default="-", help="Снимок пар с events_id для следующего diff")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+
+    if args.command == "fetch":
+        pages = fetch_pages(source_urls(), args.jobs, args.cache_dir)
+        write_table(pages, args.output)
+
+    elif args.command == "parse":
+        if args.from_snapshot:
+            pages = read_table(args.from_snapshot)
+        else:
+            pages = fetch_pages(source_urls(), args.jobs, args.cache_dir)
+        rules = None
+        if args.rules:
+            with open(args.rules, encoding="utf-8") as file:
+                rules = json.load(file)
+        lessons, entities = parse_pages(pages, args.jobs, rules)
+        write_table(lessons, args.output)
+        if args.output != "-":
+            with open(_entities_path(args.output), "w", encoding="utf-8") as file:
+                json.dump(entities, file, ensure_ascii=False)
+
+    elif args.command == "diff":
+        result = diff_lessons(read_table(args.old), read_table(args.new))
+        _logger.info(f"Изменения: {result['action'].value_counts().to_dict()}")
+        write_table(result, args.output)
+
+    elif args.command == "apply":
+        entities = None
+        if args.entities:
+            with open(args.entities, encoding="utf-8") as file:
+                entities = json.load(file)
+        headers = {"Authorization": f"{args.token}"}
+        applied = apply_diff(read_table(args.from_snapshot), headers, args.base, args.semester_start,
+                             args.begin, args.end, entities)
+        write_table(applied, args.output)
+
+    return 0
@@ -3,8 +3,10 @@ from .completion import completion
 from .id_instead_name import to_id
 from .delete_lessons import delete_lessons, delete_lesson
 from .groups_to_array import all_to_array
+from .fingerprint import add_fingerprints, lesson_fingerprint
 
 __all__ = ["completion",
-           "to_id", "add_lessons", "post_event", "check_date", "delete_lessons", "delete_lesson", "all_to_array"]
+           "to_id", "add_lessons", "post_event", "check_date", "delete_lessons", "delete_lesson", "all_to_array",
+           "add_fingerprints", "lesson_fingerprint"]
 
 
@@ -0,0 +1,45 @@
+import hashlib
+import json
+import logging
+
+import pandas as pd
+
+_logger = logging.getLogger(__name__)
+
+SCALAR_COLUMNS = ["subject", "odd", "even", "weekday", "num", "start", "end"]
+ARRAY_COLUMNS = ["place", "group", "teacher"]
+
+
+def _scalar(value):
+    if hasattr(value, "item"):
+        # numpy-типы из DataFrame -> обычные int/bool
+        value = value.item()
+    return value
+
+
+def _array(value):
+    if value is None or (not isinstance(value, (list, tuple)) and pd.isna(value)):
+        return []
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+    return sorted({_scalar(item) for item in value}, key=lambda item: (str(type(item)), item))
+
+
+def lesson_fingerprint(row):
+    """
+    Канонический отпечаток пары: хэш скалярных полей и отсортированных
+    массивов без повторов. Две пары равны в смысле старого сравнения
+    (равенство полей и взаимное включение массивов) тогда и только тогда,
+    когда равны их отпечатки.
+    """
+    canonical = [_scalar(row[column]) for column in SCALAR_COLUMNS]
+    canonical += [_array(row[column]) for column in ARRAY_COLUMNS]
+    return hashlib.sha1(json.dumps(canonical, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def add_fingerprints(lessons):
+    """Добавляет колонку 'fingerprint' с отпечатком каждой пары."""
+    _logger.info("Считаю отпечатки пар...")
+
+    lessons["fingerprint"] = [lesson_fingerprint(row) for _, row in lessons.iterrows()]
+    return lessons
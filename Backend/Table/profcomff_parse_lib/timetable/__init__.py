@@ -2,8 +2,9 @@
 from .parse_all import parse_all
 from .calc_date import calc_date
 from .manual_edit import manual_edit
+from .overrides import apply_overrides
 from .multiple_lessons import multiple_lessons
 from .flatten import flatten
 
-__all__ = ["parse_all", "calc_date", "manual_edit",
+__all__ = ["parse_all", "calc_date", "manual_edit", "apply_overrides",
            "flatten", "multiple_lessons"]
@@ -2,6 +2,8 @@ import logging
 
 import pandas as pd
 
+from .overrides import apply_overrides, DELETE, ADD
+
 _logger = logging.getLogger(__name__)
 
 
@@ -20,27 +22,28 @@ added_rows = pd.DataFrame([
 
 def _delete_row(lessons, row):
     """Удаляет строчку/и из DataFrame. См. тест."""
-    sub_lessons = lessons
-    for key in row.keys():
-        sub_lessons = sub_lessons[getattr(sub_lessons, key) == row[key]]
-
-    lessons = lessons.drop(sub_lessons.index)
+    lessons, _ = apply_overrides(lessons, [{"action": DELETE, "match": row}])
     return lessons
 
 
-def manual_edit(lessons):
+def default_overrides():
+    """Правила, которые раньше были зашиты в deleted_rows и added_rows."""
+    rules = [{"action": DELETE, "match": row} for row in deleted_rows]
+    rules += [{"action": ADD, "values": row} for row in added_rows.to_dict("records")]
+    return rules
+
+
+def manual_edit(lessons, rules=None):
     """
-    Добавляет или удаляет необходимые пары. Пары добавляются вручную.
+    Добавляет или удаляет необходимые пары.
+
+    Правила (см. apply_overrides) обычно приходят из базы; без них
+    применяются правки из deleted_rows и added_rows.
     """
     _logger.info("Изменяю пары...")
 
-    # Сперва удаляем пары.
-    for deleted_row in deleted_rows:
-        lessons = _delete_row(lessons, deleted_row)
-
-    # Теперь добавляем.
-    lessons = pd.concat([lessons, added_rows], ignore_index=True)
+    if rules is None:
+        rules = default_overrides()
+    lessons, _ = apply_overrides(lessons, rules)
 
     return lessons
-
-
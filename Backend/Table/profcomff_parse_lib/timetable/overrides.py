@@ -0,0 +1,122 @@
+import logging
+from collections import defaultdict
+
+import pandas as pd
+
+_logger = logging.getLogger(__name__)
+
+DELETE = "delete"
+ADD = "add"
+REPLACE = "replace"
+ACTIONS = (DELETE, ADD, REPLACE)
+
+
+def _hashable(value):
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+
+def _match_rows(lessons, rules):
+    """
+    Находит строки, подходящие под каждое правило.
+
+    Правила группируются по набору колонок в "match"; для каждой группы
+    строится словарь "значения колонок -> номера правил", и DataFrame
+    просматривается один раз (hash join), а не по маске на каждое правило.
+    Возвращает {номер правила: [индексы строк]}.
+    """
+    by_columns = defaultdict(lambda: defaultdict(list))
+    for number, rule in rules:
+        columns = tuple(sorted(rule["match"]))
+        key = tuple(_hashable(rule["match"][column]) for column in columns)
+        by_columns[columns][key].append(number)
+
+    matches = {number: [] for number, _ in rules}
+    for columns, lookup in by_columns.items():
+        if not columns:
+            # Пустой match подходит под все строки
+            for number in lookup[()]:
+                matches[number] = list(lessons.index)
+            continue
+        keys = zip(*(lessons[column].map(_hashable) for column in columns))
+        for index, key in zip(lessons.index, keys):
+            for number in lookup.get(key, ()):
+                matches[number].append(index)
+    return matches
+
+
+def _problem(rule, problem, **details):
+    result = {"rule": rule.get("id"), "action": rule.get("action"), "problem": problem}
+    result.update(details)
+    return result
+
+
+def apply_overrides(lessons, rules):
+    """
+    Применяет ручные правки к DataFrame пар.
+
+    Правило — словарь с ключами:
+        action: "delete" (удалить все подходящие пары), "replace" (заменить
+            значения в единственной подходящей паре) или "add" (добавить пару);
+        match: {колонка: значение} — условие для delete и replace;
+        values: новые значения колонок для replace или вся пара для add;
+        id: необязательный идентификатор для отчета.
+
+    Неоднозначные и ошибочные правила не применяются и попадают в отчет.
+    Возвращает (новый DataFrame, список проблем).
+    """
+    problems = []
+    matchable = []
+    added = []
+    for number, rule in enumerate(rules):
+        action = rule.get("action")
+        if action not in ACTIONS:
+            problems.append(_problem(rule, "unknown_action"))
+            continue
+        if action == ADD:
+            added.append(rule.get("values") or {})
+            continue
+        unknown = [column for column in list(rule.get("match") or {}) + list(rule.get("values") or {})
+                   if column not in lessons.columns]
+        if unknown:
+            problems.append(_problem(rule, "unknown_columns", columns=unknown))
+            continue
+        if action == REPLACE and not rule.get("match"):
+            problems.append(_problem(rule, "empty_match"))
+            continue
+        matchable.append((number, {**rule, "match": rule.get("match") or {}}))
+
+    matches = _match_rows(lessons, matchable)
+
+    deleted = set()
+    replacements = defaultdict(list)
+    for number, rule in matchable:
+        indexes = matches[number]
+        if not indexes:
+            problems.append(_problem(rule, "no_match"))
+        elif rule["action"] == DELETE:
+            deleted.update(indexes)
+        elif len(indexes) > 1:
+            problems.append(_problem(rule, "multiple_matches", count=len(indexes)))
+        else:
+            replacements[indexes[0]].append(rule)
+
+    if replacements:
+        lessons = lessons.copy()
+    for index, index_rules in replacements.items():
+        if len(index_rules) > 1:
+            # Одной паре соответствует несколько замен: не применяем ни одну
+            problems.append(_problem(index_rules[0], "overlapping_rules", rules=[rule.get("id") for rule in index_rules]))
+            continue
+        for column, value in index_rules[0]["values"].items():
+            lessons.at[index, column] = value
+
+    if deleted:
+        lessons = lessons.drop(index=list(deleted))
+    if added:
+        lessons = pd.concat([lessons, pd.DataFrame(added)], ignore_index=True)
+
+    for problem in problems:
+        _logger.warning(f"Ручная правка не применена: {problem}")
+    return lessons, problems
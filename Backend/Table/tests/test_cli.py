@@ -0,0 +1,70 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import pandas as pd
+
+from profcomff_parse_lib.cli import diff_lessons, read_table, write_table
+
+
+def _lessons(subjects, places):
+    return pd.DataFrame({
+        "subject": subjects,
+        "odd": [True] * len(subjects),
+        "even": [True] * len(subjects),
+        "weekday": [0] * len(subjects),
+        "num": list(range(1, len(subjects) + 1)),
+        "start": ["9:00"] * len(subjects),
+        "end": ["10:35"] * len(subjects),
+        "place": places,
+        "group": [["101"]] * len(subjects),
+        "teacher": [["Иванов И. И."]] * len(subjects),
+    })
+
+
+class Test(TestCase):
+    def test_diff_lessons(self):
+        old = _lessons(["A", "B"], [["1"], ["2", "3"]])
+        old["events_id"] = [[10], [20, 21]]
+        new = _lessons(["A", "B"], [["1"], ["3"]])
+
+        result = diff_lessons(old, new)
+
+        assert result["action"].to_list() == ["remember", "create", "delete"]
+        assert result["events_id"].to_list() == [[10], [], [20, 21]]
+
+    def test_table_roundtrip(self):
+        lessons = _lessons(["A"], [["1", "2"]])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "lessons.json")
+            write_table(lessons, path)
+            restored = read_table(path)
+
+        assert restored["place"].to_list() == [["1", "2"]]
+        assert restored["num"].to_list() == [1]
+
+    def test_diff_lessons_keeps_duplicates(self):
+        old = _lessons(["A", "A"], [["1"], ["1"]])
+        old["num"] = [1, 1]
+        old["events_id"] = [[10], [11]]
+        new = _lessons(["A"], [["1"]])
+
+        result = diff_lessons(old, new)
+
+        assert result["action"].to_list() == ["remember", "delete"]
+        assert result["events_id"].to_list() == [[10], [11]]
+
+        result = diff_lessons(new.assign(events_id=[[10]]), old.drop(columns=["events_id"]))
+
+        assert result["action"].to_list() == ["remember", "create"]
+        assert result["events_id"].to_list() == [[10], []]
+
+    def test_csv_rejects_list_columns(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "lessons.csv")
+            with self.assertRaises(ValueError):
+                write_table(_lessons(["A"], [["1"]]), path)
+
+            pages = pd.DataFrame({"url": ["http://example.com"], "raw_html": ["<html></html>"], "status": ["fetched"]})
+            write_table(pages, path)
+            assert read_table(path)["status"].to_list() == ["fetched"]
@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+import pandas as pd
+
+from profcomff_parse_lib.database import add_fingerprints
+
+
+class Test(TestCase):
+    def test_add_fingerprints(self):
+        data = pd.DataFrame({
+            "subject": ["A", "A", "A", "B"],
+            "odd": [True, True, True, True],
+            "even": [False, False, False, False],
+            "weekday": [0, 0, 0, 0],
+            "num": [1, 1, 1, 1],
+            "start": ["9:00", "9:00", "9:00", "9:00"],
+            "end": ["10:35", "10:35", "10:35", "10:35"],
+            "place": [[1, 2], [2, 1, 1], [1], [1, 2]],
+            "group": [[5], [5], [5], [5]],
+            "teacher": [[7], [7], [7], [7]],
+        })
+
+        fingerprints = add_fingerprints(data)["fingerprint"].to_list()
+
+        assert fingerprints[0] == fingerprints[1]
+        assert fingerprints[0] != fingerprints[2]
+        assert fingerprints[0] != fingerprints[3]
+        assert len(fingerprints[0]) == 40
@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+import pandas as pd
+
+from profcomff_parse_lib.timetable import apply_overrides
+from profcomff_parse_lib.timetable.core.replace_lessons import replace_lessons
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            "group": ["101", "101", "102", "407"],
+            "weekday": [0, 1, 0, 4],
+            "subject": ["A", "B", "A", "C"],
+            "teacher": [["x"], ["y"], ["x", "z"], ["w"]],
+        })
+
+    def test_delete(self):
+        new_data, problems = apply_overrides(self.data, [
+            {"action": "delete", "match": {"group": "101"}},
+            {"action": "delete", "match": {"group": "407", "weekday": 4}},
+        ])
+        assert new_data["group"].to_list() == ["102"]
+        assert problems == []
+
+    def test_replace_and_list_columns(self):
+        new_data, problems = apply_overrides(self.data, [
+            {"action": "replace", "match": {"teacher": ["x", "z"]}, "values": {"subject": "D"}},
+        ])
+        assert new_data["subject"].to_list() == ["A", "B", "D", "C"]
+        assert self.data["subject"].to_list() == ["A", "B", "A", "C"]
+        assert problems == []
+
+    def test_add(self):
+        new_data, _ = apply_overrides(self.data, [
+            {"action": "add", "values": {"group": "103", "weekday": 2, "subject": "E", "teacher": ["q"]}},
+        ])
+        assert new_data["group"].to_list() == ["101", "101", "102", "407", "103"]
+
+    def test_problems_are_reported(self):
+        new_data, problems = apply_overrides(self.data, [
+            {"id": 1, "action": "replace", "match": {"subject": "A"}, "values": {"subject": "F"}},
+            {"id": 2, "action": "delete", "match": {"group": "999"}},
+            {"id": 3, "action": "replace", "match": {"group": "407"}, "values": {"subject": "G"}},
+            {"id": 4, "action": "replace", "match": {"weekday": 4}, "values": {"subject": "H"}},
+            {"id": 5, "action": "delete", "match": {"room": "1"}},
+        ])
+        assert new_data["subject"].to_list() == ["A", "B", "A", "C"]
+        assert sorted((problem["rule"], problem["problem"]) for problem in problems) == [
+            (1, "multiple_matches"), (2, "no_match"), (3, "overlapping_rules"), (5, "unknown_columns"),
+        ]
+
+    def test_replace_lessons_does_not_exit(self):
+        new_data, problems = replace_lessons(self.data, [
+            {"requires": {"group": "101"}, "replace": {"subject": "Z"}},
+            {"requires": {"group": "102"}, "replace": {"subject": "Y"}},
+        ])
+        assert new_data["subject"].to_list() == ["A", "B", "Y", "C"]
+        assert [problem["rule"] for problem in problems] == [0]
@@ -0,0 +1,201 @@
+"""
+Быстрый путь сериализации списков против прежнего пути через ORM и response_model.
+
+Заполняет временную SQLite-базу постами с комментариями и лайками,
+меню с блюдами и мероприятиями с галереей и для страницы каждого списка
+измеряет стоимость одного элемента:
+- прежний путь: ORM-объекты, сборка pydantic-схем, повторная валидация
+  списка по response_model, как в FastAPI, и стандартный json;
+- быстрый путь: SQL-проекция, словари и fast_json.dumps.
+
+Запуск: python benchmarks/list_serialization.py [--posts 2000] [--page 100] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fast_json
+from dependencies import convert_daily_menu_to_schema, daily_menu_rows_query, daily_menu_rows_to_dicts
+from feed import event_images
+from models import (
+    Base, UserDB, PostDB, CommentDB, EventDB, GalleryImageDB, DailyMenuDB, DishDB, DishCategoryDB,
+    post_likes, daily_menu_dishes
+)
+from pagination import paginate
+from routes.events import AfishaEvent, afisha_tag
+from routes.posts import convert_post_db_to_schema, post_query, post_rows_query, post_rows_to_dicts
+from schemas import DailyMenu, Post
+
+USERS = 200
+COMMENTS_PER_POST = 5
+LIKES_PER_POST = 10
+
+
+def seed(session, posts: int, menus: int, events: int):
+    rng = random.Random(42)
+    start = datetime(2024, 9, 1)
+    session.bulk_insert_mappings(UserDB, [
+        {"email": f"user{i}@example.com", "username": f"user{i}", "first_name": "Имя",
+         "last_name": "Фамилия", "hashed_password": "x"}
+        for i in range(1, USERS + 1)
+    ])
+    session.bulk_insert_mappings(PostDB, [
+        {"title": f"Пост {i}", "content": "Текст поста " * rng.randint(5, 60), "author_id": rng.randint(1, USERS),
+         "category": "Флудилка", "created_at": start + timedelta(minutes=i),
+         "like_count": LIKES_PER_POST, "comment_count": COMMENTS_PER_POST}
+        for i in range(posts)
+    ])
+    session.bulk_insert_mappings(CommentDB, [
+        {"post_id": post_id, "content": "Комментарий", "author_id": rng.randint(1, USERS),
+         "created_at": start + timedelta(minutes=post_id, seconds=j)}
+        for post_id in range(1, posts + 1) for j in range(COMMENTS_PER_POST)
+    ])
+    session.execute(post_likes.insert(), [
+        {"post_id": post_id, "user_id": user_id}
+        for post_id in range(1, posts + 1) for user_id in rng.sample(range(1, USERS + 1), LIKES_PER_POST)
+    ])
+
+    session.add(DishCategoryDB(name="Обеды"))
+    session.flush()
+    session.bulk_insert_mappings(DishDB, [
+        {"name": f"Блюдо {i}", "price": 100, "category_id": 1} for i in range(50)
+    ])
+    session.bulk_insert_mappings(DailyMenuDB, [
+        {"date": date(2024, 1, 1) + timedelta(days=i), "price": 250, "created_at": start + timedelta(days=i)}
+        for i in range(menus)
+    ])
+    session.execute(daily_menu_dishes.insert(), [
+        {"daily_menu_id": menu_id, "dish_id": dish_id}
+        for menu_id in range(1, menus + 1) for dish_id in rng.sample(range(1, 51), 4)
+    ])
+
+    session.bulk_insert_mappings(EventDB, [
+        {"title": f"Мероприятие {i}", "description": "Описание " * 50, "location": "Здравница",
+         "start_date": start + timedelta(days=i), "end_date": start + timedelta(days=i, hours=3),
+         "max_participants": 50, "created_at": start + timedelta(hours=i)}
+        for i in range(events)
+    ])
+    session.bulk_insert_mappings(GalleryImageDB, [
+        {"event_id": event_id, "image_url": f"/static/gallery/{event_id}-{j}.png"}
+        for event_id in range(1, events + 1) for j in range(3)
+    ])
+    session.commit()
+
+
+def render(model, items) -> bytes:
+    """Что делает FastAPI с обычным результатом: валидация по response_model, затем JSONResponse."""
+    adapter = TypeAdapter(List[model])
+    content = adapter.dump_python(adapter.validate_python(items, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def legacy_posts(session, page: int) -> bytes:
+    posts = paginate(post_query(session, include_likes=True), PostDB, limit=page)
+    return render(Post, [convert_post_db_to_schema(post) for post in posts])
+
+
+def fast_posts(session, page: int) -> bytes:
+    rows = paginate(post_rows_query(session), PostDB, limit=page)
+    return fast_json.dumps(post_rows_to_dicts(session, rows, include_likes=True))
+
+
+def legacy_menus(session, page: int) -> bytes:
+    menus = paginate(session.query(DailyMenuDB), DailyMenuDB, limit=page)
+    return render(DailyMenu, [convert_daily_menu_to_schema(menu) for menu in menus])
+
+
+def fast_menus(session, page: int) -> bytes:
+    rows = paginate(daily_menu_rows_query(session), DailyMenuDB, limit=page)
+    return fast_json.dumps(daily_menu_rows_to_dicts(session, rows))
+
+
+def legacy_afisha(session, page: int) -> bytes:
+    result = []
+    for event in paginate(session.query(EventDB), EventDB, limit=page):
+        image = session.query(GalleryImageDB).filter(GalleryImageDB.event_id == event.id).first()
+        result.append({
+            "id": event.id,
+            "title": event.title,
+            "description": event.description[:200] + "..." if len(event.description) > 200 else event.description,
+            "image": image.image_url if image and image.image_url else "/event1.png",
+            "tag": afisha_tag(event.location),
+            "fullDescription": event.description,
+            "created_at": event.created_at.isoformat() if event.created_at else None,
+            "start_date": event.start_date.isoformat() if event.start_date else None,
+            "end_date": event.end_date.isoformat() if event.end_date else None,
+        })
+    return render(AfishaEvent, result)
+
+
+def fast_afisha(session, page: int) -> bytes:
+    rows = paginate(session.query(
+        EventDB.id, EventDB.title, EventDB.description, EventDB.location,
+        EventDB.created_at, EventDB.start_date, EventDB.end_date
+    ), EventDB, limit=page)
+    images = event_images(session, [row.id for row in rows])
+    return fast_json.dumps([
+        {
+            "id": row.id,
+            "title": row.title,
+            "description": row.description[:200] + "..." if len(row.description) > 200 else row.description,
+            "image": images[row.id],
+            "tag": afisha_tag(row.location),
+            "fullDescription": row.description,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "start_date": row.start_date.isoformat() if row.start_date else None,
+            "end_date": row.end_date.isoformat() if row.end_date else None,
+        }
+        for row in rows
+    ])
+
+
+def per_item_us(Session, build, page: int, repeat: int) -> float:
+    # Новая сессия на каждый запрос, как в get_db: без прогретой identity map
+    started = time.perf_counter()
+    for _ in range(repeat):
+        with Session() as session:
+            build(session, page)
+    return (time.perf_counter() - started) / (repeat * page) * 1e6
+
+
+def run_benchmark(posts: int, page: int, repeat: int):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+
+        with Session() as session:
+            seed(session, posts, page, page)
+        encoder = "orjson" if fast_json.orjson is not None else "json"
+        print(f"Corpus: {posts} posts, page of {page} items, fast encoder: {encoder}")
+
+        for name, legacy, fast in (("posts", legacy_posts, fast_posts), ("menu", legacy_menus, fast_menus),
+                                   ("afisha", legacy_afisha, fast_afisha)):
+            with Session() as session:
+                assert json.loads(legacy(session, page)) == json.loads(fast(session, page)), name
+            legacy_us = per_item_us(Session, legacy, page, repeat)
+            fast_us = per_item_us(Session, fast, page, repeat)
+            print(f"{name}: {legacy_us:.1f} us/item -> {fast_us:.1f} us/item ({legacy_us / fast_us:.1f}x faster)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run_benchmark(args.posts, args.page, args.repeat)
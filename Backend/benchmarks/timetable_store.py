@@ -0,0 +1,134 @@
+"""
+Сравнение компактного снимка расписания (timetable_index) с ORM-путем.
+
+Заполняет временную SQLite-базу синтетическим расписанием и измеряет:
+- память, занятую загруженным расписанием (tracemalloc);
+- время ответа "расписание группы на неделю".
+
+Запуск: python benchmarks/timetable_store.py [--groups 150] [--lessons 4000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, selectinload
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Base, TeacherDB, GroupDB, SubjectDB, PlaceDB, LessonDB, lesson_groups
+from timetable_index import build_timetable_index
+
+TIMES = [("09:00", "10:35"), ("10:50", "12:25"), ("13:30", "15:05"),
+         ("15:20", "16:55"), ("17:05", "18:40"), ("18:55", "20:30")]
+
+
+def seed(session, groups: int, lessons: int):
+    rng = random.Random(42)
+    group_rows = [GroupDB(number=f"{100 + i}", name=f"Группа {i}") for i in range(groups)]
+    teacher_rows = [TeacherDB(name=f"Преподаватель {i} И. О.") for i in range(groups * 5)]
+    subject_rows = [SubjectDB(name=f"Предмет номер {i}") for i in range(groups * 4)]
+    place_rows = [PlaceDB(name=f"{i // 30}-{i % 30}") for i in range(groups * 2)]
+    session.add_all(group_rows + teacher_rows + subject_rows + place_rows)
+    session.flush()
+
+    for _ in range(lessons):
+        number = rng.randrange(len(TIMES))
+        lesson = LessonDB(
+            subject_id=rng.choice(subject_rows).id,
+            weekday=rng.randrange(6),
+            number=number + 1,
+            start_time=TIMES[number][0],
+            end_time=TIMES[number][1],
+            odd_week=rng.random() < 0.8,
+            even_week=rng.random() < 0.8,
+        )
+        lesson.teachers = rng.sample(teacher_rows, rng.choice((1, 1, 2)))
+        lesson.places = rng.sample(place_rows, 1)
+        lesson.groups = rng.sample(group_rows, rng.choice((1, 1, 2, 4)))
+        session.add(lesson)
+    session.commit()
+
+
+def orm_group_lessons(session, group_id: int):
+    """Исходный путь: запрос пар группы и ленивые обращения к связям."""
+    lessons = session.query(LessonDB).join(
+        lesson_groups, LessonDB.id == lesson_groups.c.lesson_id
+    ).filter(lesson_groups.c.group_id == group_id).order_by(LessonDB.weekday, LessonDB.number).all()
+    return [
+        {
+            "id": lesson.id,
+            "subject": lesson.subject.name if lesson.subject else "Нет данных",
+            "teachers": [teacher.name for teacher in lesson.teachers],
+            "places": [place.name for place in lesson.places],
+            "weekday": lesson.weekday,
+            "number": lesson.number,
+            "start_time": lesson.start_time,
+            "end_time": lesson.end_time,
+            "odd_week": lesson.odd_week,
+            "even_week": lesson.even_week,
+        }
+        for lesson in lessons
+    ]
+
+
+def measure_memory(loader):
+    gc.collect()
+    tracemalloc.start()
+    result = loader()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def measure_latency(call, group_ids, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for group_id in group_ids:
+            call(group_id)
+    return (time.perf_counter() - started) / (repeat * len(group_ids)) * 1000
+
+
+def run_benchmark(groups: int, lessons: int, repeat: int):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+
+        with Session() as session:
+            seed(session, groups, lessons)
+
+        with Session() as session:
+            loaded, orm_bytes = measure_memory(lambda: session.query(LessonDB).options(
+                selectinload(LessonDB.subject), selectinload(LessonDB.teachers),
+                selectinload(LessonDB.places), selectinload(LessonDB.groups)
+            ).all())
+            print(f"ORM: {len(loaded)} lessons loaded, {orm_bytes / 1024:.0f} KiB")
+
+        with Session() as session:
+            index, index_bytes = measure_memory(lambda: build_timetable_index(session))
+            print(f"Store: {len(index)} lessons loaded, {index_bytes / 1024:.0f} KiB")
+
+        group_ids = list(index.groups.ids)
+        with Session() as session:
+            orm_ms = measure_latency(lambda group_id: orm_group_lessons(session, group_id), group_ids, 1)
+        store_ms = measure_latency(index.group_schedule, group_ids, repeat)
+        print(f"Group week schedule: ORM {orm_ms:.3f} ms, store {store_ms:.3f} ms "
+              f"({orm_ms / store_ms:.0f}x faster)")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--groups", type=int, default=150)
+    parser.add_argument("--lessons", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run_benchmark(args.groups, args.lessons, args.repeat)
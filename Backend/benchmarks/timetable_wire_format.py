@@ -0,0 +1,81 @@
+"""
+Размер и время сериализации недельного расписания группы:
+обычный JSON против compact-v1 (словарь строк) и MessagePack.
+
+Запуск: python benchmarks/timetable_wire_format.py [--groups 150] [--lessons 4000]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Base
+from timetable_index import build_timetable_index
+from timetable_wire import encode_compact, msgpack
+from timetable_store import seed
+
+
+def encode_json(lessons):
+    return json.dumps(lessons, ensure_ascii=False).encode("utf-8")
+
+
+def encode_json_fastapi(lessons):
+    """Обычный путь ответа FastAPI: jsonable_encoder перед json.dumps."""
+    return json.dumps(jsonable_encoder(lessons), ensure_ascii=False).encode("utf-8")
+
+
+def encode_compact_json(lessons):
+    return json.dumps(encode_compact(lessons), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_msgpack(lessons):
+    return msgpack.packb(encode_compact(lessons))
+
+
+def run_benchmark(groups: int, lessons: int, repeat: int):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as session:
+            seed(session, groups, lessons)
+            index = build_timetable_index(session)
+        engine.dispose()
+
+    schedules = [index.group_schedule(group_id) for group_id in index.groups.ids]
+    encoders = [("json", encode_json), ("json+enc", encode_json_fastapi), ("compact", encode_compact_json)]
+    if msgpack is not None:
+        encoders.append(("msgpack", encode_msgpack))
+
+    print(f"{len(schedules)} groups, {sum(map(len, schedules)) / len(schedules):.1f} lessons per group")
+    print(f"{'format':<10}{'bytes':>10}{'gzip':>10}{'us/response':>14}")
+    for name, encode in encoders:
+        bodies = [encode(schedule) for schedule in schedules]
+        raw = sum(map(len, bodies)) / len(bodies)
+        compressed = sum(len(gzip.compress(body)) for body in bodies) / len(bodies)
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for schedule in schedules:
+                encode(schedule)
+        elapsed = (time.perf_counter() - started) / (repeat * len(schedules)) * 1e6
+        print(f"{name:<10}{raw:>10.0f}{compressed:>10.0f}{elapsed:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--groups", type=int, default=150)
+    parser.add_argument("--lessons", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    run_benchmark(args.groups, args.lessons, args.repeat)
@@ -5,4 +5,21 @@ load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-for-development")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30 
\ No newline at end of file
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+# Порог конфликтов (двойных бронирований) в новом расписании, выше которого
+# обновление не применяется. Пусто — не блокировать.
+TIMETABLE_MAX_CONFLICTS = int(os.getenv("TIMETABLE_MAX_CONFLICTS")) if os.getenv("TIMETABLE_MAX_CONFLICTS") else None
+
+# Плановое обновление расписания: cron-выражения через ";" (например
+# "*/30 7-22 * * 1-6"). Пусто — планировщик выключен.
+TIMETABLE_SCHEDULE = os.getenv("TIMETABLE_SCHEDULE", "")
+# Случайная задержка запуска в секундах, чтобы не бить по источнику ровно по часам
+TIMETABLE_SCHEDULE_JITTER = int(os.getenv("TIMETABLE_SCHEDULE_JITTER", "300"))
+
+# Кэш ответов публичных справочников (новости, афиша, меню, блюда, база знаний,
+# галерея). RESPONSE_CACHE_ENABLED=0 выключает его полностью.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+# Время жизни записи в секундах и максимальное число записей (LRU)
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
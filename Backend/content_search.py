@@ -0,0 +1,197 @@
+import html
+import logging
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import DateTime, Float, Integer, String, inspect, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+_logger = logging.getLogger(__name__)
+
+
+class SearchSource(NamedTuple):
+    table: str
+    fts_table: str
+    title_column: str
+    body_column: str
+
+
+SEARCH_SOURCES: Dict[str, SearchSource] = {
+    "post": SearchSource("posts", "posts_fts", "title", "content"),
+    "news": SearchSource("news", "news_fts", "title", "content"),
+    "knowledge": SearchSource("knowledge_base", "knowledge_fts", "title", "description"),
+}
+SEARCH_TYPES = tuple(SEARCH_SOURCES)
+
+# unicode61 приводит кириллицу к нижнему регистру, но "ё" не сводит
+# к "е", поэтому текст нормализуется при записи в индекс (_normalized).
+_TOKENIZE = "unicode61 remove_diacritics 2"
+
+# Вес совпадения в заголовке относительно текста для bm25
+TITLE_WEIGHT = 5.0
+SNIPPET_TOKENS = 16
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+# snippet() вставляет маркеры как есть, а текст постов пользовательский:
+# FTS5 размечает совпадения управляющими символами, после экранирования
+# HTML они заменяются на теги.
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Окончания русских слов, от длинных к коротким. Стеммера для русского
+# в FTS5 нет, поэтому слово запроса обрезается до основы и ищется как
+# префикс: "лекции" -> "лекци*" находит "лекция", "лекциями" и т. д.
+_ENDINGS = sorted((
+    "иями", "ями", "ами", "иях", "ях", "ах", "ого", "его", "ому", "ему", "ыми", "ими",
+    "ой", "ей", "ий", "ый", "ая", "яя", "ое", "ее", "ие", "ые", "ов", "ев", "ом", "ем",
+    "ам", "ям", "ую", "юю", "ию", "ия", "ье", "ья", "ьи", "ть", "ешь", "ет", "ют", "ут",
+    "а", "я", "о", "е", "и", "ы", "у", "ю", "ь", "й",
+), key=len, reverse=True)
+_MIN_STEM = 3
+
+
+def stem(word: str) -> str:
+    word = word.lower().replace("ё", "е")
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Строка запроса -> выражение MATCH: каждое слово в кавычках как префикс
+    основы, слова объединяются по И. Кавычки исключают синтаксис FTS5
+    из пользовательского ввода.
+    """
+    terms = [stem(word) for word in _WORD.findall(query)]
+    terms = [term.replace('"', '""') for term in terms if term]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _escape_snippet(snippet: Optional[str]) -> str:
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_MARK_START, SNIPPET_START).replace(_MARK_END, SNIPPET_END)
+
+
+def _normalized(column: str) -> str:
+    return f"replace(replace(coalesce({column}, ''), 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _statements(source: SearchSource) -> List[str]:
+    table, fts = source.table, source.fts_table
+    title, body = source.title_column, source.body_column
+    new_values = f"new.id, {_normalized('new.' + title)}, {_normalized('new.' + body)}"
+    return [
+        # Индекс хранит свою нормализованную копию текста: из нее же
+        # строятся фрагменты для выдачи.
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"title, body, tokenize='{_TOKENIZE}')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, title, body) VALUES ({new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = old.id; END",
+        # Только при изменении индексируемых колонок: лайки и счетчики
+        # обновляют posts постоянно, переиндексация им не нужна.
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {title}, {body} ON {table} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = old.id; "
+        f"INSERT INTO {fts}(rowid, title, body) VALUES ({new_values}); END",
+    ]
+
+
+def rebuild_search_index(connection) -> None:
+    """Переиндексирует все источники по текущему содержимому таблиц (бэкфилл)."""
+    for source in SEARCH_SOURCES.values():
+        fts = source.fts_table
+        connection.execute(text(f"DELETE FROM {fts}"))
+        connection.execute(text(
+            f"INSERT INTO {fts}(rowid, title, body) SELECT id, "
+            f"{_normalized(source.title_column)}, {_normalized(source.body_column)} FROM {source.table}"
+        ))
+
+
+def ensure_search_index(engine) -> bool:
+    """
+    Создает FTS5-таблицы и триггеры, которые держат их в синхронизации
+    с posts, news и knowledge_base при любой записи — из роутов, скриптов
+    или миграций. Новые таблицы сразу заполняются из существующих данных.
+    Возвращает False, если SQLite собран без FTS5 — тогда поиск просто
+    недоступен.
+    """
+    try:
+        with engine.begin() as connection:
+            existing = set(inspect(connection).get_table_names())
+            created = False
+            for source in SEARCH_SOURCES.values():
+                created = created or source.fts_table not in existing
+                for statement in _statements(source):
+                    connection.execute(text(statement))
+            if created:
+                rebuild_search_index(connection)
+        return True
+    except OperationalError:
+        _logger.warning("Полнотекстовый поиск отключен: SQLite без поддержки FTS5", exc_info=True)
+        return False
+
+
+def search_content(db: Session, query: str, types: Optional[Sequence[str]] = None, limit: int = 20) -> List[dict]:
+    """
+    Ищет по выбранным источникам и возвращает общий список с фрагментами
+    текста вокруг совпадений (HTML экранирован, совпадения в <mark>).
+
+    Общий список отсортирован по bm25 (score = -bm25, больше — релевантнее).
+    Веса колонок у всех источников одинаковые, поэтому оценки сравнимы:
+    сильное совпадение в одном источнике стоит выше слабого в другом.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+
+    results = []
+    for result_type in dict.fromkeys(types or SEARCH_TYPES):
+        source = SEARCH_SOURCES[result_type]
+        fts = source.fts_table
+        rows = db.execute(text(
+            f"SELECT t.id, t.title, t.created_at, "
+            f"snippet({fts}, -1, :start, :end, '…', :tokens) AS snippet, "
+            f"bm25({fts}, :title_weight, 1.0) AS rank "
+            f"FROM {fts} JOIN {source.table} AS t ON t.id = {fts}.rowid "
+            f"WHERE {fts} MATCH :match ORDER BY rank LIMIT :limit"
+        ).columns(id=Integer, title=String, created_at=DateTime, snippet=String, rank=Float), {
+            "start": _MARK_START, "end": _MARK_END, "tokens": SNIPPET_TOKENS,
+            "title_weight": TITLE_WEIGHT, "match": match, "limit": limit,
+        })
+        results.extend(
+            {
+                "type": result_type,
+                "id": row.id,
+                "title": row.title,
+                "snippet": _escape_snippet(row.snippet),
+                "score": -row.rank,
+                "created_at": row.created_at,
+            }
+            for row in rows
+        )
+
+    results.sort(key=lambda item: item["score"], reverse=True)
+    return results[:limit]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Полнотекстовый индекс постов, новостей и базы знаний")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    if ensure_search_index(engine):
+        with engine.begin() as connection:
+            rebuild_search_index(connection)
+        print("Поисковый индекс перестроен")
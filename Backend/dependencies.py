@@ -4,9 +4,11 @@ from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from typing import Optional
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, List, Optional
 
-from models import UserDB, DailyMenuDB
+from models import UserDB, DailyMenuDB, daily_menu_dishes
 from schemas import TokenData
 from database import SessionLocal
 from config import SECRET_KEY, ALGORITHM
@@ -102,12 +104,56 @@ def convert_to_db_types(data):
     return data
 
 
+def menu_price(price: Optional[float]) -> Optional[int]:
+    """
+    Цена меню в целых рублях, как в схеме DailyMenu. Через API дробная
+    цена не записывается, но колонка — Float, и строки из скриптов или
+    старых данных могут ее содержать: такая цена округляется до рубля
+    (половина — вверх) одинаково в обоих путях выдачи, а не ломает список.
+    """
+    if price is None:
+        return None
+    return int(Decimal(str(price)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
 def convert_daily_menu_to_schema(db_menu: DailyMenuDB) -> dict:
     return {
         "id": db_menu.id,
         "date": db_menu.date,
-        "price": db_menu.price,
+        "price": menu_price(db_menu.price),
         "dishes": [dish.id for dish in db_menu.dishes],
         "created_at": db_menu.created_at,
         "updated_at": db_menu.updated_at
     }
+
+
+def daily_menu_rows_query(db: Session):
+    return db.query(
+        DailyMenuDB.id, DailyMenuDB.date, DailyMenuDB.price, DailyMenuDB.created_at, DailyMenuDB.updated_at
+    )
+
+
+def daily_menu_rows_to_dicts(db: Session, rows) -> List[dict]:
+    """
+    Страница меню в форме схемы DailyMenu: id блюд всех меню читаются
+    одним запросом к daily_menu_dishes вместо ленивой загрузки на каждое меню.
+    """
+    menu_ids = [row.id for row in rows]
+    dishes: Dict[int, List[int]] = defaultdict(list)
+    if menu_ids:
+        dish_rows = db.query(daily_menu_dishes.c.daily_menu_id, daily_menu_dishes.c.dish_id).filter(
+            daily_menu_dishes.c.daily_menu_id.in_(menu_ids)
+        ).order_by(daily_menu_dishes.c.daily_menu_id, daily_menu_dishes.c.dish_id)
+        for menu_id, dish_id in dish_rows:
+            dishes[menu_id].append(dish_id)
+    return [
+        {
+            "date": row.date,
+            "price": menu_price(row.price),
+            "dishes": dishes[row.id],
+            "id": row.id,
+            "created_at": row.created_at,
+            "updated_at": row.updated_at,
+        }
+        for row in rows
+    ]
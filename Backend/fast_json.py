@@ -0,0 +1,53 @@
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него работает стандартный json
+    orjson = None
+
+# Заголовки, которые Response() выставляет сам для пустого тела
+_SKIPPED_HEADERS = ("content-length", "content-type")
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """JSON в UTF-8 без пробелов; даты — в ISO-формате, как у pydantic."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_json_response(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Готовый ответ для списков, собранных прямо из SQL-проекций.
+
+    Возвращенный Response FastAPI отдает как есть: response_model остается
+    только для документации, повторной валидации и jsonable_encoder нет.
+    Поэтому строки должны собираться из колонок с теми же типами, что и
+    в схеме. Заголовки, выставленные в параметре response (X-Next-Cursor),
+    переносятся в ответ.
+    """
+    headers = None
+    if response is not None:
+        headers = {
+            name: value for name, value in response.headers.items() if name not in _SKIPPED_HEADERS
+        }
+    return FastJSONResponse(content, headers=headers)
@@ -0,0 +1,180 @@
+import base64
+import binascii
+import heapq
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import PostDB, NewsDB, EventDB, GalleryImageDB, UserDB
+from pagination import keyset_filter
+
+FEED_TYPES = ("post", "news", "event")
+EXCERPT_LENGTH = 200
+DEFAULT_EVENT_IMAGE = "/event1.png"
+
+# Позиция источника в курсоре: (created_at, id) последнего отданного
+# элемента; None — источник исчерпан.
+Position = Optional[Tuple[Optional[datetime], int]]
+_EXHAUSTED = "end"
+
+
+def encode_feed_cursor(positions: Dict[str, Position]) -> str:
+    payload = {
+        source: _EXHAUSTED if position is None else [
+            position[0].isoformat() if position[0] else None, position[1]
+        ]
+        for source, position in positions.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_feed_cursor(cursor: str) -> Dict[str, Position]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        positions = {}
+        for source, position in payload.items():
+            if source not in FEED_TYPES:
+                raise ValueError(source)
+            if position == _EXHAUSTED:
+                positions[source] = None
+            else:
+                stamp, item_id = position
+                positions[source] = (datetime.fromisoformat(stamp) if stamp else None, int(item_id))
+        return positions
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, AttributeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор пагинации"
+        )
+
+
+def _excerpt(column):
+    # Начало текста обрезается в SQL, полный текст из базы не читается
+    return func.substr(column, 1, EXCERPT_LENGTH + 1).label("excerpt")
+
+
+def _source_query(db: Session, source: str):
+    if source == "post":
+        return db.query(
+            PostDB.id, PostDB.title, _excerpt(PostDB.content), PostDB.photo_url.label("image_url"),
+            PostDB.created_at, PostDB.author_id, UserDB.username, PostDB.like_count, PostDB.comment_count
+        ).outerjoin(UserDB, UserDB.id == PostDB.author_id), PostDB
+    if source == "news":
+        return db.query(
+            NewsDB.id, NewsDB.title, _excerpt(NewsDB.content), NewsDB.image_url,
+            NewsDB.created_at, NewsDB.author_id, UserDB.username
+        ).outerjoin(UserDB, UserDB.id == NewsDB.author_id), NewsDB
+    return db.query(
+        EventDB.id, EventDB.title, _excerpt(EventDB.description), EventDB.created_at,
+        EventDB.start_date, EventDB.location
+    ), EventDB
+
+
+def _card(source: str, row) -> dict:
+    excerpt = row.excerpt or ""
+    card = {
+        "type": source,
+        "id": row.id,
+        "title": row.title,
+        "excerpt": excerpt[:EXCERPT_LENGTH] + "..." if len(excerpt) > EXCERPT_LENGTH else excerpt,
+        "image_url": None,
+        "created_at": row.created_at,
+        # Все поля FeedCard, чтобы ответ совпадал со схемой без ее валидации
+        "author": None,
+        "like_count": None,
+        "comment_count": None,
+        "start_date": None,
+        "location": None,
+    }
+    if source == "event":
+        card.update(start_date=row.start_date, location=row.location)
+    else:
+        card.update(
+            image_url=row.image_url,
+            author={"id": row.author_id, "username": row.username or "Неизвестный пользователь"},
+        )
+    if source == "post":
+        card.update(like_count=row.like_count or 0, comment_count=row.comment_count or 0)
+    return card
+
+
+def _sort_key(row) -> tuple:
+    # Ключ для слияния по убыванию: строки без даты идут в конце,
+    # как и в SQLite, где NULL меньше любой даты.
+    return (row.created_at is not None, row.created_at or datetime.min, row.id)
+
+
+def event_images(db: Session, event_ids: List[int]) -> Dict[int, str]:
+    """Картинка мероприятия — первое фото из галереи; один запрос на всю страницу."""
+    if not event_ids:
+        return {}
+    first_images = db.query(
+        GalleryImageDB.event_id, func.min(GalleryImageDB.id).label("image_id")
+    ).filter(GalleryImageDB.event_id.in_(event_ids)).group_by(GalleryImageDB.event_id).subquery()
+    images = dict(
+        db.query(first_images.c.event_id, GalleryImageDB.image_url)
+        .join(GalleryImageDB, GalleryImageDB.id == first_images.c.image_id)
+    )
+    return {event_id: images.get(event_id) or DEFAULT_EVENT_IMAGE for event_id in event_ids}
+
+
+def _attach_event_images(db: Session, cards: List[dict]) -> None:
+    images = event_images(db, [card["id"] for card in cards if card["type"] == "event"])
+    for card in cards:
+        if card["type"] == "event":
+            card["image_url"] = images[card["id"]]
+
+
+def read_feed(db: Session, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    Общая лента постов, новостей и мероприятий от новых к старым.
+
+    Каждый источник читается по индексу (created_at, id) не больше чем на
+    limit строк после своей позиции в курсоре, затем потоки сливаются
+    (k-way merge) и отдаются первые limit карточек. Курсор хранит позицию
+    каждого источника отдельно, поэтому следующая страница продолжает
+    каждый поток ровно с того места, где он остановился.
+
+    Returns:
+        Карточки страницы и курсор следующей страницы (None, если это конец)
+    """
+    # Источника нет в курсоре — читаем его с начала
+    positions: Dict[str, Position] = decode_feed_cursor(cursor) if cursor else {}
+
+    streams = {}
+    for source in FEED_TYPES:
+        if source in positions and positions[source] is None:
+            continue
+        query, model = _source_query(db, source)
+        if positions.get(source) is not None:
+            query = query.filter(keyset_filter(model, *positions[source]))
+        streams[source] = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit).all()
+
+    merged = heapq.merge(
+        *[[(source, row) for row in rows] for source, rows in streams.items()],
+        key=lambda item: _sort_key(item[1]), reverse=True
+    )
+    page = list(islice(merged, limit))
+
+    emitted: Dict[str, int] = {}
+    for source, row in page:
+        positions[source] = (row.created_at, row.id)
+        emitted[source] = emitted.get(source, 0) + 1
+    for source, rows in streams.items():
+        # Источник вернул меньше limit строк и все они попали на страницу
+        if len(rows) < limit and emitted.get(source, 0) == len(rows):
+            positions[source] = None
+
+    cards = [_card(source, row) for source, row in page]
+    _attach_event_images(db, cards)
+
+    if all(source in positions and positions[source] is None for source in FEED_TYPES):
+        return cards, None
+    return cards, encode_feed_cursor(positions)
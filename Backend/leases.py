@@ -0,0 +1,165 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import JobLeaseDB
+
+DEFAULT_LEASE_TTL = 120
+# Пауза перед повторным продлением, если база была занята
+LEASE_RETRY_SECONDS = 5
+
+_logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """Аренда истекла или перехвачена: задачу мог подхватить другой процесс."""
+
+
+def make_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Lease:
+    """
+    Межпроцессная аренда задачи на строке job_leases.
+
+    Захватить аренду может только один процесс: строка либо свободна,
+    либо ее срок истек (владелец упал и перестал продлевать). Пока задача
+    работает, фоновый поток продлевает срок каждые ttl/3 секунд; если
+    продлить не удалось до истечения срока, выставляется lost, и задача
+    должна остановиться перед следующим изменяющим шагом (см. check).
+
+    Пока задача держит долгую пишущую транзакцию, поток продлить аренду
+    не может (в SQLite — "database is locked"): такая задача продлевает
+    ее сама в своей транзакции (см. renew).
+    """
+
+    def __init__(self, name: str, ttl: int = DEFAULT_LEASE_TTL, session_factory=SessionLocal):
+        self.name = name
+        self.ttl = timedelta(seconds=ttl)
+        self.owner = make_owner_id()
+        self.lost = False
+        self.expires_at: Optional[datetime] = None
+        self._session_factory = session_factory
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def acquire(self) -> bool:
+        now = datetime.utcnow()
+        values = {"owner": self.owner, "acquired_at": now, "heartbeat_at": now, "expires_at": now + self.ttl, "run_id": None}
+        with self._session_factory() as db:
+            updated = (
+                db.query(JobLeaseDB)
+                .filter(JobLeaseDB.name == self.name, or_(JobLeaseDB.expires_at < now, JobLeaseDB.owner == self.owner))
+                .update(values, synchronize_session=False)
+            )
+            if not updated:
+                db.add(JobLeaseDB(name=self.name, **values))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Строка уже есть и принадлежит другому живому процессу
+                db.rollback()
+                return False
+
+        self.lost = False
+        self.expires_at = values["expires_at"]
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._beat, name=f"lease-{self.name}", daemon=True)
+        self._heartbeat.start()
+        return True
+
+    def _update(self, **values) -> bool:
+        with self._session_factory() as db:
+            updated = (
+                db.query(JobLeaseDB)
+                .filter(JobLeaseDB.name == self.name, JobLeaseDB.owner == self.owner)
+                .update(values, synchronize_session=False)
+            )
+            db.commit()
+        return bool(updated)
+
+    def _beat(self) -> None:
+        interval = self.ttl.total_seconds() / 3
+        retry = min(interval, LEASE_RETRY_SECONDS)
+        delay = interval
+        while not self._stop.wait(delay):
+            now = datetime.utcnow()
+            try:
+                renewed = self._update(heartbeat_at=now, expires_at=now + self.ttl)
+            except SQLAlchemyError:
+                # Например, "database is locked". Повторяем и после истечения
+                # срока: строку может продлить сама задача (renew), и тогда
+                # поток снова подхватит продление.
+                if not self.lost and now + timedelta(seconds=retry) >= self.expires_at:
+                    _logger.error(f"Не удалось продлить аренду {self.name}, срок истекает", exc_info=True)
+                    self.lost = True
+                elif not self.lost:
+                    _logger.warning(f"Не удалось продлить аренду {self.name}, повтор через {retry} с", exc_info=True)
+                delay = retry
+                continue
+            if not renewed:
+                self.lost = True
+                return
+            self.expires_at = now + self.ttl
+            self.lost = False
+            delay = interval
+
+    def renew(self, db: Session) -> None:
+        """
+        Продлевает аренду в транзакции db без коммита: продление фиксируется
+        вместе с изменениями задачи. Строка обновляется, только если
+        владелец по-прежнему этот процесс, поэтому истекший по часам, но не
+        перехваченный срок можно продлить; если аренду перехватили,
+        бросает LeaseLost, и транзакцию задачи нужно откатить.
+        """
+        now = datetime.utcnow()
+        updated = (
+            db.query(JobLeaseDB)
+            .filter(JobLeaseDB.name == self.name, JobLeaseDB.owner == self.owner)
+            .update({"heartbeat_at": now, "expires_at": now + self.ttl}, synchronize_session=False)
+        )
+        if not updated:
+            self.lost = True
+            raise LeaseLost(f"Аренда {self.name} перехвачена")
+        self.expires_at = now + self.ttl
+        self.lost = False
+
+    def check(self) -> None:
+        """Бросает LeaseLost, если аренда потеряна или ее срок вышел."""
+        if self.lost or (self.expires_at is not None and datetime.utcnow() >= self.expires_at):
+            self.lost = True
+            raise LeaseLost(f"Аренда {self.name} потеряна")
+
+    def set_run(self, run_id: int) -> None:
+        """Запоминает id текущего запуска, чтобы другие процессы могли его показать."""
+        self._update(run_id=run_id)
+
+    def release(self) -> None:
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        try:
+            self._update(expires_at=datetime.utcnow())
+        except SQLAlchemyError:
+            # Не страшно: аренда освободится сама по истечении срока
+            _logger.warning(f"Не удалось освободить аренду {self.name}", exc_info=True)
+
+
+def active_lease(db: Session, name: str) -> Optional[JobLeaseDB]:
+    """Текущая неистекшая аренда задачи или None."""
+    return (
+        db.query(JobLeaseDB)
+        .filter(JobLeaseDB.name == name, JobLeaseDB.expires_at >= datetime.utcnow())
+        .first()
+    )
@@ -0,0 +1,41 @@
+from sqlalchemy import create_engine, inspect, text
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SQLALCHEMY_DATABASE_URL
+
+def run_migration():
+    print("Starting migration: Adding calendar_token column to users table")
+    
+    # Create engine
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    # Connect and execute SQL
+    with engine.connect() as conn:
+        try:
+            # Check if column already exists
+            existing_columns = {column["name"] for column in inspect(conn).get_columns("users")}
+            
+            if "calendar_token" in existing_columns:
+                print("Column calendar_token already exists in users table. Skipping migration.")
+                return
+            
+            conn.execute(text("ALTER TABLE users ADD COLUMN calendar_token VARCHAR NULL"))
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_calendar_token "
+                "ON users (calendar_token)"
+            ))
+            
+            # Commit the transaction
+            conn.commit()
+            print("Successfully added calendar_token column to users table")
+            
+        except Exception as e:
+            print(f"Migration failed: {str(e)}")
+            raise
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,43 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SQLALCHEMY_DATABASE_URL
+from post_counters import reconcile_post_counters
+
+def run_migration():
+    print("Starting migration: Adding like_count/comment_count columns to posts table")
+    
+    # Create engine
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    # Connect and execute SQL
+    with engine.connect() as conn:
+        try:
+            # Check which columns already exist
+            existing_columns = {column["name"] for column in inspect(conn).get_columns("posts")}
+            
+            for column_name in ("like_count", "comment_count"):
+                if column_name in existing_columns:
+                    print(f"Column {column_name} already exists in posts table. Skipping.")
+                    continue
+                conn.execute(text(f"ALTER TABLE posts ADD COLUMN {column_name} INTEGER NOT NULL DEFAULT 0"))
+            
+            # Commit the transaction
+            conn.commit()
+            
+        except Exception as e:
+            print(f"Migration failed: {str(e)}")
+            raise
+    
+    # Backfill counters from post_likes and comments
+    with Session(engine) as session:
+        fixed = reconcile_post_counters(session)
+    print(f"Successfully added counters and backfilled {fixed} posts")
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,56 @@
+from sqlalchemy import create_engine, inspect, text
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SQLALCHEMY_DATABASE_URL
+
+# Таблица -> составные индексы для постраничного чтения по (created_at, id)
+INDEXES = {
+    "posts": [
+        ("ix_posts_created_at_id", "created_at, id"),
+        ("ix_posts_category_created_at_id", "category, created_at, id"),
+    ],
+    "comments": [("ix_comments_post_created_at_id", "post_id, created_at, id")],
+    "news": [("ix_news_created_at_id", "created_at, id")],
+    "events": [("ix_events_created_at_id", "created_at, id")],
+    "gallery_images": [
+        ("ix_gallery_images_created_at_id", "created_at, id"),
+        ("ix_gallery_images_event_created_at_id", "event_id, created_at, id"),
+    ],
+    "knowledge_base": [("ix_knowledge_base_created_at_id", "created_at, id")],
+    "dishes": [("ix_dishes_created_at_id", "created_at, id")],
+    "daily_menus": [("ix_daily_menus_created_at_id", "created_at, id")],
+}
+
+def run_migration():
+    print("Starting migration: Adding (created_at, id) indexes for cursor pagination")
+    
+    # Create engine
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    # Connect and execute SQL
+    with engine.connect() as conn:
+        try:
+            existing_tables = set(inspect(conn).get_table_names())
+            
+            for table_name, indexes in INDEXES.items():
+                if table_name not in existing_tables:
+                    print(f"Table {table_name} does not exist. Skipping.")
+                    continue
+                for index_name, columns in indexes:
+                    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})"))
+                    print(f"Created {index_name}")
+            
+            # Commit the transaction
+            conn.commit()
+            print("Migration completed successfully")
+            
+        except Exception as e:
+            print(f"Migration failed: {str(e)}")
+            raise
+
+if __name__ == "__main__":
+    run_migration()
@@ -0,0 +1,58 @@
+from sqlalchemy import create_engine, inspect, text
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SQLALCHEMY_DATABASE_URL
+from timetable_calendar import time_to_minutes
+
+def run_migration():
+    print("Starting migration: Adding start_minute/end_minute columns to lessons table")
+    
+    # Create engine
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    
+    # Connect and execute SQL
+    with engine.connect() as conn:
+        try:
+            # Check which columns already exist
+            existing_columns = {column["name"] for column in inspect(conn).get_columns("lessons")}
+            
+            for column_name in ("start_minute", "end_minute"):
+                if column_name in existing_columns:
+                    print(f"Column {column_name} already exists in lessons table. Skipping.")
+                    continue
+                conn.execute(text(f"ALTER TABLE lessons ADD COLUMN {column_name} INTEGER NULL"))
+            
+            # Backfill minutes from the "HH:MM" strings
+            rows = conn.execute(text(
+                "SELECT id, start_time, end_time FROM lessons "
+                "WHERE start_minute IS NULL OR end_minute IS NULL"
+            )).fetchall()
+            updates = [
+                {"id": row.id, "start_minute": time_to_minutes(row.start_time), "end_minute": time_to_minutes(row.end_time)}
+                for row in rows
+            ]
+            if updates:
+                conn.execute(
+                    text("UPDATE lessons SET start_minute = :start_minute, end_minute = :end_minute WHERE id = :id"),
+                    updates
+                )
+            
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_lessons_weekday_start_minute "
+                "ON lessons (weekday, start_minute)"
+            ))
+            
+            # Commit the transaction
+            conn.commit()
+            print(f"Successfully backfilled {len(updates)} lessons and created ix_lessons_weekday_start_minute")
+            
+        except Exception as e:
+            print(f"Migration failed: {str(e)}")
+            raise
+
+if __name__ == "__main__":
+    run_migration()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, Table, DateTime, Text, Date
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, Table, DateTime, Text, Date, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -49,6 +49,8 @@ class UserDB(Base):
     birth_date = Column(DateTime, nullable=True)
     avatar = Column(String, nullable=True)
     selected_group_id = Column(Integer, ForeignKey("groups.id"), nullable=True)
+    # Секрет в ссылке на .ics-ленту: календари подписываются без заголовка Authorization
+    calendar_token = Column(String, unique=True, index=True, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     # Relationships
     posts = relationship("PostDB", back_populates="author")
@@ -75,6 +77,10 @@ class KnowledgeBaseDB(Base):
     # Relationships
     author = relationship("UserDB", back_populates="knowledge_bases")
 
+    __table_args__ = (
+        Index("ix_knowledge_base_created_at_id", "created_at", "id"),
+    )
+
 
 class EventDB(Base):
     __tablename__ = "events"
@@ -93,6 +99,10 @@ class EventDB(Base):
         "UserDB", secondary=event_participants, back_populates="events_participated")
     gallery_images = relationship("GalleryImageDB", back_populates="event")
 
+    __table_args__ = (
+        Index("ix_events_created_at_id", "created_at", "id"),
+    )
+
 
 class CommentDB(Base):
     __tablename__ = "comments"
@@ -106,6 +116,10 @@ class CommentDB(Base):
     author = relationship("UserDB", back_populates="comments")
     post = relationship("PostDB", back_populates="comments")
 
+    __table_args__ = (
+        Index("ix_comments_post_created_at_id", "post_id", "created_at", "id"),
+    )
+
 
 class PostDB(Base):
     __tablename__ = "posts"
@@ -117,11 +131,20 @@ class PostDB(Base):
     updated_at = Column(DateTime, nullable=True)
     photo_url = Column(String, nullable=True)
     category = Column(String, nullable=False, default="Флудилка")
+    # Денормализованные счетчики: меняются в той же транзакции, что и
+    # post_likes/comments, расхождения исправляет reconcile_post_counters
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
     # Relationships
     author = relationship("UserDB", back_populates="posts")
     comments = relationship("CommentDB", back_populates="post")
     likes = relationship("UserDB", secondary=post_likes)
 
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_category_created_at_id", "category", "created_at", "id"),
+    )
+
 
 class NewsDB(Base):
     __tablename__ = "news"
@@ -135,6 +158,10 @@ class NewsDB(Base):
     # Relationships
     author = relationship("UserDB", back_populates="news")
 
+    __table_args__ = (
+        Index("ix_news_created_at_id", "created_at", "id"),
+    )
+
 
 class GalleryImageDB(Base):
     __tablename__ = "gallery_images"
@@ -146,6 +173,11 @@ class GalleryImageDB(Base):
     # Relationships
     event = relationship("EventDB", back_populates="gallery_images")
 
+    __table_args__ = (
+        Index("ix_gallery_images_created_at_id", "created_at", "id"),
+        Index("ix_gallery_images_event_created_at_id", "event_id", "created_at", "id"),
+    )
+
 
 class DailyMenuDB(Base):
     __tablename__ = "daily_menus"
@@ -159,6 +191,10 @@ class DailyMenuDB(Base):
     dishes = relationship(
         "DishDB", secondary=daily_menu_dishes, back_populates="daily_menus")
 
+    __table_args__ = (
+        Index("ix_daily_menus_created_at_id", "created_at", "id"),
+    )
+
 
 class DishDB(Base):
     __tablename__ = "dishes"
@@ -183,6 +219,10 @@ class DishDB(Base):
     daily_menus = relationship(
         "DailyMenuDB", secondary=daily_menu_dishes, back_populates="dishes")
 
+    __table_args__ = (
+        Index("ix_dishes_created_at_id", "created_at", "id"),
+    )
+
 
 class DishCategoryDB(Base):
     __tablename__ = "dish_categories"
@@ -285,6 +325,9 @@ class LessonDB(Base):
     number = Column(Integer, index=True)
     start_time = Column(String)
     end_time = Column(String)
+    # Время в минутах от начала суток для диапазонных запросов "что идет сейчас"
+    start_minute = Column(Integer, nullable=True)
+    end_minute = Column(Integer, nullable=True)
     odd_week = Column(Boolean, default=True)
     even_week = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -294,3 +337,123 @@ class LessonDB(Base):
     teachers = relationship("TeacherDB", secondary=lesson_teachers, back_populates="lessons")
     groups = relationship("GroupDB", secondary=lesson_groups, back_populates="lessons")
     places = relationship("PlaceDB", secondary=lesson_places, back_populates="lessons")
+
+    __table_args__ = (
+        Index("ix_lessons_weekday_start_minute", "weekday", "start_minute"),
+    )
+
+
+
+class TimetableVersionDB(Base):
+    __tablename__ = "timetable_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String, index=True)
+    lessons_added = Column(Integer, default=0)
+    lessons_removed = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Отношения
+    changes = relationship("TimetableChangeDB", back_populates="version", cascade="all, delete-orphan")
+
+
+class TimetableChangeDB(Base):
+    __tablename__ = "timetable_changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    version_id = Column(Integer, ForeignKey("timetable_versions.id"), nullable=False)
+    # Номер группы, а не id: id групп пересоздаются при каждом обновлении
+    group_number = Column(String, nullable=False)
+    action = Column(String, nullable=False)  # added / removed
+    lesson_key = Column(String, nullable=False)
+    payload = Column(Text, nullable=True)
+
+    # Отношения
+    version = relationship("TimetableVersionDB", back_populates="changes")
+
+    __table_args__ = (
+        Index("ix_timetable_changes_group_version", "group_number", "version_id"),
+    )
+
+
+class TimetableStateDB(Base):
+    __tablename__ = "timetable_state"
+
+    # Поколение данных расписания: растет в той же транзакции, что и
+    # сохранение нового расписания. По нему каждый процесс узнает, что
+    # его снимки в памяти устарели.
+    name = Column(String, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TimetableRunDB(Base):
+    __tablename__ = "timetable_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    started_at = Column(DateTime, default=datetime.utcnow, index=True)
+    finished_at = Column(DateTime, nullable=True)
+    status = Column(String, default="running")  # running / applied / unchanged / not_modified / blocked / failed
+    trigger = Column(String, default="manual")  # manual / schedule
+    pages_fetched = Column(Integer, default=0)
+    pages_not_modified = Column(Integer, default=0)
+    pages_failed = Column(Integer, default=0)
+    pages_changed = Column(Integer, default=0)
+    lessons = Column(Integer, nullable=True)
+    groups = Column(Integer, nullable=True)
+    teachers = Column(Integer, nullable=True)
+    places = Column(Integer, nullable=True)
+    subjects = Column(Integer, nullable=True)
+    conflicts = Column(Integer, nullable=True)
+    lessons_before = Column(Integer, nullable=True)
+    lessons_after = Column(Integer, nullable=True)
+    lessons_added = Column(Integer, nullable=True)
+    lessons_removed = Column(Integer, nullable=True)
+    version_id = Column(Integer, nullable=True)
+    # JSON: этап -> секунды, парсер -> число строк без подходящего regex,
+    # ошибки по страницам и полный отчет analyze_parsed_data
+    timings = Column(Text, nullable=True)
+    regex_misses = Column(Text, nullable=True)
+    errors = Column(Text, nullable=True)
+    report = Column(Text, nullable=True)
+
+
+class JobLeaseDB(Base):
+    __tablename__ = "job_leases"
+
+    # Одна строка на задачу; владелец продлевает expires_at, пока работает
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    acquired_at = Column(DateTime, default=datetime.utcnow)
+    heartbeat_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    run_id = Column(Integer, nullable=True)
+
+
+class TimetablePageDB(Base):
+    __tablename__ = "timetable_pages"
+
+    # Последняя полученная версия страницы источника и валидаторы для
+    # условных запросов. applied_hash — хэш версии, которая уже применена.
+    url = Column(String, primary_key=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    content_hash = Column(String, nullable=True)
+    applied_hash = Column(String, nullable=True)
+    body = Column(Text, nullable=True)
+    checked_at = Column(DateTime, nullable=True)
+    changed_at = Column(DateTime, nullable=True)
+
+
+class TimetableOverrideDB(Base):
+    __tablename__ = "timetable_overrides"
+
+    id = Column(Integer, primary_key=True, index=True)
+    action = Column(String, nullable=False)  # delete / replace / add
+    # JSON: {колонка: значение} для поиска пары и новые значения колонок
+    match = Column(Text, nullable=True)
+    values = Column(Text, nullable=True)
+    comment = Column(Text, nullable=True)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=True)
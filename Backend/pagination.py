@@ -0,0 +1,89 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: Optional[datetime], item_id: int) -> str:
+    """Непрозрачный курсор: позиция последнего элемента страницы в порядке (created_at, id)."""
+    stamp = created_at.isoformat() if created_at else ""
+    raw = f"{stamp}|{item_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        stamp, item_id = raw.rsplit("|", 1)
+        return (datetime.fromisoformat(stamp) if stamp else None), int(item_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор пагинации"
+        )
+
+
+def keyset_filter(model, created_at: Optional[datetime], item_id: int, ascending: bool = False):
+    """
+    Условие «после курсора» для порядка (created_at, id).
+    NULL в SQLite меньше любой даты: строки без created_at идут в конце
+    при убывании и в начале при возрастании, среди них порядок по id.
+    """
+    if ascending:
+        if created_at is None:
+            return or_(and_(model.created_at.is_(None), model.id > item_id), model.created_at.isnot(None))
+        return or_(
+            model.created_at > created_at,
+            and_(model.created_at == created_at, model.id > item_id),
+        )
+    if created_at is None:
+        return and_(model.created_at.is_(None), model.id < item_id)
+    return or_(
+        model.created_at < created_at,
+        and_(model.created_at == created_at, model.id < item_id),
+        model.created_at.is_(None),
+    )
+
+
+def paginate(
+    query: Query,
+    model,
+    response: Optional[Response] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    ascending: bool = False,
+) -> List:
+    """
+    Страница списка в стабильном порядке: сначала новые (created_at DESC, id DESC),
+    при ascending — сначала старые.
+
+    С курсором страница начинается сразу после него и читается по
+    составному индексу без OFFSET; без курсора работает прежний skip.
+    Курсор следующей страницы отдается в заголовке X-Next-Cursor,
+    тело ответа остается списком.
+    """
+    if ascending:
+        query = query.order_by(model.created_at, model.id)
+    else:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        query = query.filter(keyset_filter(model, *decode_cursor(cursor), ascending))
+    elif skip:
+        query = query.offset(skip)
+
+    # Лишний элемент показывает, есть ли следующая страница.
+    items = query.limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    if response is not None and has_more and items:
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return items
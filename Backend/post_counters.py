@@ -0,0 +1,91 @@
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models import PostDB, CommentDB, post_likes
+
+
+def adjust_post_counter(db: Session, post_id: int, column, delta: int) -> None:
+    """
+    Меняет счетчик поста на delta одним UPDATE в текущей транзакции.
+    Значение считается в SQL (count = count + delta), поэтому
+    параллельные запросы не затирают друг друга.
+    """
+    db.query(PostDB).filter(PostDB.id == post_id).update(
+        {column: column + delta}, synchronize_session=False
+    )
+
+
+def set_post_like(db: Session, post_id: int, user_id: int, liked: bool) -> Optional[int]:
+    """
+    Ставит или снимает лайк одной операцией над post_likes по первичному
+    ключу (INSERT OR IGNORE / DELETE), не читая список лайкнувших.
+    Повторный вызов ничего не меняет. Счетчик меняется, только если
+    строка действительно добавилась или удалилась.
+
+    Returns:
+        Новое значение like_count или None, если поста нет
+    """
+    if liked:
+        statement = insert(post_likes).values(post_id=post_id, user_id=user_id).on_conflict_do_nothing()
+    else:
+        statement = post_likes.delete().where(
+            (post_likes.c.post_id == post_id) & (post_likes.c.user_id == user_id)
+        )
+    if db.execute(statement).rowcount:
+        adjust_post_counter(db, post_id, PostDB.like_count, 1 if liked else -1)
+
+    like_count = db.query(PostDB.like_count).filter(PostDB.id == post_id).scalar()
+    if like_count is None:
+        db.rollback()
+        return None
+    db.commit()
+    return like_count
+
+
+def liked_post_ids(db: Session, user_id: int, post_ids: List[int]) -> List[int]:
+    """Какие из post_ids лайкнул пользователь: один запрос по первичному ключу post_likes."""
+    if not post_ids:
+        return []
+    rows = db.query(post_likes.c.post_id).filter(
+        post_likes.c.post_id.in_(set(post_ids)),
+        post_likes.c.user_id == user_id,
+    )
+    return sorted(post_id for post_id, in rows)
+
+
+def reconcile_post_counters(db: Session) -> int:
+    """
+    Пересчитывает like_count и comment_count по post_likes и comments
+    и исправляет посты, у которых счетчики разошлись с фактом.
+
+    Returns:
+        Число исправленных постов
+    """
+    like_counts = (
+        select(func.count()).where(post_likes.c.post_id == PostDB.id).scalar_subquery()
+    )
+    comment_counts = (
+        select(func.count()).where(CommentDB.post_id == PostDB.id).scalar_subquery()
+    )
+    fixed = db.query(PostDB).filter(
+        (PostDB.like_count != like_counts) | (PostDB.comment_count != comment_counts)
+        | PostDB.like_count.is_(None) | PostDB.comment_count.is_(None)
+    ).update(
+        {PostDB.like_count: like_counts, PostDB.comment_count: comment_counts},
+        synchronize_session=False
+    )
+    db.commit()
+    return fixed
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print(f"Исправлено счетчиков постов: {reconcile_post_counters(session)}")
+    finally:
+        session.close()
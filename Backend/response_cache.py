@@ -0,0 +1,178 @@
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Pattern, Tuple
+
+from fastapi import Request, Response
+
+from config import RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL
+
+CACHE_HEADER = "X-Cache"
+
+
+class CacheRule(NamedTuple):
+    prefix: str
+    # Какие GET-пути под префиксом кэшируются (остаток пути после префикса)
+    cached_paths: Pattern
+    # Тег, которым помечаются записи этого префикса
+    tag: str
+    # Теги, которые сбрасывает успешная запись (POST/PUT/PATCH/DELETE) под префиксом
+    invalidates: Tuple[str, ...]
+
+
+# Публичные справочные списки: у всех пользователей одинаковый ответ.
+# Карточка мероприятия (/events/{id}) не кэшируется — в ней is_registered.
+CACHE_RULES = (
+    CacheRule("/news", re.compile(r"(/\d+)?"), "news", ("news",)),
+    CacheRule("/events", re.compile(r"(/afisha)?"), "events", ("events",)),
+    CacheRule("/menu", re.compile(r"(/\d+)?"), "menu", ("menu",)),
+    # Меню ссылается на блюда, блюда — на категории: категория видна и в меню
+    CacheRule("/dish", re.compile(r"(/\d+)?"), "dish", ("dish", "menu")),
+    CacheRule("/dish_category", re.compile(r"(/\d+)?"), "dish_category", ("dish_category", "dish", "menu")),
+    CacheRule("/knowledge", re.compile(r"(/\d+)?"), "knowledge", ("knowledge",)),
+    # Картинка мероприятия в афише берется из галереи
+    CacheRule("/gallery", re.compile(r"(/\d+)?"), "gallery", ("gallery", "events")),
+)
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def match_rule(path: str) -> Optional[CacheRule]:
+    for rule in CACHE_RULES:
+        if path == rule.prefix or path.startswith(rule.prefix + "/"):
+            return rule
+    return None
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    headers: Dict[str, str]
+    tag: str
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    LRU-кэш готовых тел ответов с TTL и сбросом по тегам.
+
+    Кэш живет в процессе: в каждом воркере свой, поэтому TTL ограничивает
+    устаревание и тогда, когда запись прошла через другой воркер.
+    Не fastapi-cache2: в его in-memory бэкенде нет ни сброса по тегам,
+    ни ограничения размера.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 60, enabled: bool = True,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._clock = clock
+        self._items: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        # Поколение тега растет при каждом сбросе: ответ, который начали
+        # строить до сброса, уже не попадет в кэш.
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def generation(self, tag: str) -> int:
+        with self._lock:
+            return self._generations[tag]
+
+    def get(self, key: tuple, tag: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None and entry.expires_at <= self._clock():
+                del self._items[key]
+                self._stats[tag]["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats[tag]["misses"] += 1
+                return None
+            self._items.move_to_end(key)
+            self._stats[tag]["hits"] += 1
+            return entry
+
+    def put(self, key: tuple, tag: str, body: bytes, headers: Dict[str, str], generation: int) -> bool:
+        with self._lock:
+            if self._generations[tag] != generation:
+                return False
+            self._items[key] = CacheEntry(body, headers, tag, self._clock() + self.ttl)
+            self._items.move_to_end(key)
+            self._stats[tag]["stores"] += 1
+            while len(self._items) > self.max_entries:
+                _, evicted = self._items.popitem(last=False)
+                self._stats[evicted.tag]["evictions"] += 1
+            return True
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        tags = set(tags)
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] += 1
+            keys = [key for key, entry in self._items.items() if entry.tag in tags]
+            for key in keys:
+                entry = self._items.pop(key)
+                self._stats[entry.tag]["invalidated"] += 1
+            return len(keys)
+
+    def clear(self) -> int:
+        with self._lock:
+            tags = set(self._generations) | {entry.tag for entry in self._items.values()}
+        return self.invalidate(tags)
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_tag = {}
+            for tag, counters in self._stats.items():
+                lookups = counters["hits"] + counters["misses"]
+                per_tag[tag] = {**counters, "hit_rate": counters["hits"] / lookups if lookups else None}
+            hits = sum(counters["hits"] for counters in self._stats.values())
+            lookups = hits + sum(counters["misses"] for counters in self._stats.values())
+            return {
+                "enabled": self.enabled,
+                "size": len(self._items),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": hits,
+                "misses": lookups - hits,
+                "hit_rate": hits / lookups if lookups else None,
+                "tags": per_tag,
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL, RESPONSE_CACHE_ENABLED)
+
+
+async def response_cache_middleware(request: Request, call_next):
+    """
+    Отдает GET-ответы публичных справочников из кэша (ключ — путь и
+    параметры запроса), а успешные изменения под тем же префиксом
+    сбрасывают связанные теги.
+    """
+    rule = match_rule(request.url.path)
+    if rule is None or not response_cache.enabled:
+        return await call_next(request)
+
+    if request.method in _WRITE_METHODS:
+        response = await call_next(request)
+        if response.status_code < 400:
+            response_cache.invalidate(rule.invalidates)
+        return response
+
+    if request.method != "GET" or not rule.cached_paths.fullmatch(request.url.path[len(rule.prefix):]):
+        return await call_next(request)
+
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    entry = response_cache.get(key, rule.tag)
+    if entry is not None:
+        return Response(entry.body, headers={**entry.headers, CACHE_HEADER: "HIT"})
+
+    generation = response_cache.generation(rule.tag)
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    response_cache.put(key, rule.tag, body, headers, generation)
+    return Response(body, headers={**headers, CACHE_HEADER: "MISS"})
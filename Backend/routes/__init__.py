@@ -12,6 +12,9 @@ from routes.menu import menu_router
 from routes.dish import dish_router
 from routes.dish_category import category_router
 from routes.assistant import assistant_router
+from routes.search import search_router
+from routes.feed import feed_router
+from routes.cache import cache_router
 from routes.timetable import router as timetable_router
 
 
@@ -29,5 +32,8 @@ api_router.include_router(menu_router)
 api_router.include_router(dish_router)
 api_router.include_router(category_router)
 api_router.include_router(assistant_router)
+api_router.include_router(search_router)
+api_router.include_router(feed_router)
+api_router.include_router(cache_router)
 api_router.include_router(timetable_router)
 # api_router.include_router(ocr_router)
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+
+from models import UserDB
+from dependencies import get_admin_user
+from response_cache import response_cache
+
+cache_router = APIRouter(prefix="/cache", tags=["Cache"])
+
+
+@cache_router.get("/stats")
+async def read_cache_stats(current_user: UserDB = Depends(get_admin_user)):
+    """Размер кэша ответов, попадания и промахи по тегам (только для администраторов)."""
+    return response_cache.stats()
+
+
+@cache_router.post("/clear")
+async def clear_cache(current_user: UserDB = Depends(get_admin_user)):
+    """Сбросить весь кэш ответов (только для администраторов)."""
+    return {"invalidated": response_cache.clear()}
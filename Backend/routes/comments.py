@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from datetime import datetime
 
-from models import CommentDB, UserDB
+from models import CommentDB, PostDB, UserDB
 from schemas import Comment, CommentBase
 from dependencies import get_db, get_current_active_user, convert_to_db_types
+from post_counters import adjust_post_counter
 
 comment_router = APIRouter(prefix="/comments", tags=["Comments"])
 
@@ -35,5 +36,6 @@ async def delete_comment(comment_id: int, current_user: UserDB = Depends(get_cur
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
     db.delete(db_comment)
+    adjust_post_counter(db, db_comment.post_id, PostDB.comment_count, -1)
     db.commit()
     return None 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional, Union
 import requests
@@ -7,6 +7,7 @@ import json
 from models import UserDB, DishDB
 from schemas import UserRole, Dish, DishCreate
 from dependencies import get_db, get_current_active_user, convert_to_db_types
+from pagination import paginate
 
 dish_router = APIRouter(prefix="/dish", tags=["Dishes"])
 
@@ -219,8 +220,8 @@ def is_empty_value(value: Any) -> bool:
 
 
 @dish_router.get("", response_model=List[Dish])
-async def read_dishes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    dishes = db.query(DishDB).offset(skip).limit(limit).all()
+async def read_dishes(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    dishes = paginate(db.query(DishDB), DishDB, response, skip, limit, cursor)
     return dishes
 
 
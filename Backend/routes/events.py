@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from models import EventDB, UserDB, GalleryImageDB, event_participants
+from models import EventDB, UserDB, event_participants
 from schemas import Event, EventCreate, UserRole, User
 from dependencies import get_db, get_current_active_user, convert_to_db_types
+from fast_json import fast_json_response
+from feed import event_images
+from pagination import paginate
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
@@ -42,52 +45,50 @@ class EventDetailResponse(BaseModel):
     created_at: str
     is_registered: bool = False
     
+def afisha_tag(location: Optional[str]) -> str:
+    """Тег афиши определяется по месту проведения."""
+    location = (location or "").lower()
+    if "универсиад" in location:
+        return "#Универсиада"
+    if "здравниц" in location:
+        return "#Университетская жизнь"
+    return "#Мероприятие"
+
+
 @event_router.get("/afisha", response_model=List[AfishaEvent])
-async def get_afisha_events(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Получить список мероприятий в формате для афиши"""
-    events = db.query(EventDB).offset(skip).limit(limit).all()
-    
+async def get_afisha_events(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Получить список мероприятий в формате для афиши. Колонки читаются
+    проекцией, картинки из галереи — одним запросом на страницу, ответ
+    сериализуется без повторной валидации через AfishaEvent.
+    """
+    query = db.query(
+        EventDB.id, EventDB.title, EventDB.description, EventDB.location,
+        EventDB.created_at, EventDB.start_date, EventDB.end_date
+    )
+    rows = paginate(query, EventDB, response, skip, limit, cursor)
+    images = event_images(db, [row.id for row in rows])
+
     result = []
-    for event in events:
-        # Ищем изображение для события в галерее
-        image = db.query(GalleryImageDB).filter(GalleryImageDB.event_id == event.id).first()
-        
-        # URL изображения по умолчанию, если нет в галерее
-        image_url = '/event1.png'
-        if image and hasattr(image, 'image_url') and image.image_url:
-            image_url = image.image_url
-        
-        # Определяем тег на основе данных события
-        tag = "#Мероприятие"
-        if hasattr(event, 'location') and event.location:
-            if "универсиад" in event.location.lower():
-                tag = "#Универсиада"
-            elif "здравниц" in event.location.lower():
-                tag = "#Университетская жизнь"
-        
-        # Форматируем даты для фронтенда
-        created_at = event.created_at.isoformat() if hasattr(event, 'created_at') and event.created_at else None
-        start_date = event.start_date.isoformat() if hasattr(event, 'start_date') and event.start_date else None
-        end_date = event.end_date.isoformat() if hasattr(event, 'end_date') and event.end_date else None
-        
-        afisha_event = {
-            "id": event.id,
-            "title": event.title,
-            "description": event.description[:200] + "..." if len(event.description) > 200 else event.description,
-            "image": image_url,
-            "tag": tag,
-            "fullDescription": event.description,
-            "created_at": created_at,
-            "start_date": start_date,
-            "end_date": end_date
-        }
-        result.append(afisha_event)
-    
-    return result
+    for row in rows:
+        description = row.description or ""
+        result.append({
+            "id": row.id,
+            "title": row.title,
+            "description": description[:200] + "..." if len(description) > 200 else description,
+            "image": images[row.id],
+            "tag": afisha_tag(row.location),
+            "fullDescription": description,
+            # Даты для фронтенда — строками в ISO-формате
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "start_date": row.start_date.isoformat() if row.start_date else None,
+            "end_date": row.end_date.isoformat() if row.end_date else None,
+        })
+    return fast_json_response(result, response)
 
 @event_router.get("", response_model=List[Event])
-async def read_events(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    events = db.query(EventDB).offset(skip).limit(limit).all()
+async def read_events(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    events = paginate(db.query(EventDB), EventDB, response, skip, limit, cursor)
     return events
 
 @event_router.get("/{event_id}", response_model=EventDetailResponse)
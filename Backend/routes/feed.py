@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from fast_json import fast_json_response
+from feed import read_feed
+from pagination import NEXT_CURSOR_HEADER
+from schemas import FeedCard
+from dependencies import get_db
+
+feed_router = APIRouter(prefix="/feed", tags=["Feed"])
+
+
+@feed_router.get("", response_model=List[FeedCard])
+async def get_feed(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Общая лента постов, новостей и мероприятий от новых к старым за один
+    запрос. Курсор следующей страницы — в заголовке X-Next-Cursor.
+    """
+    cards, next_cursor = read_feed(db, limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return fast_json_response(cards, response)
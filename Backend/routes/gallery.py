@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import os
@@ -9,6 +9,7 @@ from pathlib import Path
 from models import GalleryImageDB, EventDB, UserDB
 from schemas import GalleryImage, GalleryImageCreate, UserRole
 from dependencies import get_db, get_current_active_user, convert_to_db_types
+from pagination import paginate
 
 gallery_router = APIRouter(prefix="/gallery", tags=["Gallery"])
 
@@ -16,12 +17,18 @@ UPLOAD_DIR = Path("static/uploads/gallery")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 @gallery_router.get("", response_model=List[GalleryImage])
-async def read_gallery_images(event_id: Optional[int] = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def read_gallery_images(
+    response: Response,
+    event_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    query = db.query(GalleryImageDB)
     if event_id:
-        gallery_images = db.query(GalleryImageDB).filter(GalleryImageDB.event_id == event_id).offset(skip).limit(limit).all()
-    else:
-        gallery_images = db.query(GalleryImageDB).offset(skip).limit(limit).all()
-    return gallery_images
+        query = query.filter(GalleryImageDB.event_id == event_id)
+    return paginate(query, GalleryImageDB, response, skip, limit, cursor)
 
 @gallery_router.get("/{image_id}", response_model=GalleryImage)
 async def read_gallery_image(image_id: int, db: Session = Depends(get_db)):
@@ -1,17 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 from models import KnowledgeBaseDB, UserDB
 from schemas import KnowledgeBase, KnowledgeBaseCreate
 from dependencies import get_db, get_current_active_user, convert_to_db_types
+from pagination import paginate
 
 knowledge_router = APIRouter(prefix="/knowledge", tags=["Knowledge Base"])
 
 @knowledge_router.get("", response_model=List[KnowledgeBase])
-async def read_knowledge_bases(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    knowledge_bases = db.query(KnowledgeBaseDB).offset(skip).limit(limit).all()
+async def read_knowledge_bases(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    knowledge_bases = paginate(db.query(KnowledgeBaseDB), KnowledgeBaseDB, response, skip, limit, cursor)
     return knowledge_bases
 
 @knowledge_router.get("/{knowledge_id}", response_model=KnowledgeBase)
@@ -1,18 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from models import DailyMenuDB, UserDB, DishDB
 from schemas import DailyMenu, DailyMenuCreate, UserRole
-from dependencies import get_db, get_current_active_user, convert_to_db_types, convert_daily_menu_to_schema
+from dependencies import (
+    get_db, get_current_active_user, convert_to_db_types, convert_daily_menu_to_schema,
+    daily_menu_rows_query, daily_menu_rows_to_dicts
+)
+from fast_json import fast_json_response
+from pagination import paginate
 menu_router = APIRouter(prefix="/menu", tags=["Menu"])
 
 
 @menu_router.get("", response_model=List[DailyMenu])
-async def read_daily_menus(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    daily_menus = db.query(DailyMenuDB).offset(skip).limit(limit).all()
-
-    return [convert_daily_menu_to_schema(daily_menu) for daily_menu in daily_menus]
+async def read_daily_menus(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    rows = paginate(daily_menu_rows_query(db), DailyMenuDB, response, skip, limit, cursor)
+    return fast_json_response(daily_menu_rows_to_dicts(db, rows), response)
 
 
 @menu_router.get("/{daily_menu_id}", response_model=DailyMenu)
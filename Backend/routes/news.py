@@ -1,17 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 from models import NewsDB, UserDB
 from schemas import News, NewsCreate, UserRole
 from dependencies import get_db, get_current_active_user, convert_to_db_types
+from pagination import paginate
 
 news_router = APIRouter(prefix="/news", tags=["News"])
 
 @news_router.get("", response_model=List[News])
-async def read_news(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    news = db.query(NewsDB).offset(skip).limit(limit).all()
+async def read_news(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    news = paginate(db.query(NewsDB), NewsDB, response, skip, limit, cursor)
     return news
 
 @news_router.get("/{news_id}", response_model=News)
@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Dict, List, Optional
+from collections import defaultdict
 from datetime import datetime
 import os
 import uuid
 import shutil
 from pathlib import Path
 
-from models import PostDB, UserDB, CommentDB
-from schemas import Post, PostCreate, Comment, CommentBase, Category, AuthorInfo
-from dependencies import get_db, get_current_active_user, convert_to_db_types
+from models import PostDB, UserDB, CommentDB, post_likes
+from schemas import (
+    Post, PostCreate, PostSummary, PostLikeStatus, PostLikesStatus, PostLikesStatusRequest,
+    Comment, CommentBase, Category, AuthorInfo
+)
+from dependencies import get_db, get_current_active_user, get_admin_user, convert_to_db_types
+from fast_json import fast_json_response
+from pagination import paginate
+from post_counters import adjust_post_counter, liked_post_ids, reconcile_post_counters, set_post_like
 
 post_router = APIRouter(prefix="/posts", tags=["Posts"])
 
@@ -30,10 +38,61 @@ origins = [
 UPLOAD_DIR = Path("static/uploads/posts")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Ограничение на размер пакета в /posts/likes/status
+MAX_LIKES_STATUS_IDS = 500
+# Длина начала текста поста в облегченной ленте
+EXCERPT_LENGTH = 200
+
+def post_query(db: Session, include_likes: bool = True):
+    """
+    Запрос постов со всем, что нужно для ответа: автор подтягивается
+    JOIN'ом, лайки и комментарии с авторами — отдельными запросами
+    на всю страницу (selectin). Итого не больше трех запросов на любое
+    число постов; без include_likes лайкнувшие не читаются вовсе.
+    """
+    options = [
+        joinedload(PostDB.author),
+        selectinload(PostDB.comments).joinedload(CommentDB.author),
+    ]
+    if include_likes:
+        options.append(selectinload(PostDB.likes))
+    return db.query(PostDB).options(*options)
+
+
+def get_post_for_response(db: Session, post_id: int) -> Optional[PostDB]:
+    return post_query(db).filter(PostDB.id == post_id).first()
+
+
+def convert_comment_db_to_schema(comment: CommentDB) -> Comment:
+    # Создаем правильную структуру для автора комментария
+    comment_author = None
+    if comment.author:
+        comment_author = AuthorInfo(
+            id=comment.author.id,
+            username=comment.author.username
+        )
+    
+    return Comment(
+        id=comment.id,
+        content=comment.content,
+        author_id=comment.author_id,
+        author=comment_author,
+        created_at=comment.created_at,
+        updated_at=comment.updated_at
+    )
+
+
+def make_excerpt(content: Optional[str]) -> str:
+    content = content or ""
+    return content[:EXCERPT_LENGTH] + "..." if len(content) > EXCERPT_LENGTH else content
+
+
 # Helper function to convert PostDB objects to the Pydantic schema
-def convert_post_db_to_schema(post_db: PostDB) -> Post:
+def convert_post_db_to_schema(post_db: PostDB, include_likes: bool = True) -> Post:
     # Extract the user IDs from the likes relationship
-    like_ids = [user.id for user in post_db.likes] if post_db.likes else []
+    like_ids = None
+    if include_likes:
+        like_ids = [user.id for user in post_db.likes] if post_db.likes else []
     
     # Информация об авторе поста
     author_data = {
@@ -42,27 +101,7 @@ def convert_post_db_to_schema(post_db: PostDB) -> Post:
     }
     
     # Преобразование комментариев
-    comments_list = []
-    if post_db.comments:
-        for comment in post_db.comments:
-            # Создаем правильную структуру для автора комментария
-            comment_author = None
-            if comment.author:
-                comment_author = AuthorInfo(
-                    id=comment.author.id,
-                    username=comment.author.username
-                )
-            
-            # Создаем объект Comment
-            comment_obj = Comment(
-                id=comment.id,
-                content=comment.content,
-                author_id=comment.author_id,
-                author=comment_author,
-                created_at=comment.created_at,
-                updated_at=comment.updated_at
-            )
-            comments_list.append(comment_obj)
+    comments_list = [convert_comment_db_to_schema(comment) for comment in post_db.comments or []]
     
     # Create a Post object with the right format for likes
     return Post(
@@ -75,23 +114,134 @@ def convert_post_db_to_schema(post_db: PostDB) -> Post:
         category=post_db.category,
         created_at=post_db.created_at,
         updated_at=post_db.updated_at,
+        like_count=post_db.like_count or 0,
+        comment_count=post_db.comment_count or 0,
         likes=like_ids,
         comments=comments_list
     )
 
+def post_rows_query(db: Session):
+    """Колонки поста и имя автора одним запросом, без загрузки ORM-объектов."""
+    return db.query(
+        PostDB.id, PostDB.title, PostDB.content, PostDB.author_id, PostDB.photo_url, PostDB.category,
+        PostDB.created_at, PostDB.updated_at, PostDB.like_count, PostDB.comment_count, UserDB.username
+    ).outerjoin(UserDB, UserDB.id == PostDB.author_id)
+
+
+def post_rows_to_dicts(db: Session, rows, include_likes: bool = False) -> List[dict]:
+    """
+    Страница постов в виде готовых к JSON словарей той же формы, что и
+    Post. Комментарии с авторами и лайки читаются одним запросом на всю
+    страницу каждый.
+    """
+    post_ids = [row.id for row in rows]
+    comments: Dict[int, List[dict]] = defaultdict(list)
+    likes: Dict[int, List[int]] = defaultdict(list)
+    if post_ids:
+        comment_rows = db.query(
+            CommentDB.id, CommentDB.post_id, CommentDB.content, CommentDB.author_id,
+            CommentDB.created_at, CommentDB.updated_at, UserDB.id.label("user_id"), UserDB.username
+        ).outerjoin(UserDB, UserDB.id == CommentDB.author_id).filter(
+            CommentDB.post_id.in_(post_ids)
+        ).order_by(CommentDB.id)
+        for comment in comment_rows:
+            comments[comment.post_id].append({
+                "content": comment.content,
+                "author_id": comment.author_id,
+                "id": comment.id,
+                "created_at": comment.created_at,
+                "updated_at": comment.updated_at,
+                "author": None if comment.user_id is None else {
+                    "id": comment.user_id, "username": comment.username
+                },
+            })
+        if include_likes:
+            like_rows = db.query(post_likes.c.post_id, post_likes.c.user_id).filter(
+                post_likes.c.post_id.in_(post_ids)
+            ).order_by(post_likes.c.post_id, post_likes.c.user_id)
+            for post_id, user_id in like_rows:
+                likes[post_id].append(user_id)
+
+    return [
+        {
+            "title": row.title,
+            "content": row.content,
+            "author_id": row.author_id,
+            "photo_url": row.photo_url,
+            "category": row.category,
+            "id": row.id,
+            "created_at": row.created_at,
+            "updated_at": row.updated_at,
+            "author": {"id": row.author_id, "username": row.username or "Неизвестный пользователь"},
+            "like_count": row.like_count or 0,
+            "comment_count": row.comment_count or 0,
+            "likes": likes[row.id] if include_likes else None,
+            "comments": comments[row.id],
+        }
+        for row in rows
+    ]
+
 @post_router.get("", response_model=List[Post])
-async def read_posts(skip: int = 0, limit: int = 100, category: Optional[Category] = None, db: Session = Depends(get_db)):
+async def read_posts(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    category: Optional[Category] = None,
+    cursor: Optional[str] = None,
+    include_likes: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Лента постов. Число лайков и комментариев всегда есть в like_count
+    и comment_count; список лайкнувших — только при include_likes=true.
+    Строки собираются из SQL-проекции и сериализуются без повторной
+    валидации через схему Post.
+    """
+    query = post_rows_query(db)
     if category:
-        posts = db.query(PostDB).filter(PostDB.category == category).offset(skip).limit(limit).all()
-    else:
-        posts = db.query(PostDB).offset(skip).limit(limit).all()
-    
-    # Convert PostDB objects to the Pydantic schema
-    return [convert_post_db_to_schema(post) for post in posts]
+        query = query.filter(PostDB.category == category)
+    rows = paginate(query, PostDB, response, skip, limit, cursor)
+    return fast_json_response(post_rows_to_dicts(db, rows, include_likes), response)
+
+@post_router.get("/summary", response_model=List[PostSummary])
+async def read_post_summaries(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    category: Optional[Category] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Облегченная лента: заголовок, начало текста, автор, счетчики и фото.
+    Комментарии не читаются — их отдает /posts/{post_id}/comments.
+    """
+    query = db.query(
+        PostDB.id, PostDB.title, func.substr(PostDB.content, 1, EXCERPT_LENGTH + 1).label("excerpt"),
+        PostDB.category, PostDB.photo_url, PostDB.author_id, UserDB.username,
+        PostDB.like_count, PostDB.comment_count, PostDB.created_at
+    ).outerjoin(UserDB, UserDB.id == PostDB.author_id)
+    if category:
+        query = query.filter(PostDB.category == category)
+    rows = paginate(query, PostDB, response, skip, limit, cursor)
+    return fast_json_response([
+        {
+            "id": row.id,
+            "title": row.title,
+            "excerpt": make_excerpt(row.excerpt),
+            "category": row.category,
+            "photo_url": row.photo_url,
+            "author": {"id": row.author_id, "username": row.username or "Неизвестный пользователь"},
+            "like_count": row.like_count or 0,
+            "comment_count": row.comment_count or 0,
+            "created_at": row.created_at,
+        }
+        for row in rows
+    ], response)
 
 @post_router.get("/{post_id}", response_model=Post)
 async def read_post(post_id: int, db: Session = Depends(get_db)):
-    post = db.query(PostDB).filter(PostDB.id == post_id).first()
+    post = get_post_for_response(db, post_id)
     if post is None:
         raise HTTPException(status_code=404, detail="Post not found")
     
@@ -177,8 +327,7 @@ async def update_post(post_id: int, post: PostCreate, current_user: UserDB = Dep
     
     db_post.updated_at = datetime.utcnow()
     db.commit()
-    db.refresh(db_post)
-    return convert_post_db_to_schema(db_post)
+    return convert_post_db_to_schema(get_post_for_response(db, post_id))
 
 @post_router.put("/{post_id}/upload", response_model=Post)
 async def update_post_with_file(
@@ -240,8 +389,7 @@ async def update_post_with_file(
     
     # Save changes
     db.commit()
-    db.refresh(db_post)
-    return convert_post_db_to_schema(db_post)
+    return convert_post_db_to_schema(get_post_for_response(db, post_id))
 
 @post_router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_post(post_id: int, current_user: UserDB = Depends(get_current_active_user), db: Session = Depends(get_db)):
@@ -266,33 +414,52 @@ async def delete_post(post_id: int, current_user: UserDB = Depends(get_current_a
     db.commit()
     return None
 
-@post_router.post("/{post_id}/like", response_model=Post)
-async def like_post(post_id: int, current_user: UserDB = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    db_post = db.query(PostDB).filter(PostDB.id == post_id).first()
-    if db_post is None:
+def change_like(db: Session, post_id: int, user_id: int, liked: bool) -> PostLikeStatus:
+    like_count = set_post_like(db, post_id, user_id, liked)
+    if like_count is None:
         raise HTTPException(status_code=404, detail="Post not found")
-    
-    if current_user in db_post.likes:
-        raise HTTPException(status_code=400, detail="User already liked this post")
-    
-    db_post.likes.append(current_user)
-    db.commit()
-    db.refresh(db_post)
-    return convert_post_db_to_schema(db_post)
+    return PostLikeStatus(post_id=post_id, liked=liked, like_count=like_count)
+
+@post_router.post("/likes/status", response_model=PostLikesStatus)
+async def read_likes_status(
+    request: PostLikesStatusRequest,
+    current_user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Какие из переданных постов лайкнул текущий пользователь."""
+    if len(request.post_ids) > MAX_LIKES_STATUS_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Можно запросить не больше {MAX_LIKES_STATUS_IDS} постов за раз"
+        )
+    return PostLikesStatus(liked=liked_post_ids(db, current_user.id, request.post_ids))
+
+@post_router.post("/{post_id}/like", response_model=PostLikeStatus)
+async def like_post(post_id: int, current_user: UserDB = Depends(get_current_active_user), db: Session = Depends(get_db)):
+    """Поставить лайк. Повторный лайк не ошибка: возвращается текущее состояние."""
+    return change_like(db, post_id, current_user.id, True)
 
-@post_router.post("/{post_id}/unlike", response_model=Post)
+@post_router.post("/{post_id}/unlike", response_model=PostLikeStatus)
 async def unlike_post(post_id: int, current_user: UserDB = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    db_post = db.query(PostDB).filter(PostDB.id == post_id).first()
-    if db_post is None:
+    """Снять лайк. Если лайка не было, возвращается текущее состояние."""
+    return change_like(db, post_id, current_user.id, False)
+
+@post_router.get("/{post_id}/comments", response_model=List[Comment])
+async def read_comments(
+    post_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Комментарии поста от старых к новым; следующая страница — по X-Next-Cursor."""
+    if db.query(PostDB.id).filter(PostDB.id == post_id).first() is None:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    if current_user not in db_post.likes:
-        raise HTTPException(status_code=400, detail="User has not liked this post")
-    
-    db_post.likes.remove(current_user)
-    db.commit()
-    db.refresh(db_post)
-    return convert_post_db_to_schema(db_post)
+    query = db.query(CommentDB).options(joinedload(CommentDB.author)).filter(CommentDB.post_id == post_id)
+    comments = paginate(query, CommentDB, response, skip, limit, cursor, ascending=True)
+    return [convert_comment_db_to_schema(comment) for comment in comments]
 
 @post_router.post("/{post_id}/comments", response_model=Comment)
 async def create_comment(post_id: int, comment: CommentBase, current_user: UserDB = Depends(get_current_active_user), db: Session = Depends(get_db)):
@@ -311,6 +478,7 @@ async def create_comment(post_id: int, comment: CommentBase, current_user: UserD
     )
     
     db.add(db_comment)
+    adjust_post_counter(db, post_id, PostDB.comment_count, 1)
     db.commit()
     db.refresh(db_comment)
     
@@ -331,4 +499,9 @@ async def create_comment(post_id: int, comment: CommentBase, current_user: UserD
         updated_at=db_comment.updated_at
     )
     
-    return response_comment 
\ No newline at end of file
+    return response_comment
+
+@post_router.post("/counters/reconcile")
+async def reconcile_counters(current_user: UserDB = Depends(get_admin_user), db: Session = Depends(get_db)):
+    """Пересчитать like_count и comment_count всех постов (только для администраторов)."""
+    return {"fixed": reconcile_post_counters(db)}
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from content_search import SEARCH_TYPES, search_content
+from schemas import SearchResult
+from dependencies import get_db
+
+search_router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@search_router.get("", response_model=List[SearchResult])
+async def search(
+    q: str = Query(..., min_length=1, description="Поисковый запрос"),
+    types: Optional[str] = Query(None, description="Типы через запятую: post, news, knowledge"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Полнотекстовый поиск по постам, новостям и базе знаний.
+    Учитывает формы слов (ищет по основе), результаты отсортированы
+    по релевантности, совпадения в заголовке весят больше.
+    """
+    search_types = None
+    if types:
+        search_types = [item.strip() for item in types.split(",") if item.strip()]
+        unknown = set(search_types) - set(SEARCH_TYPES)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Неизвестные типы: {', '.join(sorted(unknown))}"
+            )
+    
+    try:
+        return search_content(db, q, search_types, limit)
+    except OperationalError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Полнотекстовый поиск недоступен"
+        )
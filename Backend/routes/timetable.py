@@ -1,19 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status, Query
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status, Query, Request, Response
+from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Optional
 import sys
+import json
 import os
 import pandas as pd
 import re
-from datetime import datetime, date, timedelta
+import secrets
+from datetime import datetime, date, timedelta, timezone
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "../Table"))
 
 from profcomff_parse_lib import *
+from database import SessionLocal
 from dependencies import get_db, get_admin_user, get_current_active_user
-from models import TeacherDB, GroupDB, SubjectDB, PlaceDB, LessonDB, lesson_groups, lesson_teachers, lesson_places, UserDB
-from schemas import UpdateTimeTable, UserGroupSelect
+from models import (
+    TeacherDB, GroupDB, SubjectDB, PlaceDB, LessonDB, lesson_groups, lesson_teachers, lesson_places, UserDB,
+    TimetableRunDB, TimetableOverrideDB,
+)
+from schemas import UpdateTimeTable, UserGroupSelect, TimetableOverride, TimetableOverrideCreate
+from timetable_search import ENTITY_TYPES, get_search_index, rebuild_search_index
+from timetable_index import (
+    build_timetable_index, get_timetable_index, rebuild_timetable_index, bump_generation, load_lessons,
+)
+from timetable_wire import timetable_response
+from timetable_bundles import write_group_bundles, manifest_path
+from timetable_conflicts import detect_conflicts, parsed_lessons
+from config import TIMETABLE_MAX_CONFLICTS, TIMETABLE_SCHEDULE, TIMETABLE_SCHEDULE_JITTER
+from leases import Lease, active_lease
+from timetable_overrides import (
+    override_to_dict, validate_override, load_override_rules,
+    invalidate_applied_pages, extend_entities,
+)
+from timetable_pages import fetch_pages, mark_pages_applied
+from timetable_scheduler import RefreshScheduler
+from timetable_runs import RunRecorder, run_to_dict
+from timetable_changes import record_timetable_changes, collect_changes
+from timetable_calendar import determine_week_type, iter_occurrences, group_calendar_stream, time_to_minutes
 
 router = APIRouter(prefix="/timetable", tags=["Timetable"])
 
@@ -30,8 +56,19 @@ USER_AGENT = "Mozilla/5.0 (Linux; Android 7.0; SM-G930V Build/NRD90M) AppleWebKi
              "(KHTML, like Gecko) Chrome/59.0.3071.125 Mobile Safari/537.36"
 HEADERS = {"User-Agent": USER_AGENT}
 
+MAX_OCCURRENCES_DAYS = 366
+CALENDAR_DEFAULT_DAYS = 180
+
+REFRESH_LEASE = "timetable_refresh"
+
+
 
 def clear_timetable_data(db: Session):
+    """
+    Удаляет текущее расписание. Не коммитит: очистка и сохранение нового
+    расписания идут одной транзакцией (коммит в save_data_to_db), поэтому
+    другие процессы не видят пустого расписания.
+    """
     db.execute(text("DELETE FROM lesson_teachers"))
     db.execute(text("DELETE FROM lesson_groups"))
     db.execute(text("DELETE FROM lesson_places"))
@@ -41,29 +78,17 @@ def clear_timetable_data(db: Session):
     db.query(GroupDB).delete() 
     db.query(SubjectDB).delete()
     db.query(PlaceDB).delete()
-    db.commit()
 
 
-def fetch_and_parse_data():
-    data = []
-    for ind, source in enumerate(SOURCES):
-        for group in range(1, source[2]+1):
-            url = f'http://ras.phys.msu.ru/table/{source[0]}/{source[1]}/{group}.htm'
-            response = None
-            try:
-                import requests as r
-                response = r.get(url, headers=HEADERS)
-                if response.status_code == 200:
-                    data.append({
-                        'url': url,
-                        'raw_html': response.text,
-                    })
-            except Exception as e:
-                continue
-    
-    if not data:
-        return None, None, None, None, None
-    
+def source_urls() -> List[str]:
+    return [
+        f'http://ras.phys.msu.ru/table/{source[0]}/{source[1]}/{group}.htm'
+        for source in SOURCES
+        for group in range(1, source[2]+1)
+    ]
+
+
+def _parse_pages(data, recorder: RunRecorder, overrides: Optional[List[dict]] = None):
     timetables = pd.DataFrame(data)
     
     results = pd.DataFrame()
@@ -73,6 +98,7 @@ def fetch_and_parse_data():
             if not parsed_timetable.empty:
                 results = pd.concat([results, parsed_timetable])
         except Exception as e:
+            recorder.error(row["url"], e)
             continue
     
     if results.empty:
@@ -97,16 +123,21 @@ def fetch_and_parse_data():
         
         groups = fixed_groups
         
+        if overrides:
+            lessons, recorder.override_problems = apply_overrides(lessons, overrides)
+            places, groups, teachers, subjects = extend_entities(lessons, places, groups, teachers, subjects)
+        
         lessons = multiple_lessons(lessons)
         lessons = flatten(lessons)
         lessons = all_to_array(lessons)
         
         return lessons, places, groups, teachers, subjects
     except Exception as e:
+        recorder.error("parse", e)
         return None, None, None, None, None
 
 
-def save_data_to_db(db: Session, lessons, places, groups, teachers, subjects):
+def save_data_to_db(db: Session, lessons, places, groups, teachers, subjects, lease: Optional[Lease] = None):
     teacher_map = {}
     for teacher_name in teachers:
         teacher = TeacherDB(name=teacher_name)
@@ -157,6 +188,8 @@ def save_data_to_db(db: Session, lessons, places, groups, teachers, subjects):
             number=lesson['num'],
             start_time=lesson['start'],
             end_time=lesson['end'],
+            start_minute=time_to_minutes(lesson['start']),
+            end_minute=time_to_minutes(lesson['end']),
             odd_week=lesson['odd'],
             even_week=lesson['even']
         )
@@ -202,22 +235,135 @@ def save_data_to_db(db: Session, lessons, places, groups, teachers, subjects):
                     text(f"INSERT INTO lesson_places (lesson_id, place_id) VALUES ({lesson_db.id}, {place_id}) ON CONFLICT DO NOTHING")
                 )
     
+    # Вместе с данными: остальные процессы перестроят свои снимки
+    bump_generation(db)
+    # Сохранение могло идти дольше срока аренды: продлеваем ее в этой же
+    # транзакции, а если ее перехватили — откатываемся, ничего не записав
+    _renew_lease(db, lease)
     db.commit()
 
 
-def update_timetable_task(db: Session):
-    clear_timetable_data(db)
+def refresh_timetable_indexes(db: Session):
+    """Перестраивает производные структуры в памяти после изменения расписания."""
+    rebuild_search_index(db)
+    rebuild_timetable_index(db)
+
+
+def update_timetable_task(
+    db: Session,
+    force: bool = False,
+    lease: Optional[Lease] = None,
+    trigger: str = "manual",
+    only_if_changed: bool = False
+):
+    """
+    Обновляет расписание под арендой REFRESH_LEASE. Если аренда не передана,
+    задача пытается захватить ее сама и молча выходит, когда обновление
+    уже идет в другом процессе.
+    """
+    if lease is None:
+        lease = Lease(REFRESH_LEASE)
+        if not lease.acquire():
+            return None
     
-    lessons, places, groups, teachers, subjects = fetch_and_parse_data()
+    try:
+        recorder = RunRecorder(db, trigger)
+        lease.set_run(recorder.run.id)
+        try:
+            run_status = apply_timetable_refresh(db, recorder, force, only_if_changed, lease)
+        except Exception as e:
+            db.rollback()
+            recorder.error("refresh", e)
+            run_status = "failed"
+        return recorder.finish(run_status)
+    finally:
+        lease.release()
+
+
+def apply_timetable_refresh(
+    db: Session,
+    recorder: RunRecorder,
+    force: bool = False,
+    only_if_changed: bool = False,
+    lease: Optional[Lease] = None
+) -> str:
+    """
+    Загружает расписание и применяет его; возвращает статус для журнала.
+    С only_if_changed разбор пропускается, если ни одна страница
+    источника не изменилась с последнего применения. Перед каждым
+    изменяющим шагом аренда проверяется или продлевается: если она
+    потеряна, обновление прерывается с LeaseLost, чтобы не писать
+    одновременно с другим процессом.
+    """
+    with recorder.stage("fetch"):
+        data, changed = fetch_pages(source_urls(), recorder, db, HEADERS)
+    if not data:
+        # Источник недоступен: оставляем текущее расписание как есть
+        return "failed"
+    if only_if_changed and not changed:
+        return "not_modified"
+    
+    with recorder.stage("parse"), recorder.capture_parse_warnings():
+        lessons, places, groups, teachers, subjects = _parse_pages(data, recorder, load_override_rules(db))
     if lessons is None:
-        return
+        return "failed"
     
-    analyze_parsed_data(lessons, places, groups, teachers, subjects)
+    with recorder.stage("analyze"):
+        report = analyze_parsed_data(lessons, places, groups, teachers, subjects)
+    report["override_problems"] = recorder.override_problems
+    recorder.set_report(report)
     
-    save_data_to_db(db, lessons, places, groups, teachers, subjects)
+    conflicts = len(report["conflicts"])
+    if not force and TIMETABLE_MAX_CONFLICTS is not None and conflicts > TIMETABLE_MAX_CONFLICTS:
+        return "blocked"
+    
+    # Предыдущее расписание — из базы, а не снимок этого процесса:
+    # он мог отстать, если прошлое обновление применил другой воркер.
+    previous_index = build_timetable_index(db)
+    recorder.run.lessons_before = len(previous_index)
+    with recorder.stage("save"):
+        # Очистка и сохранение — одна долгая пишущая транзакция: фоновый
+        # поток аренды в это время может не достучаться до базы, поэтому
+        # аренда продлевается в самой транзакции на границах шагов.
+        _renew_lease(db, lease)
+        clear_timetable_data(db)
+        _renew_lease(db, lease)
+        save_data_to_db(db, lessons, places, groups, teachers, subjects, lease)
+    with recorder.stage("index"):
+        refresh_timetable_indexes(db)
+    
+    index = get_timetable_index(db)
+    recorder.run.lessons_after = len(index)
+    with recorder.stage("changes"):
+        version = record_timetable_changes(db, previous_index, index)
+    # Манифест пишется всегда: id групп пересоздаются даже без изменений,
+    # а файлы неизменившихся групп остаются прежними
+    with recorder.stage("bundles"):
+        _check_lease(lease)
+        write_group_bundles(index)
+    mark_pages_applied(db)
+    
+    if version is None:
+        recorder.run.lessons_added = recorder.run.lessons_removed = 0
+        return "unchanged"
+    
+    recorder.run.version_id = version.id
+    recorder.run.lessons_added = version.lessons_added
+    recorder.run.lessons_removed = version.lessons_removed
+    return "applied"
+
+
+def _check_lease(lease: Optional[Lease]):
+    if lease is not None:
+        lease.check()
 
 
-def analyze_parsed_data(lessons, places, groups, teachers, subjects):
+def _renew_lease(db: Session, lease: Optional[Lease]):
+    if lease is not None:
+        lease.renew(db)
+
+
+def analyze_parsed_data(lessons, places, groups, teachers, subjects) -> dict:
     problematic_groups = []
     for group in groups:
         number, name = group
@@ -227,6 +373,19 @@ def analyze_parsed_data(lessons, places, groups, teachers, subjects):
     lessons_without_groups = lessons[lessons['group'].apply(lambda x: len(x) == 0)]
     lessons_without_teachers = lessons[lessons['teacher'].apply(lambda x: len(x) == 0)]
     lessons_without_places = lessons[lessons['place'].apply(lambda x: len(x) == 0)]
+    
+    return {
+        "lessons": len(lessons),
+        "groups": len(groups),
+        "teachers": len(teachers),
+        "places": len(places),
+        "subjects": len(subjects),
+        "problematic_groups": [number for number, _ in problematic_groups],
+        "lessons_without_groups": len(lessons_without_groups),
+        "lessons_without_teachers": len(lessons_without_teachers),
+        "lessons_without_places": len(lessons_without_places),
+        "conflicts": detect_conflicts(parsed_lessons(lessons)),
+    }
 
 
 @router.post("/update", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
@@ -238,66 +397,296 @@ async def update_timetable(
 ):
     """
     Запускает процесс обновления расписания в фоновом режиме.
+    Если обновление уже идет в каком-либо процессе, возвращает 409
+    с описанием текущего запуска.
     Требуются права администратора.
     """
-    if update_data.force_update:
-        background_tasks.add_task(update_timetable_task, db)
-    else:
-        background_tasks.add_task(update_timetable_task, db)
+    lease = Lease(REFRESH_LEASE)
+    if not lease.acquire():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=jsonable_encoder(refresh_in_progress(db))
+        )
+    
+    background_tasks.add_task(background_refresh, update_data.force_update, lease)
     
     return {"message": "Обновление расписания запущено"}
 
 
-def get_group_lessons_simplified(
-    group_id: int,
-    db: Session
+def background_refresh(force: bool, lease: Lease):
+    """
+    Обновление, запущенное через POST /update. Работает в своей сессии:
+    сессия запроса закрывается вместе с ним, а задача идет дольше.
+    """
+    with SessionLocal() as db:
+        update_timetable_task(db, force, lease)
+
+
+def refresh_in_progress(db: Session) -> Optional[dict]:
+    """Описание идущего обновления (кто и когда его начал) или None."""
+    lease = active_lease(db, REFRESH_LEASE)
+    if lease is None:
+        return None
+    
+    run = db.query(TimetableRunDB).filter(TimetableRunDB.id == lease.run_id).first() if lease.run_id else None
+    return {
+        "message": "Обновление расписания уже выполняется",
+        "owner": lease.owner,
+        "started_at": lease.acquired_at,
+        "heartbeat_at": lease.heartbeat_at,
+        "run": run_to_dict(run) if run else None
+    }
+
+
+@router.get("/update/status", response_model=dict)
+async def get_update_status(
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_admin_user)
+):
+    """
+    Состояние обновления расписания: идет ли оно сейчас (в любом
+    из процессов) и каким запуском.
+    Требуются права администратора.
+    """
+    running = refresh_in_progress(db)
+    return {"running": running is not None, "job": running}
+
+
+def scheduled_refresh(fire_at: datetime):
+    """
+    Плановое обновление: пропускается, если окно fire_at уже отработал
+    другой процесс, и применяет расписание, только если источник изменился.
+    """
+    fired_at_utc = datetime.fromtimestamp(fire_at.timestamp(), timezone.utc).replace(tzinfo=None)
+    lease = Lease(REFRESH_LEASE)
+    if not lease.acquire():
+        return
+    
+    with SessionLocal() as db:
+        handled = (
+            db.query(TimetableRunDB.id)
+            .filter(TimetableRunDB.trigger == "schedule", TimetableRunDB.started_at >= fired_at_utc)
+            .first()
+        )
+        if handled:
+            lease.release()
+            return
+        update_timetable_task(db, lease=lease, trigger="schedule", only_if_changed=True)
+
+
+refresh_scheduler = RefreshScheduler(TIMETABLE_SCHEDULE, TIMETABLE_SCHEDULE_JITTER, scheduled_refresh)
+
+
+@router.get("/schedule/status", response_model=dict)
+async def get_schedule_status(
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_admin_user)
+):
+    """
+    Состояние планового обновления: cron-окна, ближайший запуск
+    в этом процессе и последний плановый запуск из журнала.
+    Требуются права администратора.
+    """
+    last_run = (
+        db.query(TimetableRunDB)
+        .filter(TimetableRunDB.trigger == "schedule")
+        .order_by(TimetableRunDB.id.desc())
+        .first()
+    )
+    return {**refresh_scheduler.status(), "last_scheduled_run": run_to_dict(last_run) if last_run else None}
+
+
+@router.get("/runs", response_model=List[dict])
+async def get_timetable_runs(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_admin_user)
+):
+    """
+    Журнал обновлений расписания, новые сверху: статус, страницы,
+    длительность этапов, размеры, строки без подходящего regex и дельта пар.
+    Требуются права администратора.
+    """
+    runs = (
+        db.query(TimetableRunDB)
+        .order_by(TimetableRunDB.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return [run_to_dict(run) for run in runs]
+
+
+@router.get("/runs/{run_id}", response_model=dict)
+async def get_timetable_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_admin_user)
 ):
-    group = db.query(GroupDB).filter(GroupDB.id == group_id).first()
+    """
+    Запись журнала с ошибками по страницам и полным отчетом
+    (включая найденные конфликты).
+    Требуются права администратора.
+    """
+    run = db.query(TimetableRunDB).filter(TimetableRunDB.id == run_id).first()
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Запуск с id {run_id} не найден"
+        )
+    
+    return run_to_dict(run, detail=True)
+
+
+@router.get("/refresh-report", response_model=dict)
+async def get_refresh_report(
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_admin_user)
+):
+    """
+    Отчет о последнем обновлении расписания: размеры, проблемные записи
+    и найденные конфликты. Статус blocked означает, что конфликтов больше
+    порога TIMETABLE_MAX_CONFLICTS и расписание не применено; применить
+    его можно повторным запуском с force_update.
+    Требуются права администратора.
+    """
+    run = db.query(TimetableRunDB).order_by(TimetableRunDB.id.desc()).first()
+    if run is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Обновление расписания еще не запускалось"
+        )
+    
+    return run_to_dict(run, detail=True)
+
+
+@router.get("/overrides", response_model=List[TimetableOverride])
+async def get_timetable_overrides(
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_admin_user)
+):
+    """
+    Ручные правки расписания в порядке применения.
+    Требуются права администратора.
+    """
+    overrides = db.query(TimetableOverrideDB).order_by(TimetableOverrideDB.id).all()
+    return [override_to_dict(override) for override in overrides]
+
+
+@router.post("/overrides", response_model=TimetableOverride, status_code=status.HTTP_201_CREATED)
+async def create_timetable_override(
+    override: TimetableOverrideCreate,
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_admin_user)
+):
+    """
+    Добавляет ручную правку: delete удаляет все пары, подходящие под match,
+    replace меняет значения в единственной подходящей паре, add добавляет
+    пару из values. Правки применяются при следующем обновлении расписания;
+    неоднозначные правила не применяются и попадают в отчет обновления.
+    Требуются права администратора.
+    """
+    validate_override(override.action.value, override.match, override.values)
+    db_override = TimetableOverrideDB(
+        action=override.action.value,
+        match=json.dumps(override.match, ensure_ascii=False),
+        values=json.dumps(override.values, ensure_ascii=False),
+        comment=override.comment,
+        is_active=override.is_active
+    )
+    db.add(db_override)
+    invalidate_applied_pages(db)
+    db.commit()
+    db.refresh(db_override)
+    return override_to_dict(db_override)
+
+
+@router.put("/overrides/{override_id}", response_model=TimetableOverride)
+async def update_timetable_override(
+    override_id: int,
+    override: TimetableOverrideCreate,
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_admin_user)
+):
+    """
+    Изменяет ручную правку.
+    Требуются права администратора.
+    """
+    db_override = get_override_or_404(db, override_id)
+    validate_override(override.action.value, override.match, override.values)
+    
+    db_override.action = override.action.value
+    db_override.match = json.dumps(override.match, ensure_ascii=False)
+    db_override.values = json.dumps(override.values, ensure_ascii=False)
+    db_override.comment = override.comment
+    db_override.is_active = override.is_active
+    db_override.updated_at = datetime.utcnow()
+    invalidate_applied_pages(db)
+    db.commit()
+    db.refresh(db_override)
+    return override_to_dict(db_override)
+
+
+@router.delete("/overrides/{override_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_timetable_override(
+    override_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_admin_user)
+):
+    """
+    Удаляет ручную правку.
+    Требуются права администратора.
+    """
+    db_override = get_override_or_404(db, override_id)
+    db.delete(db_override)
+    invalidate_applied_pages(db)
+    db.commit()
+    return None
+
+
+def get_override_or_404(db: Session, override_id: int) -> TimetableOverrideDB:
+    db_override = db.query(TimetableOverrideDB).filter(TimetableOverrideDB.id == override_id).first()
+    if not db_override:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Правка с id {override_id} не найдена"
+        )
+    return db_override
+
+
+@router.get("/conflicts", response_model=List[dict])
+async def get_timetable_conflicts(
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_admin_user)
+):
+    """
+    Преподаватели и аудитории, занятые в одном слоте разными парами,
+    по текущему расписанию.
+    Требуются права администратора.
+    """
+    index = get_timetable_index(db)
+    return detect_conflicts(index.lessons_for(range(len(index))))
+
+
+def get_group_from_index(index, group_id: int) -> dict:
+    group = index.groups.get(group_id)
     if not group:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Группа с id {group_id} не найдена"
         )
+    return group
+
+
+def get_group_lessons_simplified(
+    group_id: int,
+    db: Session
+):
+    index = get_timetable_index(db)
+    get_group_from_index(index, group_id)
     
-    lessons = db.query(LessonDB).join(
-        lesson_groups, 
-        LessonDB.id == lesson_groups.c.lesson_id
-    ).filter(
-        lesson_groups.c.group_id == group_id
-    ).order_by(
-        LessonDB.weekday,
-        LessonDB.number
-    ).all()
-    
-    simplified_lessons = []
-    for lesson in lessons:
-        subject = db.query(SubjectDB).filter(SubjectDB.id == lesson.subject_id).first()
-        
-        teacher_names = []
-        for teacher in lesson.teachers:
-            teacher_names.append(teacher.name)
-        
-        place_names = []
-        for place in lesson.places:
-            place_names.append(place.name)
-        
-        simplified_lessons.append({
-            "id": lesson.id,
-            "subject": subject.name if subject else "Нет данных",
-            "teachers": teacher_names,
-            "places": place_names,
-            "weekday": lesson.weekday,
-            "weekday_name": ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"][lesson.weekday],
-            "number": lesson.number,
-            "start_time": lesson.start_time,
-            "end_time": lesson.end_time,
-            "odd_week": lesson.odd_week,
-            "even_week": lesson.even_week,
-            "week_type": "Верхняя" if lesson.even_week and not lesson.odd_week else
-                       "Нижняя" if lesson.odd_week and not lesson.even_week else "Обе"
-        })
-    
-    return simplified_lessons
+    return index.group_schedule(group_id)
 
 
 def get_group_lessons_by_day_simplified(
@@ -306,12 +695,8 @@ def get_group_lessons_by_day_simplified(
     db: Session,
     week_type: Optional[str] = None
 ):
-    group = db.query(GroupDB).filter(GroupDB.id == group_id).first()
-    if not group:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Группа с id {group_id} не найдена"
-        )
+    index = get_timetable_index(db)
+    get_group_from_index(index, group_id)
     
     if weekday < 0 or weekday > 6:
         raise HTTPException(
@@ -319,53 +704,32 @@ def get_group_lessons_by_day_simplified(
             detail="День недели должен быть числом от 0 (понедельник) до 6 (воскресенье)"
         )
     
-    query = db.query(LessonDB).join(
-        lesson_groups, 
-        LessonDB.id == lesson_groups.c.lesson_id
-    ).filter(
-        lesson_groups.c.group_id == group_id,
-        LessonDB.weekday == weekday
-    )
-    
-    if week_type:
-        if week_type.lower() == 'upper':
-            query = query.filter(LessonDB.even_week == True)
-        elif week_type.lower() == 'lower':
-            query = query.filter(LessonDB.odd_week == True)
-    
-    lessons = query.order_by(LessonDB.number).all()
-    
-    weekday_names = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"]
+    return index.group_day_schedule(group_id, weekday, week_type)
+
+
+@router.get("/search", response_model=List[dict])
+def search_timetable(
+    q: str = Query(..., min_length=1, description="Строка поиска: номер группы, ФИО, предмет или аудитория"),
+    types: Optional[str] = Query(None, description="Типы через запятую: group, teacher, subject, place"),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Автодополнение по группам, преподавателям, предметам и аудиториям.
+    Учитывает раскладку (кириллица/латиница) и небольшие опечатки,
+    результаты отсортированы по релевантности.
+    """
+    entity_types = None
+    if types:
+        entity_types = [item.strip() for item in types.split(",") if item.strip()]
+        unknown = set(entity_types) - set(ENTITY_TYPES)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Неизвестные типы: {', '.join(sorted(unknown))}"
+            )
     
-    simplified_lessons = []
-    for lesson in lessons:
-        subject = db.query(SubjectDB).filter(SubjectDB.id == lesson.subject_id).first()
-        
-        teacher_names = []
-        for teacher in lesson.teachers:
-            teacher_names.append(teacher.name)
-        
-        place_names = []
-        for place in lesson.places:
-            place_names.append(place.name)
-        
-        simplified_lessons.append({
-            "id": lesson.id,
-            "subject": subject.name if subject else "Нет данных",
-            "teachers": teacher_names,
-            "places": place_names,
-            "weekday": lesson.weekday,
-            "weekday_name": weekday_names[weekday],
-            "number": lesson.number,
-            "start_time": lesson.start_time,
-            "end_time": lesson.end_time,
-            "odd_week": lesson.odd_week,
-            "even_week": lesson.even_week,
-            "week_type": "Верхняя" if lesson.even_week and not lesson.odd_week else
-                       "Нижняя" if lesson.odd_week and not lesson.even_week else "Обе"
-        })
-    
-    return simplified_lessons
+    return get_search_index(db).search(q, entity_types, limit)
 
 
 @router.get("/search_group", response_model=List[dict])
@@ -377,9 +741,9 @@ def search_group(
     Поиск групп по номеру.
     Возвращает список групп, соответствующих запросу.
     """
-    groups = db.query(GroupDB).filter(GroupDB.number.ilike(f"%{query}%")).all()
+    groups = get_search_index(db).search(query, ["group"], limit=50)
     
-    return [{"id": group.id, "number": group.number, "name": group.name} for group in groups]
+    return [{"id": group["id"], "number": group["number"], "name": group["name"]} for group in groups]
 
 
 @router.post("/user/select-group", response_model=dict)
@@ -423,22 +787,18 @@ async def get_user_group(
             detail="Вы еще не выбрали группу"
         )
     
-    group = db.query(GroupDB).filter(GroupDB.id == current_user.selected_group_id).first()
-    if not group:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Группа с id {current_user.selected_group_id} не найдена"
-        )
+    group = get_group_from_index(get_timetable_index(db), current_user.selected_group_id)
     
     return {
-        "group_id": group.id,
-        "group_number": group.number,
-        "group_name": group.name
+        "group_id": group["id"],
+        "group_number": group["number"],
+        "group_name": group["name"]
     }
 
 
 @router.get("/user/schedule", response_model=List[dict])
 async def get_user_schedule(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: UserDB = Depends(get_current_active_user)
 ):
@@ -451,11 +811,12 @@ async def get_user_schedule(
             detail="Вы еще не выбрали группу. Используйте /timetable/user/select-group для выбора группы."
         )
     
-    return get_group_lessons_simplified(current_user.selected_group_id, db)
+    return timetable_response(request, get_group_lessons_simplified(current_user.selected_group_id, db))
 
 
 @router.get("/user/schedule/day/{weekday}", response_model=List[dict])
 async def get_user_schedule_by_day(
+    request: Request,
     weekday: int,
     week_type: Optional[str] = Query(None, description="Тип недели: 'upper' (верхняя) или 'lower' (нижняя)"),
     db: Session = Depends(get_db),
@@ -480,20 +841,12 @@ async def get_user_schedule_by_day(
             detail="День недели должен быть числом от 0 (понедельник) до 6 (воскресенье)"
         )
     
-    return get_group_lessons_by_day_simplified(current_user.selected_group_id, weekday, db, week_type)
-
-
-def determine_week_type(current_date=None):
-    if current_date is None:
-        current_date = datetime.now().date()
-    
-    week_number = current_date.isocalendar()[1]
-    
-    return 'upper' if week_number % 2 == 1 else 'lower'
+    return timetable_response(request, get_group_lessons_by_day_simplified(current_user.selected_group_id, weekday, db, week_type))
 
 
 @router.get("/user/schedule/today", response_model=List[dict])
 async def get_user_schedule_today(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: UserDB = Depends(get_current_active_user)
 ):
@@ -516,11 +869,12 @@ async def get_user_schedule_today(
     for lesson in lessons:
         lesson["date"] = today.strftime("%d.%m.%Y")
     
-    return lessons
+    return timetable_response(request, lessons)
 
 
 @router.get("/group/{group_id}/today", response_model=List[dict])
 async def get_group_schedule_today(
+    request: Request,
     group_id: int,
     db: Session = Depends(get_db)
 ):
@@ -531,12 +885,7 @@ async def get_group_schedule_today(
     Параметры:
     - group_id: идентификатор группы
     """
-    group = db.query(GroupDB).filter(GroupDB.id == group_id).first()
-    if not group:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Группа с id {group_id} не найдена"
-        )
+    get_group_from_index(get_timetable_index(db), group_id)
     
     today = datetime.now().date()
     weekday = today.weekday()
@@ -547,11 +896,12 @@ async def get_group_schedule_today(
     for lesson in lessons:
         lesson["date"] = today.strftime("%d.%m.%Y")
     
-    return lessons
+    return timetable_response(request, lessons)
 
 
 @router.get("/group/{group_id}/tomorrow", response_model=List[dict])
 async def get_group_schedule_tomorrow(
+    request: Request,
     group_id: int,
     db: Session = Depends(get_db)
 ):
@@ -562,12 +912,7 @@ async def get_group_schedule_tomorrow(
     Параметры:
     - group_id: идентификатор группы
     """
-    group = db.query(GroupDB).filter(GroupDB.id == group_id).first()
-    if not group:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Группа с id {group_id} не найдена"
-        )
+    get_group_from_index(get_timetable_index(db), group_id)
     
     today = datetime.now().date()
     tomorrow = today + timedelta(days=1)
@@ -579,11 +924,12 @@ async def get_group_schedule_tomorrow(
     for lesson in lessons:
         lesson["date"] = tomorrow.strftime("%d.%m.%Y")
     
-    return lessons
+    return timetable_response(request, lessons)
 
 
 @router.get("/group/{group_id}/schedule", response_model=List[dict])
 async def get_group_full_schedule(
+    request: Request,
     group_id: int,
     db: Session = Depends(get_db)
 ):
@@ -593,11 +939,353 @@ async def get_group_full_schedule(
     Параметры:
     - group_id: идентификатор группы
     """
-    group = db.query(GroupDB).filter(GroupDB.id == group_id).first()
-    if not group:
+    get_group_from_index(get_timetable_index(db), group_id)
+    
+    return timetable_response(request, get_group_lessons_simplified(group_id, db)) 
+
+
+@router.get("/teacher/{teacher_id}/schedule", response_model=List[dict])
+async def get_teacher_schedule(
+    request: Request,
+    teacher_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Получить расписание преподавателя на всю неделю.
+    
+    Параметры:
+    - teacher_id: идентификатор преподавателя
+    """
+    index = get_timetable_index(db)
+    if teacher_id not in index.teachers:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Группа с id {group_id} не найдена"
+            detail=f"Преподаватель с id {teacher_id} не найден"
+        )
+    
+    return timetable_response(request, index.teacher_schedule(teacher_id))
+
+
+@router.get("/room/{place_id}/schedule", response_model=List[dict])
+async def get_room_schedule(
+    request: Request,
+    place_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Получить расписание аудитории на всю неделю.
+    
+    Параметры:
+    - place_id: идентификатор аудитории
+    """
+    index = get_timetable_index(db)
+    if place_id not in index.places:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Аудитория с id {place_id} не найдена"
+        )
+    
+    return timetable_response(request, index.place_schedule(place_id))
+
+
+@router.get("/subject/{subject_id}/schedule", response_model=List[dict])
+async def get_subject_schedule(
+    request: Request,
+    subject_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Получить все пары по предмету на неделе.
+    
+    Параметры:
+    - subject_id: идентификатор предмета
+    """
+    index = get_timetable_index(db)
+    if subject_id not in index.subjects:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Предмет с id {subject_id} не найден"
+        )
+    
+    return timetable_response(request, index.subject_schedule(subject_id))
+
+
+def resolve_date_range(date_from: Optional[date], date_to: Optional[date], default_days: int):
+    if date_from is None:
+        date_from = datetime.now().date()
+    if date_to is None:
+        date_to = date_from + timedelta(days=default_days)
+    
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Дата окончания не может быть раньше даты начала"
+        )
+    if (date_to - date_from).days >= MAX_OCCURRENCES_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Диапазон не может превышать {MAX_OCCURRENCES_DAYS} дней"
+        )
+    
+    return date_from, date_to
+
+
+def group_calendar_response(
+    request: Request,
+    group_id: int,
+    date_from: Optional[date],
+    date_to: Optional[date],
+    db: Session
+):
+    index = get_timetable_index(db)
+    get_group_from_index(index, group_id)
+    
+    date_from, date_to = resolve_date_range(date_from, date_to, CALENDAR_DEFAULT_DAYS)
+    etag = f'"{index.version}-{group_id}-{date_from:%Y%m%d}-{date_to:%Y%m%d}"'
+    headers = {
+        "ETag": etag,
+        "Content-Disposition": f'inline; filename="group-{group_id}.ics"',
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return StreamingResponse(
+        group_calendar_stream(index, group_id, date_from, date_to),
+        media_type="text/calendar; charset=utf-8",
+        headers=headers
+    )
+
+
+@router.get("/group/{group_id}/occurrences", response_model=List[dict])
+async def get_group_occurrences(
+    request: Request,
+    group_id: int,
+    date_from: Optional[date] = Query(None, alias="from", description="Первая дата диапазона (YYYY-MM-DD), по умолчанию сегодня"),
+    date_to: Optional[date] = Query(None, alias="to", description="Последняя дата диапазона (YYYY-MM-DD), по умолчанию через неделю"),
+    db: Session = Depends(get_db)
+):
+    """
+    Получить занятия группы по конкретным датам в диапазоне [from, to].
+    Тип недели (верхняя/нижняя) определяется для каждой даты на сервере.
+    
+    Параметры:
+    - group_id: идентификатор группы
+    - from, to: границы диапазона включительно, не более 366 дней
+    """
+    index = get_timetable_index(db)
+    get_group_from_index(index, group_id)
+    
+    date_from, date_to = resolve_date_range(date_from, date_to, 6)
+    
+    return timetable_response(request, list(iter_occurrences(index.group_schedule(group_id), date_from, date_to)))
+
+
+@router.get("/group/{group_id}/calendar.ics")
+async def get_group_calendar(
+    request: Request,
+    group_id: int,
+    date_from: Optional[date] = Query(None, alias="from", description="Начало периода (YYYY-MM-DD), по умолчанию сегодня"),
+    date_to: Optional[date] = Query(None, alias="to", description="Конец периода (YYYY-MM-DD), по умолчанию через 180 дней"),
+    db: Session = Depends(get_db)
+):
+    """
+    Лента iCalendar (.ics) с расписанием группы для подписки в календаре.
+    Каждая пара передается одним повторяющимся событием.
+    """
+    return group_calendar_response(request, group_id, date_from, date_to, db)
+
+
+@router.post("/user/calendar-token", response_model=dict)
+async def create_user_calendar_token(
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_current_active_user)
+):
+    """
+    Выпустить ссылку на .ics-ленту выбранной группы для подписки в календаре.
+    Календари не передают заголовок Authorization, поэтому пользователя
+    определяет секрет в самой ссылке. Прежняя ссылка перестает работать.
+    """
+    current_user.calendar_token = secrets.token_urlsafe(32)
+    db.commit()
+    
+    return {
+        "token": current_user.calendar_token,
+        "url": f"{router.prefix}/user/{current_user.calendar_token}/calendar.ics"
+    }
+
+
+@router.delete("/user/calendar-token", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_user_calendar_token(
+    db: Session = Depends(get_db),
+    current_user: UserDB = Depends(get_current_active_user)
+):
+    """
+    Отозвать ссылку на .ics-ленту: подписки по ней перестанут обновляться.
+    """
+    current_user.calendar_token = None
+    db.commit()
+    return None
+
+
+@router.get("/user/{token}/calendar.ics")
+async def get_user_calendar(
+    request: Request,
+    token: str,
+    date_from: Optional[date] = Query(None, alias="from", description="Начало периода (YYYY-MM-DD), по умолчанию сегодня"),
+    date_to: Optional[date] = Query(None, alias="to", description="Конец периода (YYYY-MM-DD), по умолчанию через 180 дней"),
+    db: Session = Depends(get_db)
+):
+    """
+    Лента iCalendar (.ics) с расписанием выбранной пользователем группы.
+    Ссылку выдает POST /timetable/user/calendar-token; группа берется
+    на момент запроса, так что подписка следует за сменой группы.
+    """
+    user = db.query(UserDB).filter(UserDB.calendar_token == token, UserDB.is_active == True).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ссылка на календарь недействительна"
+        )
+    if not user.selected_group_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Группа еще не выбрана."
+        )
+    
+    return group_calendar_response(request, user.selected_group_id, date_from, date_to, db)
+
+
+def filter_week_type(query, week_type: str):
+    if week_type == 'upper':
+        return query.filter(LessonDB.even_week == True)
+    return query.filter(LessonDB.odd_week == True)
+
+
+def lessons_in_progress(db: Session, moment: datetime, group_id: Optional[int] = None):
+    """
+    id пар, идущих в момент moment. Диапазонный поиск по индексу
+    (weekday, start_minute) с отсечением по end_minute.
+    """
+    minute = moment.hour * 60 + moment.minute
+    query = db.query(LessonDB.id).filter(
+        LessonDB.weekday == moment.weekday(),
+        LessonDB.start_minute <= minute,
+        LessonDB.end_minute > minute
+    )
+    if group_id is not None:
+        query = query.join(lesson_groups, LessonDB.id == lesson_groups.c.lesson_id).filter(
+            lesson_groups.c.group_id == group_id
+        )
+    query = filter_week_type(query, determine_week_type(moment.date()))
+    
+    return [lesson_id for lesson_id, in query.order_by(LessonDB.start_minute, LessonDB.id)]
+
+
+def next_group_lesson(db: Session, moment: datetime, group_id: int):
+    """
+    Ближайшая пара группы, начинающаяся после moment, в пределах недели.
+    Возвращает (id пары, дата) или None.
+    """
+    minute = moment.hour * 60 + moment.minute
+    for offset in range(8):
+        day = moment.date() + timedelta(days=offset)
+        query = db.query(LessonDB.id).join(
+            lesson_groups,
+            LessonDB.id == lesson_groups.c.lesson_id
+        ).filter(
+            lesson_groups.c.group_id == group_id,
+            LessonDB.weekday == day.weekday(),
+            LessonDB.start_minute.isnot(None)
+        )
+        if offset == 0:
+            query = query.filter(LessonDB.start_minute > minute)
+        query = filter_week_type(query, determine_week_type(day))
+        
+        row = query.order_by(LessonDB.start_minute, LessonDB.id).first()
+        if row:
+            return row[0], day
+    return None
+
+
+@router.get("/group/{group_id}/now", response_model=dict)
+async def get_group_now(
+    group_id: int,
+    at: Optional[datetime] = Query(None, description="Момент времени, по умолчанию текущий"),
+    db: Session = Depends(get_db)
+):
+    """
+    Текущая и следующая пара группы.
+    
+    Параметры:
+    - group_id: идентификатор группы
+    - at: момент времени (для проверки), по умолчанию сейчас
+    """
+    index = get_timetable_index(db)
+    get_group_from_index(index, group_id)
+    
+    moment = at or datetime.now()
+    
+    # Пары берутся из базы по тем же id, что вернули запросы: снимок
+    # в памяти может отставать от только что примененного обновления.
+    current_ids = lessons_in_progress(db, moment, group_id)
+    current = next(iter(load_lessons(db, current_ids[:1])), None)
+    if current:
+        current["date"] = moment.strftime("%d.%m.%Y")
+    
+    upcoming = None
+    found = next_group_lesson(db, moment, group_id)
+    if found:
+        lesson_id, day = found
+        upcoming = next(iter(load_lessons(db, [lesson_id])), None)
+        if upcoming:
+            upcoming["date"] = day.strftime("%d.%m.%Y")
+    
+    return {"current": current, "next": upcoming}
+
+
+@router.get("/now", response_model=List[dict])
+async def get_lessons_now(
+    request: Request,
+    at: Optional[datetime] = Query(None, description="Момент времени, по умолчанию текущий"),
+    db: Session = Depends(get_db)
+):
+    """
+    Все пары факультета, идущие прямо сейчас.
+    """
+    moment = at or datetime.now()
+    
+    return timetable_response(request, load_lessons(db, lessons_in_progress(db, moment)))
+
+
+@router.get("/changes")
+async def get_timetable_changes(
+    since: int = Query(..., ge=0, description="Версия расписания, которая уже есть у клиента"),
+    group_id: int = Query(..., description="ID группы"),
+    db: Session = Depends(get_db)
+):
+    """
+    Изменения расписания группы после версии since: добавленные пары
+    целиком и ключи удаленных пар. Пары сопоставляются по полю key — id
+    пар меняются при каждом обновлении; у одинаковых пар ключ общий,
+    и в removed он повторяется по разу на каждую удаленную пару. Если
+    версия клиента слишком старая, возвращается full_resync: true,
+    и расписание нужно загрузить заново.
+    """
+    group = get_group_from_index(get_timetable_index(db), group_id)
+    return {"group_id": group_id, **collect_changes(db, since, group["number"])}
+
+
+@router.get("/bundles/manifest")
+async def get_bundles_manifest():
+    """
+    Манифест статических бандлов расписания: group_id -> URL файла
+    (плюс .gz/.br копии). Сами бандлы отдаются напрямую из /static.
+    """
+    path = manifest_path()
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Бандлы расписания еще не сгенерированы"
         )
     
-    return get_group_lessons_simplified(group_id, db) 
\ No newline at end of file
+    return FileResponse(path, media_type="application/json", headers={"Cache-Control": "no-cache"})
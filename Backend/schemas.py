@@ -168,7 +168,10 @@ class Post(PostBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     author: Optional[AuthorInfo] = None
-    likes: List[int] = []
+    like_count: int = 0
+    comment_count: int = 0
+    # Список лайкнувших отдается только по запросу (include_likes)
+    likes: Optional[List[int]] = None
     comments: List[Comment] = []
 
     class Config:
@@ -176,6 +179,61 @@ class Post(PostBase):
         from_attributes = True
 
 
+class PostSummary(BaseModel):
+    """Пост для ленты: без полного текста и комментариев."""
+    id: int
+    title: str
+    excerpt: str
+    category: Category
+    photo_url: Optional[str] = None
+    author: Optional[AuthorInfo] = None
+    like_count: int = 0
+    comment_count: int = 0
+    created_at: datetime
+
+
+class PostLikeStatus(BaseModel):
+    post_id: int
+    liked: bool
+    like_count: int
+
+
+class PostLikesStatusRequest(BaseModel):
+    post_ids: List[int]
+
+
+class PostLikesStatus(BaseModel):
+    # id постов из запроса, которые лайкнул текущий пользователь
+    liked: List[int]
+
+
+class FeedCard(BaseModel):
+    """Карточка общей ленты: пост, новость или мероприятие."""
+    type: str
+    id: int
+    title: str
+    excerpt: str
+    image_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+    author: Optional[AuthorInfo] = None
+    # Только для постов
+    like_count: Optional[int] = None
+    comment_count: Optional[int] = None
+    # Только для мероприятий
+    start_date: Optional[datetime] = None
+    location: Optional[str] = None
+
+
+class SearchResult(BaseModel):
+    type: str
+    id: int
+    title: str
+    # Фрагмент текста, совпадения обернуты в <mark>
+    snippet: str
+    score: float
+    created_at: Optional[datetime] = None
+
+
 class NewsBase(BaseModel):
     title: str
     content: str
@@ -415,6 +473,34 @@ class UpdateTimeTable(BaseModel):
     force_update: bool = False
 
 
+class TimetableOverrideAction(str, Enum):
+    DELETE = "delete"
+    REPLACE = "replace"
+    ADD = "add"
+
+
+class TimetableOverrideBase(BaseModel):
+    """
+    Ручная правка расписания. Колонки match и values — колонки разобранной
+    таблицы: subject, teacher, place, group, weekday, num, start, end, odd, even.
+    """
+    action: TimetableOverrideAction
+    match: Dict[str, Any] = {}
+    values: Dict[str, Any] = {}
+    comment: Optional[str] = None
+    is_active: bool = True
+
+
+class TimetableOverrideCreate(TimetableOverrideBase):
+    pass
+
+
+class TimetableOverride(TimetableOverrideBase):
+    id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+
 class UserGroupSelect(BaseModel):
     group_id: int
 
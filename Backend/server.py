@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -5,9 +6,25 @@ import os
 
 from models import Base
 from database import engine
+from content_search import ensure_search_index
+from response_cache import response_cache_middleware
 from routes import api_router
+from routes.timetable import refresh_scheduler
 
-app = FastAPI(title="ИдеяРелиз API", description="API for IdeaCodeRelease platform")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Плановое обновление расписания (включается переменной TIMETABLE_SCHEDULE)
+    refresh_scheduler.start()
+    yield
+    refresh_scheduler.stop()
+
+
+app = FastAPI(title="ИдеяРелиз API", description="API for IdeaCodeRelease platform", lifespan=lifespan)
+
+# Кэш ответов публичных справочников. Подключается раньше CORS, чтобы
+# оказаться внутри него: заголовки CORS не должны попадать в кэш.
+app.middleware("http")(response_cache_middleware)
 
 # Allow all origins for CORS
 app.add_middleware(
@@ -16,6 +33,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["X-Next-Cursor", "X-Cache"],  # Курсор следующей страницы списков, попадание в кэш
     max_age=600,  # Cache preflight requests for 10 minutes
 )
 
@@ -29,6 +47,8 @@ os.makedirs("static/uploads/posts", exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 Base.metadata.create_all(bind=engine)
+# FTS5-индекс постов, новостей и базы знаний с триггерами синхронизации
+ensure_search_index(engine)
 
 app.include_router(api_router)
 
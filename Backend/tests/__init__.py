@@ -0,0 +1,94 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from unittest import TestCase
+
+import pandas as pd
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import Base, UserDB
+from routes.timetable import clear_timetable_data, refresh_timetable_indexes, save_data_to_db
+
+
+class DatabaseTestCase(TestCase):
+    """Тест с чистой SQLite-базой в памяти: self.engine и self.db создаются заново для каждого теста."""
+
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    @contextmanager
+    def count_queries(self) -> Iterator[List[str]]:
+        """SQL-запросы, выполненные внутри блока: with self.count_queries() as statements: ..."""
+        statements: List[str] = []
+
+        def collect(connection, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(self.engine, "before_cursor_execute", collect)
+        try:
+            yield statements
+        finally:
+            event.remove(self.engine, "before_cursor_execute", collect)
+
+    def make_user(self, username: str = "user", **values) -> UserDB:
+        """Добавляет пользователя (без коммита) и возвращает его с id."""
+        values = {
+            "email": f"{username}@example.com", "first_name": "Имя", "last_name": "Фамилия",
+            "hashed_password": "x", **values
+        }
+        user = UserDB(username=username, **values)
+        self.db.add(user)
+        self.db.flush()
+        return user
+
+    def make_users(self, count: int) -> List[UserDB]:
+        """Пользователи user0, user1, ... с id 1, 2, ..."""
+        return [self.make_user(f"user{i}") for i in range(count)]
+
+
+def make_request(query: str = "", headers: Optional[Dict[str, str]] = None) -> Request:
+    """Запрос для прямого вызова обработчиков, которым нужен Request."""
+    return Request({
+        "type": "http", "method": "GET", "path": "/", "query_string": query.encode(),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    })
+
+
+def timetable_lesson(subject: str, weekday: int, number: int, start: str, end: str, teachers=(), places=(),
+                     groups=(), odd: bool = True, even: bool = True) -> dict:
+    """Пара в том виде, в каком ее отдает разбор источника."""
+    return {
+        "subject": subject, "weekday": weekday, "num": number, "start": start, "end": end, "odd": odd, "even": even,
+        "teacher": list(teachers), "place": list(places), "group": list(groups)
+    }
+
+
+def parsed_timetable(lessons: List[dict]) -> tuple:
+    """(lessons, places, groups, teachers, subjects) — как после _parse_pages."""
+    def unique(column):
+        return list(dict.fromkeys(value for lesson in lessons for value in lesson[column]))
+
+    groups = [(number, f"Группа {number}") for number in unique("group")]
+    subjects = list(dict.fromkeys(lesson["subject"] for lesson in lessons))
+    return pd.DataFrame(lessons), unique("place"), groups, unique("teacher"), subjects
+
+
+class TimetableTestCase(DatabaseTestCase):
+    """Тест с расписанием, сохраненным тем же путем, что и при обновлении из источника."""
+
+    def save_timetable(self, lessons: List[dict]) -> None:
+        """Заменяет расписание в базе и перестраивает снимки в памяти."""
+        clear_timetable_data(self.db)
+        save_data_to_db(self.db, *parsed_timetable(lessons))
+        # Снимки общие для процесса: без перестройки остался бы снимок прошлого теста
+        refresh_timetable_indexes(self.db)
@@ -0,0 +1,74 @@
+from content_search import build_match_query, ensure_search_index, search_content
+from models import PostDB, NewsDB, KnowledgeBaseDB
+from tests import DatabaseTestCase
+
+
+class Test(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # Пост до создания индекса попадает в него через бэкфилл
+        self.db.add(PostDB(title="Потерял зачётку", content="Где-то в главном корпусе", author_id=1))
+        self.db.commit()
+        self.assertTrue(ensure_search_index(self.engine))
+        self.db.add_all([
+            PostDB(title="Конспекты лекций", content="Выкладываю конспект лекции по матанализу", author_id=1),
+            NewsDB(title="Расписание сессии", content="Экзамены и лекции переносятся", author_id=1),
+            KnowledgeBaseDB(title="Матанализ", description="Сборник лекций и задач", author_id=1),
+        ])
+        self.db.commit()
+
+    def test_word_forms_and_ranking(self):
+        results = search_content(self.db, "лекция")
+        self.assertEqual({(item["type"], item["id"]) for item in results},
+                         {("post", 2), ("news", 1), ("knowledge", 1)})
+        # Совпадение в заголовке весит больше
+        self.assertEqual((results[0]["type"], results[0]["id"]), ("post", 2))
+        self.assertIn("<mark>", results[0]["snippet"])
+
+    def test_strong_match_outranks_weak_match_of_other_type(self):
+        self.db.add_all([
+            PostDB(title="Стипендия", content="Стипендия за сессию: когда придет стипендия", author_id=1),
+            KnowledgeBaseDB(title="Общежитие", description="Заселение, пропуск, прачечная, душ, кухня, "
+                                                           "соседи, правила; стипендия не влияет", author_id=1),
+        ])
+        self.db.commit()
+        results = search_content(self.db, "стипендия", ["knowledge", "post"])
+        self.assertEqual([item["type"] for item in results], ["post", "knowledge"])
+        self.assertGreater(results[0]["score"], 2 * results[1]["score"])
+
+    def test_title_match_ranks_higher_within_type(self):
+        self.db.add(PostDB(title="Вопрос", content="Кто ведет лекции по физике?", author_id=1))
+        self.db.commit()
+        results = search_content(self.db, "лекция", ["post"])
+        self.assertEqual([item["id"] for item in results], [2, 3])
+        self.assertGreater(results[0]["score"], results[1]["score"])
+
+    def test_snippet_is_escaped(self):
+        self.db.add(PostDB(title="<script>alert(1)</script>", content="лекции & <b>семинары</b>", author_id=1))
+        self.db.commit()
+        snippet = search_content(self.db, "семинары", ["post"])[0]["snippet"]
+        self.assertNotIn("<b>", snippet)
+        self.assertNotIn("<script>", snippet)
+        self.assertIn("&amp; &lt;b&gt;<mark>семинары</mark>&lt;/b&gt;", snippet)
+
+    def test_duplicate_types_are_searched_once(self):
+        self.assertEqual(len(search_content(self.db, "лекции", ["news", "news"])), 1)
+
+    def test_types_filter_and_backfill(self):
+        self.assertEqual([item["id"] for item in search_content(self.db, "зачетка", ["post"])], [1])
+        self.assertEqual(search_content(self.db, "лекции", ["news"])[0]["type"], "news")
+
+    def test_triggers_follow_updates_and_deletes(self):
+        post = self.db.query(PostDB).get(1)
+        post.title = "Нашёл студенческий"
+        self.db.commit()
+        self.assertEqual(search_content(self.db, "зачетка"), [])
+        self.assertEqual(len(search_content(self.db, "студенческий")), 1)
+
+        self.db.delete(post)
+        self.db.commit()
+        self.assertEqual(search_content(self.db, "студенческий"), [])
+
+    def test_match_query_escapes_syntax(self):
+        self.assertEqual(build_match_query('лекции OR "x'), '"лекци"* "or"* "x"*')
+        self.assertIsNone(build_match_query("  !!! "))
@@ -0,0 +1,59 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from fastapi import Response
+
+from models import PostDB, NewsDB, EventDB, GalleryImageDB
+from pagination import NEXT_CURSOR_HEADER
+from routes.feed import get_feed
+from tests import DatabaseTestCase
+
+
+class Test(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_user()
+        start = datetime(2024, 9, 1)
+        # Новости — часто, посты — реже, мероприятие — одно и с фото
+        self.db.add_all([
+            NewsDB(title=f"Новость {i}", content="Текст", author_id=1, created_at=start + timedelta(hours=i))
+            for i in range(10)
+        ])
+        self.db.add_all([
+            PostDB(title=f"Пост {i}", content="Текст " * 50, author_id=1, created_at=start + timedelta(hours=3 * i))
+            for i in range(3)
+        ])
+        self.db.add(EventDB(title="Концерт", description="Описание", created_at=start + timedelta(hours=4, minutes=30)))
+        self.db.add(GalleryImageDB(event_id=1, image_url="/static/concert.png"))
+        self.db.commit()
+
+    def _walk(self, limit: int):
+        pages, cursor = [], None
+        while True:
+            response = Response()
+            result = asyncio.run(get_feed(response, limit=limit, cursor=cursor, db=self.db))
+            pages.append(json.loads(result.body))
+            cursor = result.headers.get(NEXT_CURSOR_HEADER)
+            if cursor is None:
+                return pages
+
+    def test_pages_merge_sources_by_time(self):
+        pages = self._walk(4)
+        cards = [card for page in pages for card in page]
+        self.assertEqual(len(cards), 14)
+        self.assertEqual(len({(card["type"], card["id"]) for card in cards}), 14)
+        stamps = [card["created_at"] for card in cards]
+        self.assertEqual(stamps, sorted(stamps, reverse=True))
+        self.assertTrue(all(len(page) == 4 for page in pages[:-1]))
+
+    def test_cards_are_lightweight(self):
+        with self.count_queries() as statements:
+            cards = self._walk(20)[0]
+        # Три источника и одна выборка картинок мероприятий
+        self.assertEqual(len(statements), 4)
+        concert, = [card for card in cards if card["type"] == "event"]
+        self.assertEqual(concert["image_url"], "/static/concert.png")
+        post = next(card for card in cards if card["type"] == "post")
+        self.assertTrue(post["excerpt"].endswith("..."))
+        self.assertEqual(post["author"]["username"], "user")
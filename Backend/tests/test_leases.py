@@ -0,0 +1,174 @@
+import asyncio
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from fastapi import BackgroundTasks, HTTPException
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import leases
+from leases import Lease, LeaseLost, active_lease
+from models import JobLeaseDB, LessonDB
+from routes.timetable import REFRESH_LEASE, background_refresh, update_timetable, update_timetable_task
+from schemas import UpdateTimeTable
+from timetable_calendar import time_to_minutes
+from tests import TimetableTestCase, parsed_timetable, timetable_lesson
+
+LESSONS = [timetable_lesson("Механика", 0, 1, "9:00", "10:35", ["Иванов И. И."], ["5-18"], ["101"])]
+
+
+class FlakySessions:
+    """Фабрика сессий, которая отказывает failures раз подряд, как занятая SQLite."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.failures = 0
+
+    def __call__(self):
+        if self.failures:
+            self.failures -= 1
+            raise OperationalError("UPDATE job_leases", {}, Exception("database is locked"))
+        return self.session_factory()
+
+
+class Test(TimetableTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sessions = sessionmaker(bind=self.engine)
+
+    def _lease(self, ttl: float = 120, sessions=None) -> Lease:
+        lease = Lease("job", ttl=ttl, session_factory=sessions or self.sessions)
+        self.addCleanup(lease.release)
+        return lease
+
+    def _expire(self):
+        self.db.query(JobLeaseDB).update({JobLeaseDB.expires_at: datetime.utcnow() - timedelta(seconds=1)})
+        self.db.commit()
+
+    def test_only_one_holder(self):
+        first, second = self._lease(), self._lease()
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        self.assertEqual(active_lease(self.db, "job").owner, first.owner)
+
+        first.release()
+        self.assertIsNone(active_lease(self.db, "job"))
+        self.assertTrue(second.acquire())
+
+    def test_expired_lease_is_taken_over(self):
+        first, second = self._lease(), self._lease()
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+
+        # Владелец упал и перестал продлевать аренду
+        self._expire()
+        self.assertTrue(second.acquire())
+        self.assertEqual(active_lease(self.db, "job").owner, second.owner)
+
+    def test_heartbeat_extends_and_detects_takeover(self):
+        lease = self._lease(ttl=0.3)
+        self.assertTrue(lease.acquire())
+        expires_at = lease.expires_at
+        time.sleep(0.25)
+        self.assertGreater(lease.expires_at, expires_at)
+        lease.check()
+
+        self.db.query(JobLeaseDB).update({JobLeaseDB.owner: "другой процесс"})
+        self.db.commit()
+        time.sleep(0.25)
+        self.assertTrue(lease.lost)
+        with self.assertRaises(LeaseLost):
+            lease.check()
+
+    @patch.object(leases, "LEASE_RETRY_SECONDS", 0.02)
+    def test_heartbeat_survives_locked_database(self):
+        sessions = FlakySessions(self.sessions)
+        lease = self._lease(ttl=0.6, sessions=sessions)
+        self.assertTrue(lease.acquire())
+
+        sessions.failures = 3
+        time.sleep(0.5)
+        self.assertFalse(lease.lost)
+        lease.check()
+
+        # База недоступна дольше срока аренды
+        sessions.failures = 1000
+        time.sleep(0.8)
+        self.assertTrue(lease.lost)
+        sessions.failures = 0
+
+    def _refresh(self, lease: Lease, **patches):
+        patches = {
+            "fetch_pages": MagicMock(return_value=([{"url": "u", "raw_html": ""}], 1)),
+            "_parse_pages": MagicMock(return_value=parsed_timetable([dict(LESSONS[0], num=2)])),
+            "write_group_bundles": MagicMock(),
+            **patches,
+        }
+        with ExitStack() as stack:
+            for target, replacement in patches.items():
+                stack.enter_context(patch(f"routes.timetable.{target}", replacement))
+            return update_timetable_task(self.db, lease=lease)
+
+    def test_refresh_stops_when_lease_is_lost(self):
+        self.save_timetable(LESSONS)
+        lease = Lease(REFRESH_LEASE, session_factory=self.sessions)
+        self.assertTrue(lease.acquire())
+        # Аренду перехватил другой процесс
+        self.db.query(JobLeaseDB).update({JobLeaseDB.owner: "другой процесс"})
+        self.db.commit()
+
+        run = self._refresh(lease)
+
+        self.assertEqual(run.status, "failed")
+        self.assertIn("LeaseLost", run.errors)
+        # Старое расписание не тронуто
+        self.assertEqual(self.db.query(LessonDB.number).all(), [(1,)])
+
+    @patch.object(leases, "LEASE_RETRY_SECONDS", 0.02)
+    def test_save_longer_than_lease_ttl(self):
+        self.save_timetable(LESSONS)
+        sessions = FlakySessions(self.sessions)
+        lease = Lease(REFRESH_LEASE, ttl=0.3, session_factory=sessions)
+        self.assertTrue(lease.acquire())
+        self.addCleanup(lease.release)
+
+        def slow_minutes(value):
+            # Пока сохранение держит транзакцию, продлить аренду из потока нельзя
+            sessions.failures = 1000
+            time.sleep(0.25)
+            return real_minutes(value)
+
+        real_minutes = time_to_minutes
+        run = self._refresh(lease, time_to_minutes=slow_minutes)
+        sessions.failures = 0
+
+        self.assertEqual(run.status, "applied", run.errors)
+        self.assertEqual(self.db.query(LessonDB.number).all(), [(2,)])
+        self.assertEqual(self.db.query(JobLeaseDB).one().owner, lease.owner)
+
+    def test_update_endpoint(self):
+        tasks = BackgroundTasks()
+        admin = self.make_user("admin")
+        with patch("routes.timetable.Lease", lambda name: Lease(name, session_factory=self.sessions)):
+            asyncio.run(update_timetable(tasks, UpdateTimeTable(force_update=True), db=self.db, current_user=admin))
+            task, = tasks.tasks
+            self.assertIs(task.func, background_refresh)
+            self.addCleanup(task.args[1].release)
+
+            with self.assertRaises(HTTPException) as error:
+                asyncio.run(update_timetable(BackgroundTasks(), UpdateTimeTable(force_update=False), db=self.db,
+                                             current_user=admin))
+        self.assertEqual(error.exception.status_code, 409)
+        self.assertEqual(error.exception.detail["owner"], task.args[1].owner)
+
+    def test_background_refresh_uses_its_own_session(self):
+        lease = MagicMock()
+        with patch("routes.timetable.SessionLocal", self.sessions), \
+                patch("routes.timetable.update_timetable_task") as task:
+            background_refresh(True, lease)
+
+        db, force, passed_lease = task.call_args.args
+        self.assertIsNot(db, self.db)
+        self.assertEqual((force, passed_lease), (True, lease))
@@ -0,0 +1,114 @@
+import asyncio
+import json
+from datetime import date, datetime
+from typing import List
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from dependencies import convert_daily_menu_to_schema
+from fast_json import dumps
+from models import PostDB, CommentDB, EventDB, GalleryImageDB, DailyMenuDB, DishDB, DishCategoryDB
+from pagination import NEXT_CURSOR_HEADER
+from routes.events import AfishaEvent, get_afisha_events
+from routes.menu import read_daily_menus
+from routes.posts import convert_post_db_to_schema, post_query, read_post_summaries, read_posts
+from schemas import DailyMenu, Post, PostSummary
+from tests import DatabaseTestCase
+
+
+class Test(DatabaseTestCase):
+    """Быстрый путь списков отдает то же, что дала бы валидация через response_model."""
+
+    def setUp(self):
+        super().setUp()
+        users = self.make_users(3)
+        for i in range(4):
+            post = PostDB(title=f"Пост «{i}»", content="Текст " * (i * 30), author_id=users[i % 3].id,
+                          category="Полезное", like_count=i, comment_count=2)
+            post.likes = users[:i % 3]
+            post.comments = [
+                CommentDB(content="Комментарий", author_id=users[1].id),
+                # Комментарий без автора
+                CommentDB(content="Аноним", author_id=None, updated_at=datetime(2024, 9, 2, 12, 30)),
+            ]
+            self.db.add(post)
+        # Автор удален
+        self.db.add(PostDB(title="Сирота", content="", author_id=99))
+
+        category = DishCategoryDB(name="Супы")
+        dishes = [DishDB(name=f"Блюдо {i}", price=100, category=category) for i in range(3)]
+        self.db.add_all([
+            DailyMenuDB(date=date(2024, 9, 1), price=250.0, dishes=dishes[:2]),
+            DailyMenuDB(date=date(2024, 9, 2), price=300, dishes=[]),
+            # Дробная цена из старых данных: схема принимает только целые рубли
+            DailyMenuDB(date=date(2024, 9, 3), price=150.5, dishes=[]),
+        ])
+
+        for location in ("Здравница", "Стадион Универсиады", "Корпус 1"):
+            self.db.add(EventDB(title=location, description="Описание " * 40, location=location,
+                                start_date=datetime(2024, 10, 1, 18), end_date=datetime(2024, 10, 1, 21),
+                                max_participants=10))
+        self.db.flush()
+        self.db.add_all([
+            GalleryImageDB(event_id=2, image_url="/static/second.png"),
+            GalleryImageDB(event_id=1, image_url="/static/first.png"),
+            GalleryImageDB(event_id=1, image_url="/static/other.png"),
+        ])
+        self.db.commit()
+        self.db.expunge_all()
+
+    def _validated(self, model, items) -> list:
+        adapter = TypeAdapter(List[model])
+        return adapter.dump_python(adapter.validate_python(items), mode="json")
+
+    def test_posts_match_schema_path(self):
+        for include_likes in (False, True):
+            response = asyncio.run(read_posts(Response(), skip=0, limit=10, category=None, cursor=None,
+                                              include_likes=include_likes, db=self.db))
+            posts = post_query(db=self.db, include_likes=include_likes).order_by(PostDB.id.desc()).all()
+            expected = [convert_post_db_to_schema(post, include_likes).model_dump(mode="json") for post in posts]
+
+            self.assertEqual(json.loads(response.body), expected)
+            self.assertEqual(self._validated(Post, json.loads(response.body)), expected)
+
+    def test_summaries_match_schema(self):
+        response = asyncio.run(read_post_summaries(Response(), skip=0, limit=10, category=None, cursor=None,
+                                                   db=self.db))
+        summaries = json.loads(response.body)
+        self.assertEqual(self._validated(PostSummary, summaries), summaries)
+        self.assertTrue(summaries[1]["excerpt"].endswith("..."))
+
+    def test_menus_match_schema_path(self):
+        response = asyncio.run(read_daily_menus(Response(), skip=0, limit=10, cursor=None, db=self.db))
+        menus = self.db.query(DailyMenuDB).order_by(DailyMenuDB.id.desc()).all()
+        expected = self._validated(DailyMenu, [convert_daily_menu_to_schema(menu) for menu in menus])
+
+        self.assertEqual(json.loads(response.body), expected)
+        self.assertEqual(len(expected[2]["dishes"]), 2)
+        self.assertEqual([menu["price"] for menu in expected], [151, 300, 250])
+
+    def test_afisha_matches_schema(self):
+        with self.count_queries() as statements:
+            response = asyncio.run(get_afisha_events(Response(), skip=0, limit=10, cursor=None, db=self.db))
+        events = json.loads(response.body)
+
+        # Страница и одна выборка картинок, сколько бы ни было мероприятий
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(self._validated(AfishaEvent, events), events)
+        self.assertEqual([item["image"] for item in events], ["/event1.png", "/static/second.png", "/static/first.png"])
+        self.assertEqual([item["tag"] for item in events], ["#Мероприятие", "#Универсиада", "#Университетская жизнь"])
+        self.assertEqual(events[0]["start_date"], "2024-10-01T18:00:00")
+
+    def test_cursor_header_is_kept(self):
+        response = asyncio.run(read_posts(Response(), skip=0, limit=2, category=None, cursor=None, db=self.db))
+        cursor = response.headers[NEXT_CURSOR_HEADER]
+        self.assertEqual(response.headers["content-type"], "application/json")
+
+        response = asyncio.run(read_posts(Response(), skip=0, limit=2, category=None, cursor=cursor, db=self.db))
+        self.assertEqual([post["id"] for post in json.loads(response.body)], [3, 2])
+
+    def test_dumps_formats_like_pydantic(self):
+        value = {"at": datetime(2024, 9, 1, 8, 5, 3, 120), "day": date(2024, 9, 1), "text": "ё"}
+        self.assertEqual(json.loads(dumps(value)), {"at": "2024-09-01T08:05:03.000120", "day": "2024-09-01",
+                                                    "text": "ё"})
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Response
+
+from models import NewsDB
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from routes.news import read_news
+from tests import DatabaseTestCase
+
+
+class Test(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # Пары новостей с одинаковым created_at: порядок должен держаться на id
+        start = datetime(2024, 9, 1, 12, 0)
+        self.db.add_all([
+            NewsDB(title=f"Новость {i}", content="Текст", created_at=start + timedelta(minutes=i // 2))
+            for i in range(7)
+        ])
+        self.db.commit()
+
+    def _page(self, limit: int, cursor=None, skip: int = 0):
+        response = Response()
+        news = asyncio.run(read_news(response, skip=skip, limit=limit, cursor=cursor, db=self.db))
+        return [item.id for item in news], response.headers.get(NEXT_CURSOR_HEADER)
+
+    def test_cursor_walks_all_rows_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            ids, cursor = self._page(3, cursor)
+            seen.extend(ids)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [7, 6, 5, 4, 3, 2, 1])
+
+    def test_insert_between_pages_does_not_shift_cursor(self):
+        first, cursor = self._page(3)
+        self.db.add(NewsDB(title="Свежая", content="Текст", created_at=datetime(2024, 9, 2)))
+        self.db.commit()
+        second, _ = self._page(3, cursor)
+
+        self.assertEqual(first, [7, 6, 5])
+        self.assertEqual(second, [4, 3, 2])
+
+    def test_offset_is_kept_for_compatibility(self):
+        ids, cursor = self._page(2, skip=2)
+        self.assertEqual(ids, [5, 4])
+        self.assertIsNotNone(cursor)
+
+    def test_cursor_roundtrip_and_bad_cursor(self):
+        stamp = datetime(2024, 9, 1, 12, 30, 15, 123)
+        self.assertEqual(decode_cursor(encode_cursor(stamp, 42)), (stamp, 42))
+        with self.assertRaises(HTTPException) as error:
+            decode_cursor("не-курсор")
+        self.assertEqual(error.exception.status_code, 400)
@@ -0,0 +1,46 @@
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi import Response
+
+from models import PostDB, CommentDB
+from pagination import NEXT_CURSOR_HEADER
+from routes.posts import read_comments, read_post_summaries
+from tests import DatabaseTestCase
+
+
+class Test(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_user()
+        post = PostDB(title="Пост", content="Текст " * 100, author_id=1, comment_count=5)
+        # Одинаковое время у всех комментариев: порядок держится на id
+        post.comments = [
+            CommentDB(content=f"Комментарий {i}", author_id=1, created_at=datetime(2024, 9, 1))
+            for i in range(5)
+        ]
+        self.db.add(post)
+        self.db.commit()
+
+    def test_comments_are_paged_oldest_first(self):
+        seen, cursor = [], None
+        while True:
+            response = Response()
+            comments = asyncio.run(read_comments(1, response, skip=0, limit=2, cursor=cursor, db=self.db))
+            seen.extend(comment.content for comment in comments)
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [f"Комментарий {i}" for i in range(5)])
+
+    def test_summary_has_no_comments(self):
+        with self.count_queries() as statements:
+            response = asyncio.run(read_post_summaries(Response(), skip=0, limit=10, category=None, cursor=None,
+                                                       db=self.db))
+        summary, = json.loads(response.body)
+        self.assertEqual(summary["comment_count"], 5)
+        self.assertTrue(summary["excerpt"].endswith("..."))
+        self.assertEqual(summary["author"]["username"], "user")
+        self.assertNotIn("comments", summary)
+        self.assertEqual(len(statements), 1)
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+from fastapi import HTTPException, Response
+
+from models import PostDB
+from post_counters import reconcile_post_counters
+from routes.comments import delete_comment
+from routes.posts import create_comment, like_post, read_likes_status, read_posts, unlike_post
+from schemas import CommentBase, PostLikesStatusRequest
+from tests import DatabaseTestCase
+
+
+class Test(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.users = self.make_users(3)
+        self.db.add(PostDB(title="Пост", content="Текст", author_id=1))
+        self.db.commit()
+
+    def _counts(self):
+        post = self.db.query(PostDB).get(1)
+        self.db.refresh(post)
+        return post.like_count, post.comment_count
+
+    def test_counters_follow_likes_and_comments(self):
+        for user in self.users:
+            asyncio.run(like_post(1, current_user=user, db=self.db))
+        asyncio.run(unlike_post(1, current_user=self.users[0], db=self.db))
+        comment = asyncio.run(create_comment(1, CommentBase(content="Привет"), current_user=self.users[1], db=self.db))
+        asyncio.run(create_comment(1, CommentBase(content="Еще"), current_user=self.users[2], db=self.db))
+        asyncio.run(delete_comment(comment.id, current_user=self.users[1], db=self.db))
+
+        self.assertEqual(self._counts(), (2, 1))
+
+    def test_like_and_unlike_are_idempotent(self):
+        first = asyncio.run(like_post(1, current_user=self.users[0], db=self.db))
+        again = asyncio.run(like_post(1, current_user=self.users[0], db=self.db))
+        self.assertEqual((first.liked, first.like_count), (True, 1))
+        self.assertEqual((again.liked, again.like_count), (True, 1))
+
+        asyncio.run(unlike_post(1, current_user=self.users[0], db=self.db))
+        state = asyncio.run(unlike_post(1, current_user=self.users[0], db=self.db))
+        self.assertEqual((state.liked, state.like_count), (False, 0))
+
+    def test_likes_status_batch(self):
+        self.db.add(PostDB(title="Второй", content="Текст", author_id=1))
+        self.db.commit()
+        asyncio.run(like_post(2, current_user=self.users[1], db=self.db))
+        asyncio.run(like_post(1, current_user=self.users[2], db=self.db))
+
+        status = asyncio.run(read_likes_status(
+            PostLikesStatusRequest(post_ids=[1, 2, 3, 2]), current_user=self.users[1], db=self.db
+        ))
+        self.assertEqual(status.liked, [2])
+
+    def test_like_missing_post(self):
+        with self.assertRaises(HTTPException) as error:
+            asyncio.run(like_post(99, current_user=self.users[0], db=self.db))
+        self.assertEqual(error.exception.status_code, 404)
+
+    def test_reconcile_repairs_drift(self):
+        asyncio.run(like_post(1, current_user=self.users[0], db=self.db))
+        self.db.query(PostDB).update({PostDB.like_count: 7, PostDB.comment_count: 3})
+        self.db.commit()
+
+        self.assertEqual(reconcile_post_counters(self.db), 1)
+        self.assertEqual(self._counts(), (1, 0))
+        self.assertEqual(reconcile_post_counters(self.db), 0)
+
+    def test_feed_returns_counts_without_likers_by_default(self):
+        asyncio.run(like_post(1, current_user=self.users[0], db=self.db))
+
+        response = asyncio.run(read_posts(Response(), skip=0, limit=10, category=None, cursor=None, db=self.db))
+        post, = json.loads(response.body)
+        self.assertEqual(post["like_count"], 1)
+        self.assertIsNone(post["likes"])
+
+        response = asyncio.run(read_posts(Response(), skip=0, limit=10, category=None, cursor=None,
+                                          include_likes=True, db=self.db))
+        post, = json.loads(response.body)
+        self.assertEqual(post["likes"], [1])
@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+from fastapi import Response
+
+from models import UserDB, PostDB, CommentDB
+from routes.posts import read_posts, read_post
+from tests import DatabaseTestCase
+
+
+class Test(DatabaseTestCase):
+    def _seed(self, posts: int):
+        users = self.db.query(UserDB).all()
+        if not users:
+            users = self.make_users(5)
+        for i in range(posts):
+            post = PostDB(title=f"Пост {i}", content="Текст", author_id=users[i % 5].id)
+            post.likes = users[:i % 5]
+            post.comments = [
+                CommentDB(content="Комментарий", author_id=users[(i + j) % 5].id) for j in range(3)
+            ]
+            self.db.add(post)
+        self.db.commit()
+        self.db.expunge_all()
+
+    def _list_queries(self) -> int:
+        with self.count_queries() as statements:
+            response = asyncio.run(read_posts(Response(), skip=0, limit=100, category=None, cursor=None, db=self.db))
+        self.db.expunge_all()
+        posts = json.loads(response.body)
+        self.assertTrue(all(comment["author"] for post in posts for comment in post["comments"]))
+        return len(statements)
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        self._seed(5)
+        small_page = self._list_queries()
+        self._seed(40)
+        large_page = self._list_queries()
+
+        self.assertEqual(small_page, large_page)
+        self.assertLessEqual(large_page, 3)
+
+    def test_detail_query_count(self):
+        self._seed(3)
+        with self.count_queries() as statements:
+            post = asyncio.run(read_post(post_id=2, db=self.db))
+
+        self.assertEqual(len(post.comments), 3)
+        self.assertLessEqual(len(statements), 3)
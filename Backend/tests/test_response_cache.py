@@ -0,0 +1,103 @@
+from unittest import TestCase
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from response_cache import CACHE_HEADER, ResponseCache, match_rule, response_cache, response_cache_middleware
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestResponseCache(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResponseCache(max_entries=2, ttl=10, clock=self.clock)
+
+    def _put(self, key, tag="news"):
+        return self.cache.put((key,), tag, key.encode(), {}, self.cache.generation(tag))
+
+    def test_ttl_and_lru_bound(self):
+        self._put("a")
+        self._put("b")
+        self.assertIsNotNone(self.cache.get(("a",), "news"))
+        self._put("c")  # вытесняет "b": "a" только что читали
+        self.assertIsNone(self.cache.get(("b",), "news"))
+        self.clock.now = 11
+        self.assertIsNone(self.cache.get(("a",), "news"))
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertEqual(stats["tags"]["news"]["evictions"], 1)
+        self.assertEqual(stats["tags"]["news"]["expired"], 1)
+
+    def test_dish_category_write_invalidates_menu(self):
+        self.assertEqual(match_rule("/dish_category/1").invalidates, ("dish_category", "dish", "menu"))
+        self.assertIn("menu", match_rule("/dish/1").invalidates)
+
+    def test_invalidation_is_per_tag_and_blocks_stale_puts(self):
+        self._put("a", "news")
+        self._put("b", "menu")
+        stale_generation = self.cache.generation("news")
+        self.assertEqual(self.cache.invalidate(["news"]), 1)
+
+        self.assertIsNone(self.cache.get(("a",), "news"))
+        self.assertIsNotNone(self.cache.get(("b",), "menu"))
+        # Ответ, построенный до сброса, в кэш не попадает
+        self.assertFalse(self.cache.put(("a",), "news", b"old", {}, stale_generation))
+
+
+class TestMiddleware(TestCase):
+    def setUp(self):
+        self.calls = 0
+        app = FastAPI()
+        app.middleware("http")(response_cache_middleware)
+
+        @app.get("/news")
+        def read_news(skip: int = 0):
+            self.calls += 1
+            return [{"skip": skip, "calls": self.calls}]
+
+        @app.post("/news")
+        def create_news():
+            return {"ok": True}
+
+        @app.get("/events/{event_id}")
+        def read_event(event_id: int):
+            self.calls += 1
+            return {"id": event_id}
+
+        response_cache.clear()
+        self.client = TestClient(app)
+
+    def test_hit_miss_and_invalidation(self):
+        first = self.client.get("/news")
+        second = self.client.get("/news")
+        self.assertEqual((first.headers[CACHE_HEADER], second.headers[CACHE_HEADER]), ("MISS", "HIT"))
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(self.client.get("/news", params={"skip": 1}).headers[CACHE_HEADER], "MISS")
+
+        self.client.post("/news")
+        self.assertEqual(self.client.get("/news").headers[CACHE_HEADER], "MISS")
+        self.assertEqual(self.calls, 3)
+
+    def test_user_specific_routes_are_not_cached(self):
+        self.client.get("/events/1")
+        response = self.client.get("/events/1")
+        self.assertNotIn(CACHE_HEADER, response.headers)
+        self.assertEqual(self.calls, 2)
+
+    def test_switch_disables_cache(self):
+        response_cache.enabled = False
+        try:
+            self.client.get("/news")
+            response = self.client.get("/news")
+        finally:
+            response_cache.enabled = True
+        self.assertNotIn(CACHE_HEADER, response.headers)
+        self.assertEqual(self.calls, 2)
@@ -0,0 +1,94 @@
+import asyncio
+import gzip
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from routes.timetable import get_bundles_manifest
+from tests import TimetableTestCase, timetable_lesson
+from timetable_bundles import group_bundle_payload, write_group_bundles
+from timetable_index import get_timetable_index
+
+LESSONS = [
+    timetable_lesson("Механика", 0, 1, "9:00", "10:35", ["Иванов И. И."], ["5-18"], ["101"]),
+    timetable_lesson("Оптика", 0, 2, "10:50", "12:25", ["Петров С. С."], ["5-19"], ["102"]),
+]
+
+
+class Test(TimetableTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.bundle_dir = Path(self.directory.name)
+        patcher = patch("timetable_bundles.BUNDLE_DIR", self.bundle_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+
+    def _refresh(self, lessons) -> dict:
+        self.save_timetable(lessons)
+        return write_group_bundles(get_timetable_index(self.db))
+
+    def _by_number(self, manifest: dict) -> dict:
+        return {entry["number"]: entry for entry in manifest["groups"].values()}
+
+    def _files(self):
+        return sorted(path.name for path in self.bundle_dir.iterdir())
+
+    def test_bundles_and_manifest(self):
+        manifest = self._refresh(LESSONS)
+        index = get_timetable_index(self.db)
+        self.assertEqual(manifest["version"], index.version)
+        self.assertEqual(sorted(manifest["groups"]), sorted(str(group_id) for group_id in index.groups.ids))
+
+        entry = self._by_number(manifest)["101"]
+        name = entry["url"].rsplit("/", 1)[-1]
+        self.assertEqual(entry["url"], f"/static/timetable/group-{entry['hash']}.json")
+        payload = (self.bundle_dir / name).read_bytes()
+        self.assertEqual(gzip.decompress((self.bundle_dir / (name + ".gz")).read_bytes()), payload)
+
+        bundle = json.loads(payload)
+        self.assertEqual(bundle["group"], {"number": "101", "name": "Группа 101"})
+        self.assertEqual([lesson["subject"] for lesson in bundle["lessons"]], ["Механика"])
+        self.assertNotIn("id", bundle["lessons"][0])
+
+        self.assertEqual(json.loads((self.bundle_dir / "manifest.json").read_bytes()), manifest)
+
+    def test_unchanged_group_keeps_its_file(self):
+        first = self._by_number(self._refresh(LESSONS))
+        # Группы и пары пересоздаются с новыми id, а меняется только 102
+        changed = [LESSONS[0], timetable_lesson("Оптика", 0, 3, "12:55", "14:30", ["Петров С. С."], ["5-19"], ["102"])]
+        second = self._by_number(self._refresh(changed))
+
+        self.assertEqual(second["101"]["url"], first["101"]["url"])
+        self.assertNotEqual(second["102"]["url"], first["102"]["url"])
+
+    def test_previous_files_live_one_more_refresh(self):
+        old = self._by_number(self._refresh(LESSONS))["102"]["url"].rsplit("/", 1)[-1]
+        self._refresh(LESSONS[:1])
+        self.assertIn(old, self._files())
+        self._refresh(LESSONS[:1])
+        self.assertNotIn(old, self._files())
+        self.assertFalse(any(name.endswith(".tmp") for name in self._files()))
+
+    def test_payload_does_not_depend_on_ids(self):
+        self._refresh(LESSONS)
+        index = get_timetable_index(self.db)
+        payload = group_bundle_payload(index, index.groups.ids[0])
+        self.save_timetable(list(reversed(LESSONS)))
+        index = get_timetable_index(self.db)
+        group_id = next(group_id for group_id, group in zip(index.groups.ids, index.groups.values)
+                        if group["number"] == "101")
+        self.assertEqual(group_bundle_payload(index, group_id), payload)
+
+    def test_manifest_endpoint(self):
+        with self.assertRaises(HTTPException) as error:
+            asyncio.run(get_bundles_manifest())
+        self.assertEqual(error.exception.status_code, 404)
+
+        self._refresh(LESSONS)
+        response = asyncio.run(get_bundles_manifest())
+        self.assertEqual(response.headers["cache-control"], "no-cache")
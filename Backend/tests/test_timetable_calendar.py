@@ -0,0 +1,109 @@
+import asyncio
+from datetime import date
+
+from fastapi import HTTPException
+
+from routes.timetable import (
+    create_user_calendar_token, get_group_calendar, get_group_occurrences, get_user_calendar, revoke_user_calendar_token
+)
+from tests import TimetableTestCase, make_request, timetable_lesson
+from timetable_calendar import _fold, group_calendar_stream, iter_calendar, iter_occurrences
+from timetable_index import get_timetable_index
+
+
+class Test(TimetableTestCase):
+    def setUp(self):
+        super().setUp()
+        self.save_timetable([
+            timetable_lesson("Механика", 0, 1, "9:00", "10:35", ["Иванов И. И."], ["5-18"], ["101"], even=False),
+            timetable_lesson("Оптика", 0, 2, "10:50", "12:25", ["Петров С. С."], ["5-19"], ["101"], odd=False),
+            timetable_lesson("Физика; лаб, 1", 1, 1, "9:00", "10:35", [], ["Ауд. Ю"], ["101"]),
+        ])
+        self.index = get_timetable_index(self.db)
+        self.group_id = self.index.groups.ids[0]
+        self.lessons = self.index.group_schedule(self.group_id)
+
+    def _events(self, text: str):
+        return text.split("BEGIN:VEVENT")[1:]
+
+    def test_occurrences_follow_week_parity(self):
+        # 2 сентября 2024 — понедельник 36-й (нижней) недели, 9 сентября — 37-й (верхней)
+        occurrences = list(iter_occurrences(self.lessons, date(2024, 9, 2), date(2024, 9, 10)))
+        self.assertEqual([(item["date"], item["subject"]) for item in occurrences], [
+            ("02.09.2024", "Механика"),
+            ("03.09.2024", "Физика; лаб, 1"),
+            ("09.09.2024", "Оптика"),
+            ("10.09.2024", "Физика; лаб, 1"),
+        ])
+
+    def test_occurrences_range_is_validated(self):
+        for date_from, date_to in ((date(2024, 9, 10), date(2024, 9, 2)), (date(2024, 1, 1), date(2025, 1, 1))):
+            with self.assertRaises(HTTPException) as error:
+                asyncio.run(get_group_occurrences(make_request(), self.group_id, date_from, date_to, db=self.db))
+            self.assertEqual(error.exception.status_code, 400)
+
+    def test_one_recurring_event_per_lesson(self):
+        text = "".join(iter_calendar(self.lessons, "Расписание 101", date(2024, 9, 2), date(2024, 12, 29)))
+        events = self._events(text)
+
+        self.assertEqual(len(events), 3)
+        self.assertIn("DTSTART;TZID=Europe/Moscow:20240902T090000", events[0])
+        self.assertIn("RRULE:FREQ=WEEKLY;INTERVAL=2;UNTIL=20241229T235959Z", events[0])
+        self.assertIn("DTSTART;TZID=Europe/Moscow:20240909T105000", events[1])
+        self.assertIn("RRULE:FREQ=WEEKLY;INTERVAL=1;", events[2])
+        self.assertIn("SUMMARY:Физика\\; лаб\\, 1", events[2])
+        self.assertNotIn("DESCRIPTION", events[2])
+        self.assertTrue(text.startswith("BEGIN:VCALENDAR\r\n") and text.endswith("END:VCALENDAR\r\n"))
+
+    def test_events_are_split_at_iso_year_boundary(self):
+        # 30 декабря 2024 начинается 1-я неделя 2025 года: чередование недель сбивается
+        events = self._events("".join(iter_calendar(self.lessons[:1], "", date(2024, 12, 16), date(2025, 1, 20))))
+
+        self.assertEqual(len(events), 2)
+        self.assertIn("UNTIL=20241229T235959Z", events[0])
+        self.assertIn("DTSTART;TZID=Europe/Moscow:20250106T090000", events[1])
+        uids = [line for event in events for line in event.split("\r\n") if line.startswith("UID:")]
+        self.assertEqual(uids, [f"UID:lesson-{self.lessons[0]['key']}-{year}@idearelease" for year in (2024, 2025)])
+
+    def test_long_lines_are_folded(self):
+        folded = _fold("SUMMARY:" + "Квантовая механика " * 10)
+        self.assertTrue(all(len(line.encode("utf-8")) <= 75 for line in folded.split("\r\n")))
+        self.assertEqual(folded.replace("\r\n ", ""), "SUMMARY:" + "Квантовая механика " * 10 + "\r\n")
+
+    def test_calendar_etag(self):
+        response = asyncio.run(get_group_calendar(make_request(), self.group_id, date(2024, 9, 2), date(2024, 12, 29),
+                                                  db=self.db))
+        etag = response.headers["etag"]
+        self.assertTrue(etag.startswith(f'"{self.index.version}-'))
+        self.assertEqual(response.media_type, "text/calendar; charset=utf-8")
+
+        response = asyncio.run(get_group_calendar(make_request(headers={"If-None-Match": etag}), self.group_id,
+                                                  date(2024, 9, 2), date(2024, 12, 29), db=self.db))
+        self.assertEqual(response.status_code, 304)
+
+    def test_stream_is_cached_by_version(self):
+        args = (self.index, self.group_id, date(2024, 9, 2), date(2024, 9, 30))
+        first = b"".join(group_calendar_stream(*args))
+        self.assertEqual(b"".join(group_calendar_stream(*args)), first)
+        self.assertIn("X-WR-CALNAME:Расписание 101".encode(), first)
+
+    def _user_calendar(self, token: str):
+        return asyncio.run(get_user_calendar(make_request(), token, date(2024, 9, 2), date(2024, 9, 30), db=self.db))
+
+    def test_user_feed_token_resolves_to_selected_group(self):
+        user = self.make_user(selected_group_id=self.group_id)
+        issued = asyncio.run(create_user_calendar_token(db=self.db, current_user=user))
+        self.assertEqual(issued["url"], f"/timetable/user/{issued['token']}/calendar.ics")
+        self.assertGreaterEqual(len(issued["token"]), 32)
+
+        response = self._user_calendar(issued["token"])
+        self.assertEqual(response.headers["content-disposition"], f'inline; filename="group-{self.group_id}.ics"')
+
+        # Новая ссылка заменяет старую, отзыв отключает ленту
+        reissued = asyncio.run(create_user_calendar_token(db=self.db, current_user=user))
+        self.assertNotEqual(reissued["token"], issued["token"])
+        asyncio.run(revoke_user_calendar_token(db=self.db, current_user=user))
+        for token in (issued["token"], reissued["token"]):
+            with self.assertRaises(HTTPException) as error:
+                self._user_calendar(token)
+            self.assertEqual(error.exception.status_code, 404)
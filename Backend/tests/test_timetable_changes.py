@@ -0,0 +1,88 @@
+import asyncio
+from unittest.mock import patch
+
+from routes.timetable import get_timetable_changes
+from tests import TimetableTestCase, timetable_lesson
+from timetable_changes import collect_changes, record_timetable_changes
+from timetable_index import build_timetable_index, get_timetable_index
+
+MECHANICS = timetable_lesson("Механика", 0, 1, "9:00", "10:35", ["Иванов И. И."], ["5-18"], ["101"])
+OPTICS = timetable_lesson("Оптика", 0, 2, "10:50", "12:25", ["Петров С. С."], ["5-19"], ["101", "102"])
+CHEMISTRY = timetable_lesson("Химия", 1, 1, "9:00", "10:35", ["Сидоров А. А."], ["5-18"], ["102"])
+
+
+class Test(TimetableTestCase):
+    def _apply(self, lessons):
+        """Как в обновлении: прошлое расписание берется из базы до замены."""
+        previous = build_timetable_index(self.db)
+        self.save_timetable(lessons)
+        return record_timetable_changes(self.db, previous, get_timetable_index(self.db))
+
+    def _subjects(self, delta: dict):
+        return sorted(lesson["subject"] for lesson in delta["added"])
+
+    def test_first_version_adds_everything(self):
+        version = self._apply([MECHANICS, OPTICS, CHEMISTRY])
+        self.assertEqual((version.id, version.lessons_added, version.lessons_removed), (1, 4, 0))
+        self.assertEqual(self._subjects(collect_changes(self.db, 0, "101")), ["Механика", "Оптика"])
+
+    def test_unchanged_refresh_creates_no_version(self):
+        self._apply([MECHANICS, OPTICS])
+        self.assertIsNone(self._apply([OPTICS, MECHANICS]))
+        self.assertEqual(collect_changes(self.db, 1, "101")["version"], 1)
+
+    def test_changes_are_per_group(self):
+        self._apply([MECHANICS, OPTICS, CHEMISTRY])
+        moved = dict(MECHANICS, place=["5-19"])
+        version = self._apply([moved, OPTICS, CHEMISTRY])
+        self.assertEqual((version.lessons_added, version.lessons_removed), (1, 1))
+
+        delta = collect_changes(self.db, 1, "101")
+        current_keys = build_timetable_index(self.db).keys
+        self.assertEqual((delta["version"], delta["full_resync"]), (2, False))
+        self.assertEqual(self._subjects(delta), ["Механика"])
+        self.assertEqual(delta["added"][0]["places"], ["5-19"])
+        self.assertEqual(len(delta["removed"]), 1)
+        self.assertNotIn(delta["removed"][0], current_keys)
+        self.assertEqual(collect_changes(self.db, 1, "102"), {
+            "version": 2, "since": 1, "full_resync": False, "added": [], "removed": []
+        })
+
+    def test_changes_cancel_out_across_versions(self):
+        self._apply([MECHANICS])
+        self._apply([MECHANICS, CHEMISTRY])
+        self._apply([MECHANICS])
+        delta = collect_changes(self.db, 1, "102")
+        self.assertEqual((delta["added"], delta["removed"]), ([], []))
+
+        self._apply([])
+        self._apply([MECHANICS])
+        delta = collect_changes(self.db, 3, "101")
+        self.assertEqual((delta["added"], delta["removed"]), ([], []))
+
+    def test_duplicate_lessons_are_counted(self):
+        self._apply([MECHANICS, MECHANICS])
+        self.assertEqual(len(collect_changes(self.db, 0, "101")["added"]), 2)
+
+        version = self._apply([MECHANICS])
+        self.assertEqual((version.lessons_added, version.lessons_removed), (0, 1))
+        delta = collect_changes(self.db, 1, "101")
+        self.assertEqual((delta["added"], len(delta["removed"])), ([], 1))
+
+    def test_full_resync(self):
+        with patch("timetable_changes.CHANGE_FEED_RETENTION", 2):
+            self._apply([MECHANICS])
+            self._apply([MECHANICS, OPTICS])
+            self._apply([OPTICS])
+            self._apply([CHEMISTRY])
+
+        self.assertTrue(collect_changes(self.db, 1, "101")["full_resync"])
+        self.assertFalse(collect_changes(self.db, 2, "101")["full_resync"])
+        self.assertTrue(collect_changes(self.db, 5, "101")["full_resync"])
+
+    def test_endpoint(self):
+        self._apply([MECHANICS, OPTICS])
+        group_id = get_timetable_index(self.db).groups.ids[0]
+        result = asyncio.run(get_timetable_changes(since=0, group_id=group_id, db=self.db))
+        self.assertEqual((result["group_id"], result["version"]), (group_id, 1))
+        self.assertEqual(self._subjects(result), ["Механика", "Оптика"])
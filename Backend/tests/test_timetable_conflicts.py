@@ -0,0 +1,68 @@
+import asyncio
+
+import pandas as pd
+
+from routes.timetable import analyze_parsed_data, get_timetable_conflicts
+from tests import TimetableTestCase, timetable_lesson
+from timetable_conflicts import detect_conflicts, parsed_lessons
+
+
+def lesson(subject, teachers, places, groups, number=1, odd_week=True, even_week=True) -> dict:
+    return {"subject": subject, "teachers": teachers, "places": places, "groups": groups,
+            "weekday": 0, "number": number, "odd_week": odd_week, "even_week": even_week}
+
+
+class Test(TimetableTestCase):
+    def test_teacher_double_booking(self):
+        conflicts = detect_conflicts([
+            lesson("Механика", ["Иванов И. И."], ["5-18"], ["101"]),
+            lesson("Оптика", ["Иванов И. И."], ["5-19"], ["102"]),
+        ])
+        self.assertEqual([(item["kind"], item["name"], item["parity"]) for item in conflicts],
+                         [("teacher", "Иванов И. И.", "even"), ("teacher", "Иванов И. И.", "odd")])
+        self.assertEqual(conflicts[0]["lessons"], [
+            {"subject": "Механика", "places": ["5-18"], "groups": ["101"]},
+            {"subject": "Оптика", "places": ["5-19"], "groups": ["102"]},
+        ])
+        self.assertEqual(conflicts[0]["weekday_name"], "Понедельник")
+
+    def test_stream_is_not_a_conflict(self):
+        self.assertEqual(detect_conflicts([
+            lesson("Механика", ["Иванов И. И."], ["Ауд. Ю"], ["101"]),
+            lesson("Механика", ["Иванов И. И."], ["Ауд. Ю"], ["102"]),
+            lesson("Механика", ["Иванов И. И."], ["Ауд. Ю"], ["101"], number=2),
+        ]), [])
+
+    def test_week_parity(self):
+        self.assertEqual(detect_conflicts([
+            lesson("Механика", [], ["5-18"], ["101"], even_week=False),
+            lesson("Оптика", [], ["5-18"], ["102"], odd_week=False),
+        ]), [])
+
+        conflicts = detect_conflicts([
+            lesson("Механика", ["Иванов И. И."], ["5-18"], ["101"]),
+            lesson("Оптика", ["Петров С. С."], ["5-18"], ["102"], odd_week=False),
+        ])
+        self.assertEqual([(item["kind"], item["name"], item["parity"]) for item in conflicts],
+                         [("place", "5-18", "even")])
+
+    def test_parsed_lessons(self):
+        frame = pd.DataFrame([{
+            "subject": "Механика", "teacher": ["Иванов И. И.", ""], "place": ["5-18"],
+            "group": [("101", "Группа 101"), "102"], "weekday": 0, "num": 1, "odd": True, "even": False,
+        }])
+        self.assertEqual(list(parsed_lessons(frame)), [
+            lesson("Механика", ["Иванов И. И."], ["5-18"], ["101", "102"], even_week=False)
+        ])
+
+    def test_refresh_report_and_endpoint(self):
+        lessons = [
+            timetable_lesson("Механика", 0, 1, "9:00", "10:35", ["Иванов И. И."], ["5-18"], ["101"]),
+            timetable_lesson("Оптика", 0, 1, "9:00", "10:35", ["Петров С. С."], ["5-18"], ["102"]),
+        ]
+        report = analyze_parsed_data(pd.DataFrame(lessons), ["5-18"], [("101", ""), ("102", "")],
+                                     ["Иванов И. И.", "Петров С. С."], ["Механика", "Оптика"])
+        self.assertEqual(len(report["conflicts"]), 2)
+
+        self.save_timetable(lessons)
+        self.assertEqual(asyncio.run(get_timetable_conflicts(db=self.db)), report["conflicts"])
@@ -0,0 +1,86 @@
+import pandas as pd
+
+from routes.timetable import clear_timetable_data, save_data_to_db
+from tests import TimetableTestCase, timetable_lesson
+from timetable_index import (
+    InternTable, MultiColumn, Snapshot, build_timetable_index, bump_generation, current_generation,
+    get_timetable_index,
+)
+
+LESSONS = [
+    timetable_lesson("Оптика", 0, 2, "10:50", "12:25", ["Петров С. С."], ["5-19"], ["101"], odd=False),
+    timetable_lesson("Механика", 0, 1, "9:00", "10:35", ["Иванов И. И.", "Петров С. С."], ["5-18"], ["101", "102"]),
+    timetable_lesson("Анализ", 1, 1, "9:00", "10:35", ["Сидоров А. А."], ["5-18"], ["101"], even=False),
+]
+
+
+class Test(TimetableTestCase):
+    def setUp(self):
+        super().setUp()
+        self.save_timetable(LESSONS)
+        self.index = get_timetable_index(self.db)
+        self.group_id = self.index.groups.ids[0]
+
+    def test_intern_table_and_multi_column(self):
+        table = InternTable()
+        self.assertEqual([table.add(10, "a"), table.add(7, "b")], [0, 1])
+        self.assertEqual((table.get(7), table.get(8, "-"), 10 in table, len(table)), ("b", "-", True, 2))
+
+        column = MultiColumn()
+        column.append([1, 2])
+        column.append([])
+        column.append([0])
+        self.assertEqual([list(column.row(i)) for i in range(3)], [[1, 2], [], [0]])
+
+    def test_strings_are_interned(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(sorted(self.index.times), ["10:35", "10:50", "12:25", "9:00"])
+        self.assertEqual(len(self.index.teachers), 3)
+
+    def test_lesson_rows(self):
+        mechanics, optics, analysis = self.index.lessons_for(range(len(self.index)))
+        self.assertEqual(mechanics["subject"], "Механика")
+        self.assertEqual(mechanics["teachers"], ["Иванов И. И.", "Петров С. С."])
+        self.assertEqual(mechanics["groups"], ["101", "102"])
+        self.assertEqual((mechanics["weekday_name"], mechanics["start_time"], mechanics["week_type"]),
+                         ("Понедельник", "9:00", "Обе"))
+        self.assertEqual((optics["odd_week"], optics["even_week"], optics["week_type"]), (False, True, "Верхняя"))
+        self.assertEqual(analysis["week_type"], "Нижняя")
+
+    def test_group_day_schedule(self):
+        def subjects(week_type):
+            return [lesson["subject"] for lesson in self.index.group_day_schedule(self.group_id, 0, week_type)]
+
+        self.assertEqual(subjects(None), ["Механика", "Оптика"])
+        self.assertEqual(subjects("upper"), ["Механика", "Оптика"])
+        self.assertEqual(subjects("lower"), ["Механика"])
+        self.assertEqual(self.index.group_day_schedule(self.group_id, 5), [])
+
+    def test_version_depends_on_content_only(self):
+        version = self.index.version
+        # Тот же набор пар в другом порядке: id другие, версия та же
+        self.save_timetable(list(reversed(LESSONS)))
+        self.assertEqual(get_timetable_index(self.db).version, version)
+        self.assertEqual(get_timetable_index(self.db).keys[0], self.index.keys[0])
+
+        self.save_timetable(LESSONS[:2])
+        self.assertNotEqual(get_timetable_index(self.db).version, version)
+
+    def test_generation(self):
+        generation = current_generation(self.db)
+        bump_generation(self.db)
+        bump_generation(self.db)
+        self.assertEqual(current_generation(self.db), generation + 2)
+
+    def test_snapshot_rebuilds_after_another_process_saves(self):
+        snapshot = Snapshot(build_timetable_index)
+        first = snapshot.get(self.db)
+        self.assertIs(snapshot.get(self.db), first)
+
+        # Другой воркер применил обновление, не трогая снимки этого процесса
+        clear_timetable_data(self.db)
+        save_data_to_db(self.db, pd.DataFrame(LESSONS[:1]), ["5-19"], [("101", "Группа 101")], ["Петров С. С."],
+                        ["Оптика"])
+        second = snapshot.get(self.db)
+        self.assertIsNot(second, first)
+        self.assertEqual([lesson["subject"] for lesson in second.lessons_for(range(len(second)))], ["Оптика"])
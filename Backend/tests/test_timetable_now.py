@@ -0,0 +1,74 @@
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from models import LessonDB
+from routes.timetable import get_group_now, get_lessons_now
+from tests import TimetableTestCase, make_request, timetable_lesson
+from timetable_calendar import time_to_minutes
+from timetable_index import get_timetable_index, load_lessons
+
+
+class Test(TimetableTestCase):
+    def setUp(self):
+        super().setUp()
+        self.save_timetable([
+            timetable_lesson("Механика", 0, 1, "9:00", "10:35", ["Иванов И. И."], ["5-18"], ["101"]),
+            timetable_lesson("Оптика", 0, 2, "10:50", "12:25", ["Петров С. С."], ["5-19"], ["101"], odd=False),
+            timetable_lesson("Анализ", 1, 1, "9:00", "10:35", ["Сидоров А. А."], ["5-18"], ["101"]),
+            timetable_lesson("Химия", 0, 1, "9:00", "10:35", ["Петров С. С."], ["5-19"], ["102"]),
+            timetable_lesson("Спецкурс", 0, 0, "", "", [], [], ["102"]),
+        ])
+        self.index = get_timetable_index(self.db)
+        self.group_id = self.index.groups.ids[0]
+
+    def _now(self, moment: datetime) -> dict:
+        result = asyncio.run(get_group_now(self.group_id, at=moment, db=self.db))
+        return {
+            name: (lesson["subject"], lesson["date"]) if lesson else None
+            for name, lesson in result.items()
+        }
+
+    def test_time_to_minutes(self):
+        self.assertEqual(time_to_minutes("9:00"), 540)
+        self.assertEqual(time_to_minutes("10:50"), 650)
+        self.assertIsNone(time_to_minutes(""))
+        self.assertIsNone(time_to_minutes(None))
+
+    def test_minute_columns_are_saved(self):
+        minutes = set(self.db.query(LessonDB.start_minute, LessonDB.end_minute))
+        self.assertEqual(minutes, {(540, 635), (650, 745), (None, None)})
+
+    def test_current_and_next(self):
+        # 2 сентября 2024 — понедельник нижней недели: "Оптика" (только верхняя) пропускается
+        self.assertEqual(self._now(datetime(2024, 9, 2, 9, 30)), {
+            "current": ("Механика", "02.09.2024"), "next": ("Анализ", "03.09.2024")
+        })
+        # Перемена в понедельник верхней недели
+        self.assertEqual(self._now(datetime(2024, 9, 9, 10, 40)), {
+            "current": None, "next": ("Оптика", "09.09.2024")
+        })
+        # Выходные: следующая пара в понедельник
+        self.assertEqual(self._now(datetime(2024, 9, 7, 12, 0)), {
+            "current": None, "next": ("Механика", "09.09.2024")
+        })
+
+    def test_unknown_group(self):
+        with self.assertRaises(HTTPException) as error:
+            asyncio.run(get_group_now(999, at=datetime(2024, 9, 2, 9, 30), db=self.db))
+        self.assertEqual(error.exception.status_code, 404)
+
+    def test_all_lessons_now(self):
+        lessons = asyncio.run(get_lessons_now(make_request(), at=datetime(2024, 9, 2, 9, 0), db=self.db))
+        self.assertEqual([lesson["subject"] for lesson in lessons], ["Механика", "Химия"])
+
+        response = asyncio.run(get_lessons_now(make_request("format=compact"), at=datetime(2024, 9, 2, 10, 35),
+                                               db=self.db))
+        self.assertEqual(json.loads(response.body)["lessons"], [])
+
+    def test_loaded_lessons_match_snapshot(self):
+        ids = list(self.index.lesson_ids)
+        self.assertEqual(load_lessons(self.db, ids), self.index.lessons_for(range(len(self.index))))
+        self.assertEqual(load_lessons(self.db, [999]), [])
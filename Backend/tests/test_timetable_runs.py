@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from leases import Lease
+from models import TimetableRunDB
+from routes.timetable import (
+    REFRESH_LEASE, get_refresh_report, get_timetable_run, get_timetable_runs, update_timetable_task,
+)
+from tests import TimetableTestCase, parsed_timetable, timetable_lesson
+from timetable_runs import MAX_RUN_ERRORS, RunRecorder, run_to_dict
+
+LESSONS = [
+    timetable_lesson("Механика", 0, 1, "9:00", "10:35", ["Иванов И. И."], ["5-18"], ["101"]),
+    timetable_lesson("Оптика", 0, 2, "10:50", "12:25", ["Петров С. С."], ["5-19"], ["101"]),
+]
+
+
+class Test(TimetableTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for patcher in (patch("timetable_bundles.BUNDLE_DIR", Path(directory.name)),
+                        patch("routes.timetable.fetch_pages", return_value=([{"url": "u", "raw_html": ""}], 1))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _lease(self) -> Lease:
+        lease = Lease(REFRESH_LEASE, session_factory=sessionmaker(bind=self.engine))
+        self.assertTrue(lease.acquire())
+        return lease
+
+    def _refresh(self, lessons, trigger="manual") -> TimetableRunDB:
+        with patch("routes.timetable._parse_pages", return_value=parsed_timetable(lessons)):
+            return update_timetable_task(self.db, lease=self._lease(), trigger=trigger)
+
+    def test_recorder_collects_metrics(self):
+        recorder = RunRecorder(self.db, "schedule")
+        with recorder.stage("parse"), recorder.capture_parse_warnings():
+            logging.getLogger("profcomff_parse_lib.parse_name").warning(
+                "Для строки не найдено подходящее регулярное выражение")
+            logging.getLogger("profcomff_parse_lib.parse_name").warning("Другое предупреждение")
+        for i in range(MAX_RUN_ERRORS + 5):
+            recorder.error(f"page-{i}", ValueError("нет таблицы"))
+        run = run_to_dict(recorder.finish("failed"), detail=True)
+
+        self.assertEqual((run["id"], run["status"], run["trigger"]), (1, "failed", "schedule"))
+        self.assertEqual(run["regex_misses"], {"parse_name": 1})
+        self.assertIn("parse", run["timings"])
+        self.assertEqual(len(run["errors"]), MAX_RUN_ERRORS)
+        self.assertEqual(run["errors"][0], {"source": "page-0", "error": "ValueError: нет таблицы"})
+        self.assertGreaterEqual(run["duration"], 0)
+
+    def test_refresh_is_recorded(self):
+        self._refresh(LESSONS)
+        run = self._refresh(LESSONS[:1] + [dict(LESSONS[1], num=3)])
+
+        result = run_to_dict(run, detail=True)
+        self.assertEqual((result["status"], result["version_id"]), ("applied", 2))
+        self.assertEqual(result["rows"], {"before": 2, "after": 2, "added": 1, "removed": 1})
+        self.assertEqual((result["counts"]["lessons"], result["counts"]["conflicts"]), (2, 0))
+        self.assertEqual(result["pages"]["changed"], 0)
+        self.assertTrue({"fetch", "parse", "analyze", "save", "index", "changes", "bundles"} <= set(result["timings"]))
+
+        self.assertEqual(self._refresh(LESSONS[:1] + [dict(LESSONS[1], num=3)]).status, "unchanged")
+
+    def test_parse_failure_is_recorded(self):
+        with patch("routes.timetable._parse_pages", return_value=(None,) * 5):
+            run = update_timetable_task(self.db, lease=self._lease())
+        self.assertEqual(run.status, "failed")
+
+    def test_endpoints(self):
+        with self.assertRaises(HTTPException) as error:
+            asyncio.run(get_refresh_report(db=self.db))
+        self.assertEqual(error.exception.status_code, 404)
+
+        self._refresh(LESSONS)
+        self._refresh(LESSONS[:1], trigger="schedule")
+
+        runs = asyncio.run(get_timetable_runs(skip=0, limit=20, db=self.db))
+        self.assertEqual([(run["id"], run["trigger"]) for run in runs], [(2, "schedule"), (1, "manual")])
+        self.assertNotIn("errors", runs[0])
+        self.assertEqual(asyncio.run(get_refresh_report(db=self.db))["id"], 2)
+        self.assertEqual(asyncio.run(get_timetable_run(1, db=self.db))["report"]["lessons"], 2)
+
+        with self.assertRaises(HTTPException) as error:
+            asyncio.run(get_timetable_run(99, db=self.db))
+        self.assertEqual(error.exception.status_code, 404)
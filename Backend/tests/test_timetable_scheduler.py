@@ -0,0 +1,120 @@
+import threading
+import time
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import patch
+
+from sqlalchemy.orm import sessionmaker
+
+import timetable_scheduler
+from leases import Lease
+from models import TimetableRunDB
+from routes.timetable import apply_timetable_refresh, scheduled_refresh
+from tests import DatabaseTestCase
+from timetable_runs import RunRecorder
+from timetable_scheduler import CronSchedule, RefreshScheduler
+
+
+class TestCron(TestCase):
+    def test_fields(self):
+        schedule = CronSchedule("*/20 7-9,21 * 6 1-5")
+        self.assertEqual(sorted(schedule.minutes), [0, 20, 40])
+        self.assertEqual(sorted(schedule.hours), [7, 8, 9, 21])
+        self.assertEqual(schedule.months, {6})
+        self.assertEqual(CronSchedule("0 0 * * 7").weekdays, {0})
+        self.assertEqual(sorted(CronSchedule("5/15 * * * *").minutes), [5, 20, 35, 50])
+
+    def test_invalid_expressions(self):
+        for expression in ("* * * *", "61 * * * *", "*/0 * * * *", "0 5-3 * * *", "0 0 0 * *", "x * * * *"):
+            with self.assertRaises(ValueError, msg=expression):
+                CronSchedule(expression)
+        with self.assertRaises(ValueError):
+            CronSchedule("0 0 31 2 *").next_after(datetime(2024, 1, 1))
+
+    def test_next_after_skips_quiet_hours(self):
+        schedule = CronSchedule("*/30 7-22 * * 1-6")
+        # 7 сентября 2024 — суббота: после 22:30 следующий запуск в понедельник утром
+        self.assertEqual(schedule.next_after(datetime(2024, 9, 7, 22, 45)), datetime(2024, 9, 9, 7, 0))
+        self.assertEqual(schedule.next_after(datetime(2024, 9, 9, 9, 10, 30)), datetime(2024, 9, 9, 9, 30))
+        # Строго после момента
+        self.assertEqual(schedule.next_after(datetime(2024, 9, 9, 9, 30)), datetime(2024, 9, 9, 10, 0))
+
+    def test_day_of_month_or_weekday(self):
+        schedule = CronSchedule("0 8 1 * 1")
+        # 1 октября 2024 — вторник, 7 октября — понедельник
+        self.assertEqual(schedule.next_after(datetime(2024, 9, 30, 9, 0)), datetime(2024, 10, 1, 8, 0))
+        self.assertEqual(schedule.next_after(datetime(2024, 10, 1, 9, 0)), datetime(2024, 10, 7, 8, 0))
+        self.assertEqual(CronSchedule("0 0 29 2 *").next_after(datetime(2025, 1, 1)), datetime(2028, 2, 29))
+
+
+class TestScheduler(DatabaseTestCase):
+    def _scheduler(self, job) -> RefreshScheduler:
+        scheduler = RefreshScheduler("* * * * *", 0, job)
+        # Окно уже наступило: задача запускается сразу
+        scheduler.next_window = lambda moment=None: datetime.now()
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+    def test_disabled_without_schedule(self):
+        scheduler = RefreshScheduler("", 300, lambda fire_at: None)
+        scheduler.start()
+        self.assertEqual((scheduler.enabled, scheduler.status()["running"], scheduler.next_window()), (False, False, None))
+
+    def test_next_window_of_several_schedules(self):
+        scheduler = RefreshScheduler("0 7 * * *; 30 6 * * 6", 0, lambda fire_at: None)
+        self.assertEqual(scheduler.next_window(datetime(2024, 9, 6, 12, 0)), datetime(2024, 9, 7, 6, 30))
+        self.assertEqual(scheduler.next_window(datetime(2024, 9, 7, 12, 0)), datetime(2024, 9, 8, 7, 0))
+
+    def test_job_errors_are_kept(self):
+        fired = threading.Event()
+
+        def job(fire_at):
+            fired.set()
+            raise RuntimeError("источник недоступен")
+
+        scheduler = self._scheduler(job)
+        scheduler.start()
+        self.assertTrue(fired.wait(1))
+        scheduler.stop()
+        self.assertEqual(scheduler.last_error, "RuntimeError: источник недоступен")
+        self.assertFalse(scheduler.status()["running"])
+
+    @patch.object(timetable_scheduler, "STOP_TIMEOUT", 0.1)
+    def test_stop_does_not_wait_for_refresh(self):
+        started, finish = threading.Event(), threading.Event()
+
+        def job(fire_at):
+            started.set()
+            finish.wait(5)
+
+        scheduler = self._scheduler(job)
+        scheduler.start()
+        self.assertTrue(started.wait(1))
+        began = time.monotonic()
+        scheduler.stop()
+        self.assertLess(time.monotonic() - began, 1)
+        finish.set()
+
+    def test_window_is_handled_once(self):
+        sessions = sessionmaker(bind=self.engine)
+        fire_at = datetime(2024, 9, 9, 7, 0)
+        with patch("routes.timetable.SessionLocal", sessions), \
+                patch("routes.timetable.Lease", lambda name: Lease(name, session_factory=sessions)), \
+                patch("routes.timetable.update_timetable_task") as task:
+            scheduled_refresh(fire_at)
+            kwargs = task.call_args.kwargs
+            self.assertEqual((kwargs["trigger"], kwargs["only_if_changed"]), ("schedule", True))
+            kwargs["lease"].release()
+
+            # Другой процесс уже отработал это окно
+            self.db.add(TimetableRunDB(trigger="schedule", status="not_modified", started_at=datetime.utcnow()))
+            self.db.commit()
+            scheduled_refresh(fire_at)
+        self.assertEqual(task.call_count, 1)
+
+    def test_unchanged_source_is_not_parsed(self):
+        recorder = RunRecorder(self.db, "schedule")
+        with patch("routes.timetable.fetch_pages", return_value=([{"url": "u", "raw_html": ""}], 0)), \
+                patch("routes.timetable._parse_pages") as parse:
+            self.assertEqual(apply_timetable_refresh(self.db, recorder, only_if_changed=True), "not_modified")
+        parse.assert_not_called()
@@ -0,0 +1,70 @@
+from fastapi import HTTPException
+
+from routes.timetable import search_group, search_timetable
+from tests import TimetableTestCase, timetable_lesson
+from timetable_index import Snapshot
+from timetable_search import SearchEntry, SearchIndex, build_search_index, normalize
+
+
+class TestSearchIndex(TimetableTestCase):
+    def setUp(self):
+        super().setUp()
+        self.save_timetable([
+            timetable_lesson("Математический анализ", 0, 1, "9:00", "10:35", ["Иванов И. И."], ["5-18"], ["101", "102"]),
+            timetable_lesson("Механика", 0, 2, "10:50", "12:25", ["Иваненко П. П."], ["Ауд. Ю"], ["101"]),
+            timetable_lesson("Квантовая механика", 1, 1, "9:00", "10:35", ["Петров С. С."], ["5-18"], ["412м"]),
+            timetable_lesson("Оптика", 1, 2, "10:50", "12:25", ["Иванов Иван Иванович"], ["5-19"], ["101М"]),
+        ])
+
+    def _names(self, results):
+        return [item["name"] for item in results]
+
+    def test_normalize_transliterates(self):
+        self.assertEqual(normalize("Иванов И. И."), "ivanov i i")
+        self.assertEqual(normalize("412м"), normalize("412m"))
+        self.assertEqual(normalize("101М"), normalize("101 м"))
+        self.assertEqual(normalize(None), "")
+
+    def test_exact_match_ranks_first(self):
+        results = search_timetable(q="механика", types=None, limit=10, db=self.db)
+        self.assertEqual(self._names(results)[:2], ["Механика", "Квантовая механика"])
+        self.assertGreater(results[0]["score"], results[1]["score"])
+
+    def test_typos_and_layout(self):
+        self.assertEqual(self._names(search_timetable(q="Ивонов", types="teacher", limit=10, db=self.db))[0],
+                         "Иванов И. И.")
+        self.assertEqual(self._names(search_timetable(q="petrov", types=None, limit=10, db=self.db)),
+                         ["Петров С. С."])
+
+    def test_dropped_letter(self):
+        for query in ("ivnov", "ианов"):
+            self.assertIn("Иванов Иван Иванович",
+                          self._names(search_timetable(q=query, types="teacher", limit=10, db=self.db)), query)
+
+    def test_group_letter_with_space(self):
+        self.assertEqual([group["number"] for group in search_group(query="101 м", db=self.db)], ["101М"])
+
+    def test_types_filter(self):
+        results = search_timetable(q="5-18", types="place", limit=10, db=self.db)
+        self.assertEqual([(item["type"], item["name"]) for item in results], [("place", "5-18")])
+
+        with self.assertRaises(HTTPException) as error:
+            search_timetable(q="5-18", types="place,room", limit=10, db=self.db)
+        self.assertEqual(error.exception.status_code, 400)
+
+    def test_search_group_by_number(self):
+        self.assertEqual([group["number"] for group in search_group(query="10", db=self.db)],
+                         ["101", "102", "101М"])
+        self.assertEqual([group["number"] for group in search_group(query="412m", db=self.db)], ["412м"])
+
+    def test_limit(self):
+        index = SearchIndex(SearchEntry("teacher", i, f"Иванов {i}") for i in range(20))
+        self.assertEqual(len(index.search("иванов", limit=5)), 5)
+        self.assertEqual(index.search("   "), [])
+
+    def test_snapshot_follows_refresh(self):
+        snapshot = Snapshot(build_search_index)
+        self.assertEqual(len(snapshot.get(self.db)), 15)
+
+        self.save_timetable([timetable_lesson("Оптика", 2, 1, "9:00", "10:35", ["Сидоров А. А."], ["5-19"], ["201"])])
+        self.assertEqual(self._names(snapshot.get(self.db).search("оптика")), ["Оптика"])
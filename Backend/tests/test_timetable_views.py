@@ -0,0 +1,48 @@
+import asyncio
+
+from fastapi import HTTPException
+
+from routes.timetable import get_room_schedule, get_subject_schedule, get_teacher_schedule
+from tests import TimetableTestCase, make_request, timetable_lesson
+from timetable_index import get_timetable_index
+
+
+class Test(TimetableTestCase):
+    def setUp(self):
+        super().setUp()
+        # Пары сохраняются не по порядку: индексы должны отдавать их по (день, номер)
+        self.save_timetable([
+            timetable_lesson("Оптика", 2, 1, "9:00", "10:35", ["Петров С. С."], ["5-18"], ["201"]),
+            timetable_lesson("Механика", 0, 2, "10:50", "12:25", ["Иванов И. И.", "Петров С. С."], ["5-18"], ["101"]),
+            timetable_lesson("Механика", 0, 1, "9:00", "10:35", ["Иванов И. И."], ["Ауд. Ю"], ["102"]),
+        ])
+        self.index = get_timetable_index(self.db)
+
+    def _id(self, table, value) -> int:
+        return next(entity_id for entity_id, item in zip(table.ids, table.values) if item == value)
+
+    def _slots(self, lessons):
+        return [(lesson["weekday"], lesson["number"], lesson["subject"]) for lesson in lessons]
+
+    def test_teacher_schedule(self):
+        lessons = asyncio.run(get_teacher_schedule(make_request(), self._id(self.index.teachers, "Петров С. С."),
+                                                   db=self.db))
+        self.assertEqual(self._slots(lessons), [(0, 2, "Механика"), (2, 1, "Оптика")])
+        self.assertEqual(lessons[0]["teachers"], ["Иванов И. И.", "Петров С. С."])
+        self.assertEqual(lessons[0]["groups"], ["101"])
+
+    def test_room_schedule(self):
+        lessons = asyncio.run(get_room_schedule(make_request(), self._id(self.index.places, "5-18"), db=self.db))
+        self.assertEqual(self._slots(lessons), [(0, 2, "Механика"), (2, 1, "Оптика")])
+
+    def test_subject_schedule(self):
+        lessons = asyncio.run(get_subject_schedule(make_request(), self._id(self.index.subjects, "Механика"),
+                                                   db=self.db))
+        self.assertEqual(self._slots(lessons), [(0, 1, "Механика"), (0, 2, "Механика")])
+        self.assertEqual([lesson["places"] for lesson in lessons], [["Ауд. Ю"], ["5-18"]])
+
+    def test_unknown_entities(self):
+        for handler in (get_teacher_schedule, get_room_schedule, get_subject_schedule):
+            with self.assertRaises(HTTPException) as error:
+                asyncio.run(handler(make_request(), 999, db=self.db))
+            self.assertEqual(error.exception.status_code, 404)
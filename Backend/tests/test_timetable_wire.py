@@ -0,0 +1,83 @@
+import json
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from tests import make_request
+from timetable_wire import COMPACT_FIELDS, COMPACT_MEDIA_TYPE, encode_compact, msgpack, negotiate_format, timetable_response
+
+LESSONS = [
+    {"id": 1, "subject": "Механика", "teachers": ["Иванов И. И."], "places": ["5-18"], "groups": ["101", "102"],
+     "weekday": 0, "number": 1, "start_time": "9:00", "end_time": "10:35", "odd_week": True, "even_week": True},
+    {"id": 2, "subject": "Механика", "teachers": ["Иванов И. И."], "places": [], "groups": ["101"],
+     "weekday": 0, "number": 2, "start_time": "10:50", "end_time": "12:25", "odd_week": False, "even_week": True,
+     "date": "02.09.2024"},
+]
+
+
+def decode_compact(payload: dict) -> list:
+    """Обратное преобразование, как на клиенте."""
+    strings = payload["strings"]
+    lessons = []
+    for row in payload["lessons"]:
+        lesson = dict(zip(payload["fields"], row))
+        for field in ("subject", "start_time", "end_time"):
+            lesson[field] = strings[lesson[field]]
+        for field in ("teachers", "places", "groups"):
+            lesson[field] = [strings[ref] for ref in lesson[field]]
+        lesson["date"] = strings[lesson["date"]] if lesson["date"] >= 0 else None
+        lessons.append(lesson)
+    return lessons
+
+
+class Test(TestCase):
+    def test_compact_round_trip(self):
+        payload = encode_compact(LESSONS)
+        self.assertEqual(payload["fields"], COMPACT_FIELDS)
+        # Каждая строка передается один раз
+        self.assertEqual(len(payload["strings"]), len(set(payload["strings"])))
+        self.assertEqual(payload["strings"].count("Механика"), 1)
+
+        first, second = decode_compact(payload)
+        self.assertEqual((first["subject"], first["groups"], first["parity"], first["date"]),
+                         ("Механика", ["101", "102"], 3, None))
+        self.assertEqual((second["places"], second["parity"], second["date"]), ([], 2, "02.09.2024"))
+
+    def test_negotiation(self):
+        self.assertEqual(negotiate_format(make_request()), "json")
+        self.assertEqual(negotiate_format(make_request(headers={"Accept": COMPACT_MEDIA_TYPE})), "compact")
+        # Параметр важнее заголовка
+        self.assertEqual(negotiate_format(make_request("format=json", {"Accept": COMPACT_MEDIA_TYPE})), "json")
+
+        # q=0 — тип не принимается, при разных q выбирается наибольший
+        accept = f"application/msgpack;q=0, {COMPACT_MEDIA_TYPE};q=0.5"
+        self.assertEqual(negotiate_format(make_request(headers={"Accept": accept})), "compact")
+        accept = f"application/json, {COMPACT_MEDIA_TYPE};q=0.2"
+        self.assertEqual(negotiate_format(make_request(headers={"Accept": accept})), "json")
+        self.assertEqual(negotiate_format(make_request(headers={"Accept": f"{COMPACT_MEDIA_TYPE}; q=0"})), "json")
+
+        with self.assertRaises(HTTPException) as error:
+            negotiate_format(make_request("format=xml"))
+        self.assertEqual(error.exception.status_code, 400)
+
+    def test_msgpack_is_optional(self):
+        with patch("timetable_wire.msgpack", None):
+            self.assertEqual(negotiate_format(make_request(headers={"Accept": "application/msgpack"})), "json")
+            with self.assertRaises(HTTPException) as error:
+                negotiate_format(make_request("format=msgpack"))
+            self.assertEqual(error.exception.status_code, 406)
+
+    def test_responses(self):
+        self.assertIs(timetable_response(make_request(), LESSONS), LESSONS)
+
+        response = timetable_response(make_request("format=compact"), LESSONS)
+        self.assertEqual(response.media_type, COMPACT_MEDIA_TYPE)
+        self.assertEqual(response.headers["vary"], "Accept")
+        self.assertEqual(json.loads(response.body), encode_compact(LESSONS))
+
+    @skipIf(msgpack is None, "msgpack не установлен")
+    def test_msgpack_response(self):
+        response = timetable_response(make_request(headers={"Accept": "application/x-msgpack"}), LESSONS)
+        self.assertEqual(response.media_type, "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.body), encode_compact(LESSONS))
@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from timetable_index import TimetableIndex
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него пишутся только .gz
+    brotli = None
+
+# Рядом с модулем, а не относительно рабочей директории процесса
+BUNDLE_DIR = Path(__file__).resolve().parent / "static" / "timetable"
+BUNDLE_URL_PREFIX = "/static/timetable"
+MANIFEST_NAME = "manifest.json"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as buffer:
+        buffer.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_bundle(name: str, payload: bytes) -> Dict[str, str]:
+    """Пишет бандл и его сжатые копии рядом; существующие файлы не трогает."""
+    urls = {"url": f"{BUNDLE_URL_PREFIX}/{name}"}
+    variants = [(name, lambda: payload), (name + ".gz", lambda: gzip.compress(payload, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((name + ".br", lambda: brotli.compress(payload, quality=11)))
+
+    for file_name, render in variants:
+        path = BUNDLE_DIR / file_name
+        if not path.exists():
+            _write_atomic(path, render())
+    urls["gzip"] = f"{BUNDLE_URL_PREFIX}/{name}.gz"
+    if brotli is not None:
+        urls["br"] = f"{BUNDLE_URL_PREFIX}/{name}.br"
+    return urls
+
+
+def _read_manifest() -> Optional[dict]:
+    try:
+        return json.loads((BUNDLE_DIR / MANIFEST_NAME).read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def _manifest_files(manifest: Optional[dict]) -> Set[str]:
+    files: Set[str] = set()
+    for entry in (manifest or {}).get("groups", {}).values():
+        name = entry["url"].rsplit("/", 1)[-1]
+        files.update({name, name + ".gz", name + ".br"})
+    return files
+
+
+def group_bundle_payload(index: TimetableIndex, group_id: int) -> bytes:
+    """
+    Бандл группы без id из базы: id групп и пар пересоздаются при каждом
+    обновлении, а пары узнаются по ключу key. Поэтому у неизменившейся
+    группы тот же хэш и тот же файл.
+    """
+    group = index.groups.get(group_id)
+    lessons = [
+        {name: value for name, value in lesson.items() if name != "id"}
+        for lesson in index.group_schedule(group_id)
+    ]
+    return json.dumps(
+        {"group": {"number": group["number"], "name": group["name"]}, "lessons": lessons},
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def write_group_bundles(index: TimetableIndex) -> dict:
+    """
+    Рендерит расписание каждой группы в JSON-бандл с хэшем содержимого
+    в имени (group-<hash>.json) плюс .gz/.br копии для раздачи через
+    StaticFiles или фронтовой прокси, затем пишет манифест group_id -> URL.
+
+    Бандлы, на которые не ссылается ни новый, ни предыдущий манифест,
+    удаляются: клиент, успевший получить предыдущий манифест, еще одно
+    обновление может загружать его файлы.
+    """
+    BUNDLE_DIR.mkdir(parents=True, exist_ok=True)
+    previous = _read_manifest()
+
+    groups = {}
+    for group_id in index.groups.ids:
+        payload = group_bundle_payload(index, group_id)
+        content_hash = hashlib.sha256(payload).hexdigest()[:12]
+        name = f"group-{content_hash}.json"
+        groups[str(group_id)] = {
+            "number": index.groups.get(group_id)["number"], "hash": content_hash, **_write_bundle(name, payload)
+        }
+
+    manifest = {"version": index.version, "groups": groups}
+    _write_atomic(BUNDLE_DIR / MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+
+    referenced = {MANIFEST_NAME} | _manifest_files(manifest) | _manifest_files(previous)
+    for path in BUNDLE_DIR.iterdir():
+        if path.is_file() and path.name not in referenced:
+            path.unlink()
+
+    return manifest
+
+
+def manifest_path() -> Optional[Path]:
+    path = BUNDLE_DIR / MANIFEST_NAME
+    return path if path.exists() else None
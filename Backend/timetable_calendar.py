@@ -0,0 +1,239 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from timetable_index import TimetableIndex
+
+CALENDAR_TZID = "Europe/Moscow"
+CALENDAR_CACHE_SIZE = 256
+
+# Москва живет в UTC+3 без перехода на летнее время с 2014 года.
+_VTIMEZONE = (
+    "BEGIN:VTIMEZONE\r\n"
+    f"TZID:{CALENDAR_TZID}\r\n"
+    "BEGIN:STANDARD\r\n"
+    "DTSTART:19700101T000000\r\n"
+    "TZOFFSETFROM:+0300\r\n"
+    "TZOFFSETTO:+0300\r\n"
+    "TZNAME:MSK\r\n"
+    "END:STANDARD\r\n"
+    "END:VTIMEZONE\r\n"
+)
+
+
+def determine_week_type(current_date=None):
+    if current_date is None:
+        current_date = datetime.now().date()
+
+    week_number = current_date.isocalendar()[1]
+
+    return 'upper' if week_number % 2 == 1 else 'lower'
+
+
+def lesson_matches_week(lesson: dict, week_type: str) -> bool:
+    if week_type == 'upper':
+        return lesson["even_week"]
+    return lesson["odd_week"]
+
+
+def _weekly_buckets(lessons: List[dict]) -> Dict[Tuple[int, str], List[dict]]:
+    """Раскладывает пары по (день недели, тип недели) один раз на весь диапазон."""
+    buckets: Dict[Tuple[int, str], List[dict]] = {}
+    for weekday in range(7):
+        for week_type in ('upper', 'lower'):
+            buckets[(weekday, week_type)] = [
+                lesson for lesson in lessons
+                if lesson["weekday"] == weekday and lesson_matches_week(lesson, week_type)
+            ]
+    return buckets
+
+
+def iter_occurrences(lessons: List[dict], date_from: date, date_to: date) -> Iterator[dict]:
+    """
+    Разворачивает недельное расписание в конкретные занятия по датам.
+
+    Args:
+        lessons: Пары группы в порядке (день, номер)
+        date_from: Первая дата диапазона (включительно)
+        date_to: Последняя дата диапазона (включительно)
+    """
+    buckets = _weekly_buckets(lessons)
+    current = date_from
+    while current <= date_to:
+        formatted = current.strftime("%d.%m.%Y")
+        for lesson in buckets[(current.weekday(), determine_week_type(current))]:
+            yield {**lesson, "date": formatted}
+        current += timedelta(days=1)
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Переносит строку длиннее 75 байт по правилам RFC 5545."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    chunk = ""
+    size = 0
+    limit = 75
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        if size + char_size > limit:
+            parts.append(chunk)
+            chunk = ""
+            size = 0
+            limit = 74  # у строк продолжения первый байт занимает пробел
+        chunk += char
+        size += char_size
+    parts.append(chunk)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _parse_time(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    try:
+        hours, minutes = value.split(":")
+        return int(hours), int(minutes)
+    except (AttributeError, ValueError):
+        return None
+
+
+def time_to_minutes(value: Optional[str]) -> Optional[int]:
+    """Переводит время "HH:MM" в минуты от начала суток."""
+    parsed = _parse_time(value)
+    if parsed is None:
+        return None
+    return parsed[0] * 60 + parsed[1]
+
+
+def _iso_year_segments(date_from: date, date_to: date) -> Iterator[Tuple[int, date, date]]:
+    """
+    Делит диапазон по границам ISO-года: на стыке 52/53 и 1 недели
+    чередование верхней и нижней недели сбивается, и RRULE с INTERVAL=2
+    нельзя протягивать через эту границу.
+    """
+    current = date_from
+    while current <= date_to:
+        iso_year = current.isocalendar()[0]
+        next_year_start = date.fromisocalendar(iso_year + 1, 1, 1)
+        segment_end = min(date_to, next_year_start - timedelta(days=1))
+        yield iso_year, current, segment_end
+        current = segment_end + timedelta(days=1)
+
+
+def _first_date(lesson: dict, start: date, end: date) -> Optional[date]:
+    current = start + timedelta(days=(lesson["weekday"] - start.weekday()) % 7)
+    while current <= end:
+        if lesson_matches_week(lesson, determine_week_type(current)):
+            return current
+        current += timedelta(days=7)
+    return None
+
+
+def _render_event(lesson: dict, iso_year: int, start: date, end: date, stamp: str) -> str:
+    first = _first_date(lesson, start, end)
+    start_time = _parse_time(lesson["start_time"])
+    end_time = _parse_time(lesson["end_time"])
+    if first is None or start_time is None or end_time is None:
+        return ""
+
+    interval = 1 if lesson["odd_week"] and lesson["even_week"] else 2
+    dtstart = datetime(first.year, first.month, first.day, *start_time)
+    dtend = datetime(first.year, first.month, first.day, *end_time)
+    description = ", ".join(lesson["teachers"])
+    lines = [
+        "BEGIN:VEVENT",
+        # Ключ по содержимому, а не id: id пар пересоздаются при каждом обновлении
+        f"UID:lesson-{lesson['key']}-{iso_year}@idearelease",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART;TZID={CALENDAR_TZID}:{dtstart:%Y%m%dT%H%M%S}",
+        f"DTEND;TZID={CALENDAR_TZID}:{dtend:%Y%m%dT%H%M%S}",
+        f"RRULE:FREQ=WEEKLY;INTERVAL={interval};UNTIL={end:%Y%m%d}T235959Z",
+        f"SUMMARY:{_escape(lesson['subject'])}",
+        f"LOCATION:{_escape(', '.join(lesson['places']))}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{_escape(description)}")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+
+def iter_calendar(lessons: List[dict], name: str, date_from: date, date_to: date) -> Iterator[str]:
+    """
+    Генерирует iCalendar по частям: каждая пара — одно повторяющееся
+    событие (RRULE) на каждый ISO-год диапазона, без разворачивания занятий.
+    """
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield (
+        "BEGIN:VCALENDAR\r\n"
+        "VERSION:2.0\r\n"
+        "PRODID:-//IdeaRelease//Timetable//RU\r\n"
+        "CALSCALE:GREGORIAN\r\n"
+        + _fold(f"X-WR-CALNAME:{_escape(name)}")
+        + f"X-WR-TIMEZONE:{CALENDAR_TZID}\r\n"
+        + _VTIMEZONE
+    )
+    for iso_year, start, end in _iso_year_segments(date_from, date_to):
+        for lesson in lessons:
+            event = _render_event(lesson, iso_year, start, end, stamp)
+            if event:
+                yield event
+    yield "END:VCALENDAR\r\n"
+
+
+class CalendarCache:
+    """
+    LRU-кэш готовых iCalendar-лент. Ключ включает версию расписания,
+    поэтому после обновления старые ленты просто перестают запрашиваться.
+    """
+
+    def __init__(self, max_size: int = CALENDAR_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: "OrderedDict[tuple, Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            chunks = self._items.get(key)
+            if chunks is not None:
+                self._items.move_to_end(key)
+            return chunks
+
+    def put(self, key: tuple, chunks: Tuple[str, ...]) -> None:
+        with self._lock:
+            self._items[key] = chunks
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def stream(self, key: tuple, producer: Iterator[str]) -> Iterator[bytes]:
+        """Отдает ленту из кэша либо генерирует ее, попутно сохраняя в кэш."""
+        cached = self.get(key)
+        if cached is not None:
+            for chunk in cached:
+                yield chunk.encode("utf-8")
+            return
+
+        produced = []
+        for chunk in producer:
+            produced.append(chunk)
+            yield chunk.encode("utf-8")
+        self.put(key, tuple(produced))
+
+
+calendar_cache = CalendarCache()
+
+
+def group_calendar_stream(index: TimetableIndex, group_id: int, date_from: date, date_to: date) -> Iterator[bytes]:
+    group = index.groups.get(group_id)
+    name = f"Расписание {group['number']}"
+    key = (index.version, group_id, date_from, date_to)
+    return calendar_cache.stream(key, iter_calendar(index.group_schedule(group_id), name, date_from, date_to))
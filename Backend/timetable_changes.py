@@ -0,0 +1,125 @@
+import json
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import TimetableVersionDB, TimetableChangeDB
+from timetable_index import TimetableIndex
+
+# Сколько последних версий хранится в ленте изменений. Клиенту со
+# старой версией придется заново загрузить расписание целиком.
+CHANGE_FEED_RETENTION = 50
+
+ADDED = "added"
+REMOVED = "removed"
+
+
+def _lessons_by_group(index: TimetableIndex) -> Dict[str, Dict[str, List[int]]]:
+    """Номер группы -> ключи ее пар -> позиции в снимке."""
+    return {
+        group["number"]: index.group_keys(group["id"])
+        for group in index.groups.values
+    }
+
+
+def diff_indexes(old: TimetableIndex, new: TimetableIndex) -> List[TimetableChangeDB]:
+    """
+    Сравнивает два снимка расписания по ключам пар и возвращает
+    изменения по каждой группе (без привязки к версии). Пары с одинаковым
+    ключом считаются поштучно: если дубликатов стало меньше или больше,
+    в изменения попадает разница.
+    """
+    old_groups = _lessons_by_group(old)
+    new_groups = _lessons_by_group(new)
+    changes: List[TimetableChangeDB] = []
+
+    for number in sorted(set(old_groups) | set(new_groups)):
+        old_keys = old_groups.get(number, {})
+        new_keys = new_groups.get(number, {})
+        for key in sorted(old_keys):
+            for _ in range(len(old_keys[key]) - len(new_keys.get(key, ()))):
+                changes.append(TimetableChangeDB(group_number=number, action=REMOVED, lesson_key=key))
+        for key, positions in new_keys.items():
+            for position in positions[len(old_keys.get(key, ())):]:
+                payload = json.dumps(new.lesson(position), ensure_ascii=False)
+                changes.append(TimetableChangeDB(group_number=number, action=ADDED, lesson_key=key, payload=payload))
+    return changes
+
+
+def latest_version(db: Session) -> Optional[TimetableVersionDB]:
+    return db.query(TimetableVersionDB).order_by(TimetableVersionDB.id.desc()).first()
+
+
+def record_timetable_changes(db: Session, old: TimetableIndex, new: TimetableIndex) -> Optional[TimetableVersionDB]:
+    """
+    Записывает новую версию расписания с изменениями относительно
+    предыдущего снимка. Если содержимое не изменилось, версия не создается.
+    """
+    previous = latest_version(db)
+    if previous is not None and previous.content_hash == new.version:
+        return None
+
+    changes = diff_indexes(old, new)
+    if previous is not None and not changes:
+        return None
+
+    version = TimetableVersionDB(
+        content_hash=new.version,
+        lessons_added=sum(1 for change in changes if change.action == ADDED),
+        lessons_removed=sum(1 for change in changes if change.action == REMOVED),
+    )
+    version.changes = changes
+    db.add(version)
+    db.flush()
+
+    # Старые версии удаляем целиком: клиенты с ними получат full_resync.
+    expired = version.id - CHANGE_FEED_RETENTION
+    if expired > 0:
+        db.query(TimetableChangeDB).filter(TimetableChangeDB.version_id <= expired).delete(synchronize_session=False)
+        db.query(TimetableVersionDB).filter(TimetableVersionDB.id <= expired).delete(synchronize_session=False)
+    db.commit()
+    return version
+
+
+def collect_changes(db: Session, since: int, group_number: str) -> dict:
+    """
+    Собирает изменения группы после версии since в одну дельту.
+
+    Пара, добавленная и затем удаленная внутри диапазона, в ответ не попадает;
+    пара, удаленная и добавленная обратно, тоже. Одинаковые пары считаются
+    поштучно: ключ в removed повторяется столько раз, сколько таких пар удалено.
+    """
+    current, oldest = db.query(func.max(TimetableVersionDB.id), func.min(TimetableVersionDB.id)).one()
+    current = current or 0
+    result = {"version": current, "since": since, "full_resync": False, "added": [], "removed": []}
+
+    # Версия клиента вне окна хранения (или из будущего — после сброса базы)
+    if since > current or (oldest is not None and since < oldest - 1):
+        result["full_resync"] = True
+        return result
+    if since == current:
+        return result
+
+    added: Dict[str, List[dict]] = defaultdict(list)
+    removed: Counter = Counter()
+    rows = (
+        db.query(TimetableChangeDB.action, TimetableChangeDB.lesson_key, TimetableChangeDB.payload)
+        .filter(TimetableChangeDB.group_number == group_number, TimetableChangeDB.version_id > since)
+        .order_by(TimetableChangeDB.version_id, TimetableChangeDB.id)
+    )
+    for action, key, payload in rows:
+        if action == REMOVED:
+            if added[key]:
+                added[key].pop()
+            else:
+                removed[key] += 1
+        elif removed[key]:
+            removed[key] -= 1
+        else:
+            added[key].append(json.loads(payload))
+
+    result["added"] = [lesson for lessons in added.values() for lesson in lessons]
+    result["removed"] = list(removed.elements())
+    return result
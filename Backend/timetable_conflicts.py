@@ -0,0 +1,77 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from timetable_index import WEEKDAY_NAMES
+
+WEEK_PARITIES = ("odd", "even")
+
+
+def _session(subject: Optional[str], names: Iterable[str]) -> Tuple[Optional[str], Tuple[str, ...]]:
+    return subject, tuple(sorted(set(names)))
+
+
+def detect_conflicts(lessons: Iterable[dict]) -> List[dict]:
+    """
+    Ищет двойные бронирования: преподавателя или аудиторию, которые
+    в одном слоте (день, номер пары, четность недели) заняты разными парами.
+
+    Каждая пара раскладывается в корзины (слот, преподаватель) и
+    (слот, аудитория), поэтому проверка занимает линейное время.
+    Одна и та же пара у нескольких групп (поток) конфликтом не считается:
+    для преподавателя сравниваются (предмет, аудитории), для аудитории —
+    (предмет, преподаватели).
+
+    Args:
+        lessons: Пары в виде словарей с ключами subject, teachers, places,
+            groups, weekday, number, odd_week, even_week
+    """
+    teacher_buckets: Dict[tuple, Dict[tuple, Set[str]]] = defaultdict(lambda: defaultdict(set))
+    place_buckets: Dict[tuple, Dict[tuple, Set[str]]] = defaultdict(lambda: defaultdict(set))
+
+    for lesson in lessons:
+        parities = [
+            parity for parity, flag in zip(WEEK_PARITIES, (lesson["odd_week"], lesson["even_week"])) if flag
+        ]
+        groups = lesson.get("groups") or []
+        for parity in parities:
+            slot = (lesson["weekday"], lesson["number"], parity)
+            for teacher in set(lesson["teachers"]):
+                teacher_buckets[slot + (teacher,)][_session(lesson["subject"], lesson["places"])].update(groups)
+            for place in set(lesson["places"]):
+                place_buckets[slot + (place,)][_session(lesson["subject"], lesson["teachers"])].update(groups)
+
+    conflicts = []
+    for kind, buckets, other in (("teacher", teacher_buckets, "places"), ("place", place_buckets, "teachers")):
+        for (weekday, number, parity, name), sessions in buckets.items():
+            if len(sessions) < 2:
+                continue
+            conflicts.append({
+                "kind": kind,
+                "name": name,
+                "weekday": weekday,
+                "weekday_name": WEEKDAY_NAMES[weekday],
+                "number": number,
+                "parity": parity,
+                "lessons": [
+                    {"subject": subject, other: list(names), "groups": sorted(groups)}
+                    for (subject, names), groups in sessions.items()
+                ],
+            })
+
+    conflicts.sort(key=lambda item: (item["weekday"], item["number"], item["parity"], item["kind"], item["name"]))
+    return conflicts
+
+
+def parsed_lessons(lessons) -> Iterable[dict]:
+    """Приводит строки DataFrame после парсинга к виду, который ждет detect_conflicts."""
+    for _, row in lessons.iterrows():
+        yield {
+            "subject": row["subject"],
+            "teachers": [name for name in row["teacher"] if name],
+            "places": [name for name in row["place"] if name],
+            "groups": [group[0] if isinstance(group, tuple) else group for group in row["group"]],
+            "weekday": int(row["weekday"]),
+            "number": int(row["num"]),
+            "odd_week": bool(row["odd"]),
+            "even_week": bool(row["even"]),
+        }
@@ -0,0 +1,412 @@
+import hashlib
+import threading
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Generic, Iterable, List, Optional, TypeVar
+
+from sqlalchemy import literal_column
+from sqlalchemy.orm import Session
+
+from models import (
+    TeacherDB, GroupDB, SubjectDB, PlaceDB, LessonDB, TimetableStateDB,
+    lesson_teachers, lesson_groups, lesson_places,
+)
+
+WEEKDAY_NAMES = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"]
+
+# Биты четности в колонке parity
+ODD_WEEK = 1
+EVEN_WEEK = 2
+
+
+def week_type_label(odd_week: bool, even_week: bool) -> str:
+    if even_week and not odd_week:
+        return "Верхняя"
+    if odd_week and not even_week:
+        return "Нижняя"
+    return "Обе"
+
+
+class InternTable:
+    """
+    Словарь сущностей: id из базы -> позиция, позиция -> значение.
+    Пары ссылаются на сущности по позиции, строки хранятся в одном экземпляре.
+    """
+
+    def __init__(self):
+        self.ids = array("i")
+        self.values: List = []
+        self.positions: Dict[int, int] = {}
+
+    def add(self, entity_id: int, value) -> int:
+        position = len(self.values)
+        self.ids.append(entity_id)
+        self.values.append(value)
+        self.positions[entity_id] = position
+        return position
+
+    def __contains__(self, entity_id: int) -> bool:
+        return entity_id in self.positions
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def get(self, entity_id: int, default=None):
+        position = self.positions.get(entity_id)
+        return default if position is None else self.values[position]
+
+
+class MultiColumn:
+    """Многозначная колонка (преподаватели/аудитории/группы пары) в формате CSR."""
+
+    def __init__(self):
+        self.offsets = array("i", [0])
+        self.refs = array("i")
+
+    def append(self, positions: Iterable[int]) -> None:
+        self.refs.extend(positions)
+        self.offsets.append(len(self.refs))
+
+    def row(self, lesson_position: int) -> array:
+        return self.refs[self.offsets[lesson_position]:self.offsets[lesson_position + 1]]
+
+
+class TimetableIndex:
+    """
+    Компактный снимок расписания в памяти.
+
+    Предметы, преподаватели, аудитории, группы и строки времени
+    интернированы в словари (InternTable), а пары хранятся как набор
+    параллельных массивов (struct-of-arrays), ссылающихся на словари
+    по позиции. Обратные индексы (сущность -> позиции пар) уже
+    упорядочены по (день, номер). Словари для ответа собираются
+    только для запрошенных пар.
+    """
+
+    def __init__(self):
+        # Хэш содержимого расписания (ключи пар, их группы и сами группы)
+        # без id из базы: меняется только когда меняется расписание,
+        # поэтому годится как ключ кэша и ETag для производных ответов.
+        self.version: str = ""
+
+        self.teachers = InternTable()
+        self.places = InternTable()
+        self.subjects = InternTable()
+        self.groups = InternTable()
+        self.times: List[str] = []
+
+        self.lesson_ids = array("i")
+        self.subject = array("i")
+        self.weekday = array("b")
+        self.number = array("b")
+        self.start = array("h")
+        self.end = array("h")
+        self.parity = array("b")
+        # Стабильный ключ пары по содержимому: id пар меняются при каждом
+        # обновлении, а ключ — только если изменилась сама пара.
+        self.keys: List[str] = []
+        self.lesson_teachers = MultiColumn()
+        self.lesson_places = MultiColumn()
+        self.lesson_groups = MultiColumn()
+
+        self.by_teacher: Dict[int, array] = {}
+        self.by_place: Dict[int, array] = {}
+        self.by_subject: Dict[int, array] = {}
+        self.by_group: Dict[int, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.lesson_ids)
+
+    def lesson(self, position: int) -> dict:
+        parity = self.parity[position]
+        odd_week = bool(parity & ODD_WEEK)
+        even_week = bool(parity & EVEN_WEEK)
+        weekday = self.weekday[position]
+        subject = self.subject[position]
+        return {
+            "id": self.lesson_ids[position],
+            "key": self.keys[position],
+            "subject": self.subjects.values[subject] if subject >= 0 else "Нет данных",
+            "teachers": [self.teachers.values[ref] for ref in self.lesson_teachers.row(position)],
+            "places": [self.places.values[ref] for ref in self.lesson_places.row(position)],
+            "groups": [self.groups.values[ref]["number"] for ref in self.lesson_groups.row(position)],
+            "weekday": weekday,
+            "weekday_name": WEEKDAY_NAMES[weekday],
+            "number": self.number[position],
+            "start_time": self.times[self.start[position]],
+            "end_time": self.times[self.end[position]],
+            "odd_week": odd_week,
+            "even_week": even_week,
+            "week_type": week_type_label(odd_week, even_week)
+        }
+
+    def group_keys(self, group_id: int) -> Dict[str, List[int]]:
+        """
+        Ключи пар группы -> позиции пар. Одинаковые пары (например,
+        продублированные в источнике) дают один ключ с несколькими позициями.
+        """
+        keys: Dict[str, List[int]] = defaultdict(list)
+        for position in self.by_group.get(group_id, ()):
+            keys[self.keys[position]].append(position)
+        return dict(keys)
+
+    def lessons_for(self, positions: Iterable[int]) -> List[dict]:
+        return [self.lesson(position) for position in positions]
+
+    def teacher_schedule(self, teacher_id: int) -> List[dict]:
+        return self.lessons_for(self.by_teacher.get(teacher_id, ()))
+
+    def place_schedule(self, place_id: int) -> List[dict]:
+        return self.lessons_for(self.by_place.get(place_id, ()))
+
+    def subject_schedule(self, subject_id: int) -> List[dict]:
+        return self.lessons_for(self.by_subject.get(subject_id, ()))
+
+    def group_schedule(self, group_id: int) -> List[dict]:
+        return self.lessons_for(self.by_group.get(group_id, ()))
+
+    def group_day_schedule(self, group_id: int, weekday: int, week_type: Optional[str] = None) -> List[dict]:
+        """Пары группы в заданный день; week_type — 'upper', 'lower' или None (обе)."""
+        mask = 0
+        if week_type and week_type.lower() == 'upper':
+            mask = EVEN_WEEK
+        elif week_type and week_type.lower() == 'lower':
+            mask = ODD_WEEK
+        return self.lessons_for(
+            position for position in self.by_group.get(group_id, ())
+            if self.weekday[position] == weekday and (not mask or self.parity[position] & mask)
+        )
+
+
+def lesson_key(subject: Optional[str], weekday: int, number: Optional[int], start_time: Optional[str],
+               end_time: Optional[str], odd_week: bool, even_week: bool,
+               teachers: Iterable[str], places: Iterable[str]) -> str:
+    """Ключ пары по содержимому; не зависит от id, которые пересоздаются при обновлении."""
+    content = repr((
+        subject, weekday, number, start_time, end_time, bool(odd_week), bool(even_week),
+        sorted(teachers), sorted(places),
+    ))
+    return hashlib.sha1(content.encode()).hexdigest()[:12]
+
+
+def _collect_links(db: Session, table, column: str) -> Dict[int, List[int]]:
+    links: Dict[int, List[int]] = defaultdict(list)
+    # В порядке вставки, как пара пришла из источника
+    for lesson_id, entity_id in db.query(table.c.lesson_id, table.c[column]).order_by(literal_column("rowid")):
+        links[lesson_id].append(entity_id)
+    return links
+
+
+def _linked_values(db: Session, table, column: str, value_column, lesson_ids: List[int]) -> Dict[int, List[str]]:
+    values: Dict[int, List[str]] = defaultdict(list)
+    entity = value_column.class_
+    rows = (
+        db.query(table.c.lesson_id, value_column)
+        .join(entity, entity.id == table.c[column])
+        .filter(table.c.lesson_id.in_(lesson_ids))
+        .order_by(literal_column(f"{table.name}.rowid"))
+    )
+    for lesson_id, value in rows:
+        values[lesson_id].append(value)
+    return values
+
+
+def load_lessons(db: Session, lesson_ids: List[int]) -> List[dict]:
+    """
+    Пары по id прямо из базы, в том же виде, что и TimetableIndex.lesson.
+    Нужна, когда id получены запросом к базе: id пар пересоздаются
+    при каждом обновлении, и снимок в памяти может их еще не знать.
+    """
+    if not lesson_ids:
+        return []
+    rows = {
+        row.id: row for row in
+        db.query(
+            LessonDB.id, SubjectDB.name.label("subject"), LessonDB.weekday, LessonDB.number,
+            LessonDB.start_time, LessonDB.end_time, LessonDB.odd_week, LessonDB.even_week
+        ).outerjoin(SubjectDB, SubjectDB.id == LessonDB.subject_id).filter(LessonDB.id.in_(lesson_ids))
+    }
+    teachers = _linked_values(db, lesson_teachers, "teacher_id", TeacherDB.name, lesson_ids)
+    places = _linked_values(db, lesson_places, "place_id", PlaceDB.name, lesson_ids)
+    groups = _linked_values(db, lesson_groups, "group_id", GroupDB.number, lesson_ids)
+
+    lessons = []
+    for lesson_id in lesson_ids:
+        row = rows.get(lesson_id)
+        if row is None:
+            continue
+        odd_week, even_week = bool(row.odd_week), bool(row.even_week)
+        lessons.append({
+            "id": row.id,
+            "key": lesson_key(row.subject, row.weekday, row.number, row.start_time, row.end_time,
+                              odd_week, even_week, teachers[row.id], places[row.id]),
+            "subject": row.subject if row.subject is not None else "Нет данных",
+            "teachers": teachers[row.id],
+            "places": places[row.id],
+            "groups": groups[row.id],
+            "weekday": row.weekday,
+            "weekday_name": WEEKDAY_NAMES[row.weekday],
+            "number": row.number or 0,
+            "start_time": row.start_time or "",
+            "end_time": row.end_time or "",
+            "odd_week": odd_week,
+            "even_week": even_week,
+            "week_type": week_type_label(odd_week, even_week)
+        })
+    return lessons
+
+
+def build_timetable_index(db: Session) -> TimetableIndex:
+    index = TimetableIndex()
+    for teacher_id, name in db.query(TeacherDB.id, TeacherDB.name):
+        index.teachers.add(teacher_id, name)
+    for place_id, name in db.query(PlaceDB.id, PlaceDB.name):
+        index.places.add(place_id, name)
+    for subject_id, name in db.query(SubjectDB.id, SubjectDB.name):
+        index.subjects.add(subject_id, name)
+    for group_id, number, name in db.query(GroupDB.id, GroupDB.number, GroupDB.name):
+        index.groups.add(group_id, {"id": group_id, "number": number, "name": name})
+
+    lesson_teacher_ids = _collect_links(db, lesson_teachers, "teacher_id")
+    lesson_place_ids = _collect_links(db, lesson_places, "place_id")
+    lesson_group_ids = _collect_links(db, lesson_groups, "group_id")
+
+    by_teacher: Dict[int, array] = defaultdict(lambda: array("i"))
+    by_place: Dict[int, array] = defaultdict(lambda: array("i"))
+    by_subject: Dict[int, array] = defaultdict(lambda: array("i"))
+    by_group: Dict[int, array] = defaultdict(lambda: array("i"))
+    time_positions: Dict[str, int] = {}
+    # Содержимое для version: ключ пары и номера ее групп, без id из базы
+    contents: List[tuple] = []
+
+    def intern_time(value: Optional[str]) -> int:
+        value = value or ""
+        if value not in time_positions:
+            time_positions[value] = len(index.times)
+            index.times.append(value)
+        return time_positions[value]
+
+    rows = db.query(
+        LessonDB.id, LessonDB.subject_id, LessonDB.weekday, LessonDB.number,
+        LessonDB.start_time, LessonDB.end_time, LessonDB.odd_week, LessonDB.even_week
+    ).order_by(LessonDB.weekday, LessonDB.number, LessonDB.id)
+
+    # Пары перебираются в порядке (день, номер), поэтому списки в индексах
+    # сразу получаются упорядоченными по расписанию.
+    for position, row in enumerate(rows):
+        lesson_id, subject_id, weekday, number, start_time, end_time, odd_week, even_week = row
+        teacher_ids = [t for t in lesson_teacher_ids.get(lesson_id, []) if t in index.teachers]
+        place_ids = [p for p in lesson_place_ids.get(lesson_id, []) if p in index.places]
+        group_ids = [g for g in lesson_group_ids.get(lesson_id, []) if g in index.groups]
+        key = lesson_key(
+            index.subjects.get(subject_id), weekday, number, start_time, end_time, odd_week, even_week,
+            [index.teachers.get(t) for t in teacher_ids], [index.places.get(p) for p in place_ids],
+        )
+        index.keys.append(key)
+        contents.append((key, sorted(index.groups.get(g)["number"] for g in group_ids)))
+
+        index.lesson_ids.append(lesson_id)
+        index.subject.append(index.subjects.positions.get(subject_id, -1))
+        index.weekday.append(weekday)
+        index.number.append(number or 0)
+        index.start.append(intern_time(start_time))
+        index.end.append(intern_time(end_time))
+        index.parity.append((ODD_WEEK if odd_week else 0) | (EVEN_WEEK if even_week else 0))
+        index.lesson_teachers.append(index.teachers.positions[t] for t in teacher_ids)
+        index.lesson_places.append(index.places.positions[p] for p in place_ids)
+        index.lesson_groups.append(index.groups.positions[g] for g in group_ids)
+
+        for teacher_id in teacher_ids:
+            by_teacher[teacher_id].append(position)
+        for place_id in place_ids:
+            by_place[place_id].append(position)
+        for group_id in group_ids:
+            by_group[group_id].append(position)
+        by_subject[subject_id].append(position)
+
+    index.by_teacher = dict(by_teacher)
+    index.by_place = dict(by_place)
+    index.by_subject = dict(by_subject)
+    index.by_group = dict(by_group)
+    # Порядок не важен: пары одного слота идут в порядке id
+    groups = sorted((group["number"], group["name"] or "") for group in index.groups.values)
+    index.version = hashlib.sha1(repr((sorted(contents), groups)).encode()).hexdigest()[:16]
+    return index
+
+
+TIMETABLE_STATE = "timetable"
+
+
+def current_generation(db: Session) -> int:
+    """Текущее поколение расписания в базе; один запрос по первичному ключу."""
+    generation = (
+        db.query(TimetableStateDB.generation)
+        .filter(TimetableStateDB.name == TIMETABLE_STATE)
+        .scalar()
+    )
+    return generation or 0
+
+
+def bump_generation(db: Session) -> None:
+    """
+    Отмечает новое поколение расписания. Не коммитит: вызывается
+    в транзакции, которая сохраняет само расписание.
+    """
+    now = datetime.utcnow()
+    updated = (
+        db.query(TimetableStateDB)
+        .filter(TimetableStateDB.name == TIMETABLE_STATE)
+        .update({TimetableStateDB.generation: TimetableStateDB.generation + 1,
+                 TimetableStateDB.updated_at: now}, synchronize_session=False)
+    )
+    if not updated:
+        db.add(TimetableStateDB(name=TIMETABLE_STATE, generation=1, updated_at=now))
+
+
+T = TypeVar("T")
+
+
+class Snapshot(Generic[T]):
+    """
+    Производная структура в памяти процесса (снимок расписания,
+    поисковый индекс), привязанная к поколению расписания в базе.
+
+    Обновление применяет один из воркеров, поэтому при каждом чтении
+    поколение сверяется с базой, и снимок перестраивается, как только
+    оно изменилось. Поколение читается до построения: если расписание
+    сменится во время сборки, следующее чтение просто соберет снимок еще раз.
+    """
+
+    def __init__(self, build: Callable[[Session], T]):
+        self._build = build
+        self._value: Optional[T] = None
+        self._generation: Optional[int] = None
+        self._lock = threading.RLock()
+
+    def rebuild(self, db: Session) -> T:
+        with self._lock:
+            generation = current_generation(db)
+            self._value = self._build(db)
+            self._generation = generation
+            return self._value
+
+    def get(self, db: Session) -> T:
+        generation = current_generation(db)
+        with self._lock:
+            if self._value is None or self._generation != generation:
+                return self.rebuild(db)
+            return self._value
+
+
+_timetable_index: Snapshot[TimetableIndex] = Snapshot(build_timetable_index)
+
+
+def rebuild_timetable_index(db: Session) -> TimetableIndex:
+    """Перестраивает снимок расписания по текущему содержимому базы."""
+    return _timetable_index.rebuild(db)
+
+
+def get_timetable_index(db: Session) -> TimetableIndex:
+    """Возвращает снимок расписания, перестраивая его, если расписание в базе сменилось."""
+    return _timetable_index.get(db)
@@ -0,0 +1,102 @@
+import json
+from typing import List
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from models import TimetableOverrideDB, TimetablePageDB
+from profcomff_parse_lib.timetable.flatten import flatten_to_list
+
+# Колонки разобранной таблицы, по которым можно искать и которые можно менять
+OVERRIDE_COLUMNS = ("subject", "teacher", "place", "group", "weekday", "num", "start", "end", "odd", "even")
+ADD_REQUIRED_COLUMNS = ("subject", "group", "weekday", "num", "start", "end", "odd", "even")
+
+
+def override_to_dict(override: TimetableOverrideDB) -> dict:
+    return {
+        "id": override.id,
+        "action": override.action,
+        "match": json.loads(override.match) if override.match else {},
+        "values": json.loads(override.values) if override.values else {},
+        "comment": override.comment,
+        "is_active": override.is_active,
+        "created_at": override.created_at,
+        "updated_at": override.updated_at
+    }
+
+
+def validate_override(action: str, match: dict, values: dict) -> None:
+    unknown = [column for column in list(match) + list(values) if column not in OVERRIDE_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Неизвестные колонки: {', '.join(unknown)}. Допустимые: {', '.join(OVERRIDE_COLUMNS)}"
+        )
+    if action in ("delete", "replace") and not match:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Для удаления и замены нужно условие match"
+        )
+    if action == "replace" and not values:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Для замены нужны новые значения values"
+        )
+    if action == "add":
+        missing = [column for column in ADD_REQUIRED_COLUMNS if column not in values]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Для добавления пары не хватает колонок: {', '.join(missing)}"
+            )
+
+
+def load_override_rules(db: Session) -> List[dict]:
+    """Активные правки в формате apply_overrides, в порядке создания."""
+    overrides = (
+        db.query(TimetableOverrideDB)
+        .filter(TimetableOverrideDB.is_active == True)
+        .order_by(TimetableOverrideDB.id)
+    )
+    return [override_to_dict(override) for override in overrides]
+
+
+def invalidate_applied_pages(db: Session) -> None:
+    """
+    Сбрасывает отметку о примененных страницах, чтобы плановое обновление
+    заново разобрало источник с новыми правками, даже если он не менялся.
+    """
+    db.query(TimetablePageDB).update({TimetablePageDB.applied_hash: None}, synchronize_session=False)
+
+
+def extend_entities(lessons, places, groups, teachers, subjects):
+    """
+    Дополняет списки сущностей значениями, которые появились после
+    ручных правок (новые преподаватели, аудитории, группы и предметы).
+    """
+    places = list(places)
+    teachers = list(teachers)
+    subjects = list(subjects)
+    groups = list(groups)
+    known_places, known_teachers, known_subjects = set(places), set(teachers), set(subjects)
+    known_groups = {number for number, _ in groups}
+
+    for _, row in lessons.iterrows():
+        for name in flatten_to_list(row["place"]):
+            if name not in known_places:
+                known_places.add(name)
+                places.append(name)
+        for name in flatten_to_list(row["teacher"]):
+            if name not in known_teachers:
+                known_teachers.add(name)
+                teachers.append(name)
+        for name in flatten_to_list(row["subject"]):
+            if name and name not in known_subjects:
+                known_subjects.add(name)
+                subjects.append(name)
+        for number in flatten_to_list(row["group"]):
+            if number and number not in known_groups:
+                known_groups.add(number)
+                groups.append((number, ""))
+
+    return places, groups, teachers, subjects
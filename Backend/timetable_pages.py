@@ -0,0 +1,92 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from sqlalchemy.orm import Session
+
+from models import TimetablePageDB
+from timetable_runs import RunRecorder
+
+PAGE_TIMEOUT = 30
+
+
+def fetch_pages(
+    urls: List[str],
+    recorder: RunRecorder,
+    db: Optional[Session] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Tuple[List[dict], int]:
+    """
+    Загружает страницы источника условными запросами (If-None-Match /
+    If-Modified-Since) и сравнивает хэши содержимого с последней
+    примененной версией.
+
+    Для страниц, ответивших 304, берется сохраненная копия; если страница
+    недоступна, тоже используется сохраненная копия, чтобы временный сбой
+    не выкинул группы из расписания.
+
+    Returns:
+        Список {'url', 'raw_html'} и число страниц, изменившихся
+        с последнего применения
+    """
+    pages = {page.url: page for page in db.query(TimetablePageDB)} if db is not None else {}
+    data = []
+    changed = 0
+
+    for url in urls:
+        page = pages.get(url)
+        request_headers = dict(headers or {})
+        if page is not None and page.body is not None:
+            if page.etag:
+                request_headers["If-None-Match"] = page.etag
+            if page.last_modified:
+                request_headers["If-Modified-Since"] = page.last_modified
+
+        now = datetime.utcnow()
+        try:
+            response = requests.get(url, headers=request_headers, timeout=PAGE_TIMEOUT)
+        except Exception as e:
+            response = None
+            recorder.error(url, e)
+
+        if response is not None and response.status_code == 304 and page is not None and page.body is not None:
+            recorder.run.pages_not_modified += 1
+            page.checked_at = now
+        elif response is not None and response.status_code == 200:
+            recorder.run.pages_fetched += 1
+            if page is None:
+                page = TimetablePageDB(url=url)
+                pages[url] = page
+                if db is not None:
+                    db.add(page)
+            content_hash = hashlib.sha256(response.content).hexdigest()
+            if page.content_hash != content_hash:
+                page.changed_at = now
+            page.content_hash = content_hash
+            page.etag = response.headers.get("ETag")
+            page.last_modified = response.headers.get("Last-Modified")
+            page.body = response.text
+            page.checked_at = now
+        else:
+            recorder.run.pages_failed += 1
+            if response is not None:
+                recorder.error(url, f"HTTP {response.status_code}")
+            if page is None or page.body is None:
+                continue
+
+        data.append({'url': url, 'raw_html': page.body})
+        if page.content_hash != page.applied_hash:
+            changed += 1
+
+    recorder.run.pages_changed = changed
+    if db is not None:
+        db.commit()
+    return data, changed
+
+
+def mark_pages_applied(db: Session) -> None:
+    """Отмечает сохраненные версии страниц как примененные."""
+    for page in db.query(TimetablePageDB):
+        page.applied_hash = page.content_hash
+    db.commit()
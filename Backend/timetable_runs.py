@@ -0,0 +1,137 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models import TimetableRunDB
+
+PARSER_LOGGER = "profcomff_parse_lib"
+MAX_RUN_ERRORS = 50
+
+# Парсеры пишут предупреждение, когда ни одно регулярное выражение не подошло
+_REGEX_MISS_MARKER = "не найдено подходящее регулярное выражение"
+
+
+class RegexMissCounter(logging.Handler):
+    """Считает предупреждения парсеров о строках без подходящего регулярного выражения."""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.counts: Counter = Counter()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if _REGEX_MISS_MARKER in record.getMessage():
+            self.counts[record.name.rsplit(".", 1)[-1]] += 1
+
+
+class RunRecorder:
+    """
+    Собирает метрики одного обновления расписания и сохраняет их
+    в журнал timetable_runs. Без сессии работает только в памяти.
+    """
+
+    def __init__(self, db: Optional[Session] = None, trigger: str = "manual"):
+        self.db = db
+        self.run = TimetableRunDB(
+            started_at=datetime.utcnow(), status="running", trigger=trigger,
+            pages_fetched=0, pages_not_modified=0, pages_failed=0, pages_changed=0,
+        )
+        self.timings: Dict[str, float] = {}
+        self.errors: List[dict] = []
+        self.regex_misses = RegexMissCounter()
+        self.override_problems: List[dict] = []
+        if db is not None:
+            db.add(self.run)
+            db.commit()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Замеряет длительность этапа (fetch, parse, analyze, save, ...)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(self.timings.get(name, 0) + time.perf_counter() - started, 3)
+
+    @contextmanager
+    def capture_parse_warnings(self):
+        logger = logging.getLogger(PARSER_LOGGER)
+        logger.addHandler(self.regex_misses)
+        try:
+            yield
+        finally:
+            logger.removeHandler(self.regex_misses)
+
+    def error(self, source: str, error) -> None:
+        if isinstance(error, BaseException):
+            error = f"{type(error).__name__}: {error}"
+        if len(self.errors) < MAX_RUN_ERRORS:
+            self.errors.append({"source": source, "error": error})
+
+    def set_report(self, report: dict) -> None:
+        run = self.run
+        run.lessons = report["lessons"]
+        run.groups = report["groups"]
+        run.teachers = report["teachers"]
+        run.places = report["places"]
+        run.subjects = report["subjects"]
+        run.conflicts = len(report["conflicts"])
+        run.report = json.dumps(report, ensure_ascii=False, default=str)
+
+    def finish(self, status: str) -> TimetableRunDB:
+        run = self.run
+        run.status = status
+        run.finished_at = datetime.utcnow()
+        run.timings = json.dumps(self.timings)
+        run.regex_misses = json.dumps(dict(self.regex_misses.counts), ensure_ascii=False)
+        run.errors = json.dumps(self.errors, ensure_ascii=False)
+        if self.db is not None:
+            self.db.commit()
+        return run
+
+
+def _loads(value: Optional[str], default):
+    return json.loads(value) if value else default
+
+
+def run_to_dict(run: TimetableRunDB, detail: bool = False) -> dict:
+    result = {
+        "id": run.id,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "duration": (run.finished_at - run.started_at).total_seconds() if run.finished_at else None,
+        "status": run.status,
+        "trigger": run.trigger,
+        "pages": {
+            "fetched": run.pages_fetched,
+            "not_modified": run.pages_not_modified,
+            "failed": run.pages_failed,
+            "changed": run.pages_changed,
+        },
+        "counts": {
+            "lessons": run.lessons,
+            "groups": run.groups,
+            "teachers": run.teachers,
+            "places": run.places,
+            "subjects": run.subjects,
+            "conflicts": run.conflicts,
+        },
+        "rows": {
+            "before": run.lessons_before,
+            "after": run.lessons_after,
+            "added": run.lessons_added,
+            "removed": run.lessons_removed,
+        },
+        "version_id": run.version_id,
+        "timings": _loads(run.timings, {}),
+        "regex_misses": _loads(run.regex_misses, {}),
+    }
+    if detail:
+        result["errors"] = _loads(run.errors, [])
+        result["report"] = _loads(run.report, None)
+    return result
@@ -0,0 +1,157 @@
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set
+
+_logger = logging.getLogger(__name__)
+
+# Сколько ждать завершения потока при остановке. Идущее обновление
+# не прерывается: поток-демон доработает его и выйдет сам.
+STOP_TIMEOUT = 5
+
+# (минимум, максимум) для полей: минута, час, день месяца, месяц, день недели
+_CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _parse_field(text: str, low: int, high: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"Некорректное поле cron: {text}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """
+    Расписание в формате cron из пяти полей: минута, час, день месяца,
+    месяц, день недели (0 и 7 — воскресенье). Поддерживаются '*',
+    списки, диапазоны и шаги, например "*/30 7-22 * * 1-6".
+    Часы вне указанных окон — тихие часы, запусков в них нет.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Ожидается 5 полей cron: {expression}")
+        self.expression = expression
+        parsed = [_parse_field(field, low, high) for field, (low, high) in zip(fields, _CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_matches = moment.day in self.days
+        weekday_matches = (moment.weekday() + 1) % 7 in self.weekdays
+        # Как в cron: если ограничены и день месяца, и день недели, достаточно одного
+        if self.any_day:
+            return weekday_matches
+        if self.any_weekday:
+            return day_matches
+        return day_matches or weekday_matches
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Ближайшее время срабатывания строго после moment."""
+        current = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = current + timedelta(days=366 * 4)
+        while current < limit:
+            if current.month not in self.months:
+                current = (current.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(current):
+                current = current.replace(hour=0, minute=0) + timedelta(days=1)
+            elif current.hour not in self.hours:
+                current = current.replace(minute=0) + timedelta(hours=1)
+            elif current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+            else:
+                return current
+        raise ValueError(f"Расписание cron никогда не срабатывает: {self.expression}")
+
+
+class RefreshScheduler:
+    """
+    Фоновый поток, запускающий задачу по cron-окнам со случайной
+    задержкой до jitter секунд. Задача получает плановое время
+    срабатывания (без задержки) и сама решает, нужно ли ей работать:
+    в нескольких процессах поток запускается в каждом.
+    """
+
+    def __init__(self, schedule: str, jitter: int, job: Callable[[datetime], None]):
+        self.schedules: List[CronSchedule] = [
+            CronSchedule(expression.strip()) for expression in schedule.split(";") if expression.strip()
+        ]
+        self.jitter = jitter
+        self.job = job
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.schedules)
+
+    def next_window(self, moment: Optional[datetime] = None) -> Optional[datetime]:
+        if not self.enabled:
+            return None
+        moment = moment or datetime.now()
+        return min(schedule.next_after(moment) for schedule in self.schedules)
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        # Новое событие на каждый запуск: поток, не успевший остановиться
+        # в stop, не оживет при повторном start
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, args=(self._stop,), name="timetable-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(STOP_TIMEOUT)
+            if self._thread.is_alive():
+                _logger.warning("Планировщик не остановился: идет обновление расписания, оно доработает в фоне")
+            self._thread = None
+        self.next_run = None
+
+    def _loop(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            fire_at = self.next_window()
+            self.next_run = fire_at + timedelta(seconds=random.uniform(0, self.jitter))
+            if stop.wait(max((self.next_run - datetime.now()).total_seconds(), 0)):
+                return
+            self.last_run = datetime.now()
+            try:
+                self.job(fire_at)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                _logger.exception("Плановое обновление расписания завершилось ошибкой")
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "schedule": [schedule.expression for schedule in self.schedules],
+            "jitter": self.jitter,
+            "running": self._thread is not None,
+            "next_window": self.next_window(),
+            "next_run": self.next_run,
+            "last_run": self.last_run,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,213 @@
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import GroupDB, TeacherDB, SubjectDB, PlaceDB
+from timetable_index import Snapshot
+
+# Транслитерация кириллицы в латиницу: "Иванов" и "Ivanov", "101м" и "101m"
+# после нормализации дают одинаковый ключ.
+_TRANSLIT = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e",
+    "ж": "zh", "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "h", "ц": "c", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "",
+    "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+}
+_TRANSLIT_TABLE = str.maketrans(_TRANSLIT)
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+# Номер и буква группы пишут и слитно, и через пробел: "101м" и "101 м"
+# разбиваются на одинаковые слова и в индексе, и в запросе.
+_DIGIT_LETTER = re.compile(r"(?<=[0-9])(?=[a-z])|(?<=[a-z])(?=[0-9])")
+
+# Веса совпадений: чем выше, тем выше результат в выдаче.
+_SCORE_EXACT = 100
+_SCORE_PREFIX = 90
+_SCORE_WORD_PREFIX = 80
+_SCORE_SUBSTRING = 70
+_SCORE_FUZZY = 60
+
+ENTITY_TYPES = ("group", "teacher", "subject", "place")
+
+
+def normalize(text: Optional[str]) -> str:
+    """
+    Приводит строку к поисковому ключу: нижний регистр, транслит, без
+    пунктуации, цифры отделены от букв.
+    """
+    if not text:
+        return ""
+    text = text.lower().translate(_TRANSLIT_TABLE)
+    text = _DIGIT_LETTER.sub(" ", text)
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def _trigrams(word: str, pad_end: bool = True) -> Set[str]:
+    padded = "  " + word + (" " if pad_end else "")
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _max_edits(length: int) -> int:
+    if length < 3:
+        return 0
+    if length < 6:
+        return 1
+    return 2
+
+
+def _levenshtein_row(a: str, b: str, limit: int) -> Optional[List[int]]:
+    """
+    Последняя строка таблицы Левенштейна: расстояния от a до каждого
+    префикса b. None, если все они уже больше limit.
+    """
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            )
+            row_min = min(row_min, current[j])
+        if row_min > limit:
+            return None
+        previous = current
+    return previous
+
+
+def _bounded_prefix_distance(query: str, word: str, limit: int) -> int:
+    """
+    Наименьшее расстояние от query до префикса word длиной от
+    len(query) - limit до len(query) + limit: пропущенная или лишняя
+    буква в запросе стоит одну правку.
+    """
+    row = _levenshtein_row(query, word[:len(query) + limit], limit)
+    # Слово короче len(query) - limit: до него больше limit правок
+    prefixes = row[max(len(query) - limit, 0):] if row else ()
+    return min(min(prefixes, default=limit + 1), limit + 1)
+
+
+class SearchEntry:
+    __slots__ = ("type", "id", "name", "number", "key", "words")
+
+    def __init__(self, entity_type: str, entity_id: int, name: str, number: Optional[str] = None):
+        self.type = entity_type
+        self.id = entity_id
+        self.name = name
+        self.number = number
+        self.key = normalize(" ".join(part for part in (number, name) if part))
+        self.words = self.key.split()
+
+    def to_dict(self, score: int) -> dict:
+        result = {"type": self.type, "id": self.id, "name": self.name, "score": score}
+        if self.type == "group":
+            result["number"] = self.number
+        return result
+
+
+class SearchIndex:
+    """
+    Триграммный индекс по группам, преподавателям, предметам и аудиториям.
+    Строится целиком в памяти после каждого обновления расписания.
+    """
+
+    def __init__(self, entries: Iterable[SearchEntry]):
+        self.entries: List[SearchEntry] = list(entries)
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for position, entry in enumerate(self.entries):
+            grams = set()
+            for word in entry.words:
+                grams |= _trigrams(word)
+            for gram in grams:
+                self._postings[gram].append(position)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _score(self, entry: SearchEntry, query: str, query_words: List[str]) -> int:
+        if entry.key == query:
+            return _SCORE_EXACT
+        if entry.key.startswith(query):
+            return _SCORE_PREFIX
+        if all(any(word.startswith(q) for word in entry.words) for q in query_words):
+            return _SCORE_WORD_PREFIX
+        if query in entry.key:
+            return _SCORE_SUBSTRING
+
+        # Допускаем опечатки: каждое слово запроса должно быть близко
+        # к какому-нибудь префиксу слова записи.
+        total_distance = 0
+        for q in query_words:
+            limit = _max_edits(len(q))
+            best = min(
+                (_bounded_prefix_distance(q, word, limit) for word in entry.words),
+                default=limit + 1,
+            )
+            if best > limit:
+                return 0
+            total_distance += best
+        return max(_SCORE_FUZZY - 10 * total_distance, 1)
+
+    def search(self, query: str, types: Optional[Iterable[str]] = None, limit: int = 10) -> List[dict]:
+        """
+        Ищет записи по запросу и возвращает их в порядке убывания релевантности.
+
+        Args:
+            query: Строка запроса на кириллице или латинице
+            types: Ограничение по типам сущностей (group, teacher, subject, place)
+            limit: Максимальное количество результатов
+        """
+        normalized = normalize(query)
+        if not normalized:
+            return []
+        query_words = normalized.split()
+        allowed = set(types) if types else None
+
+        # Кандидаты — записи, у которых есть хотя бы одна общая триграмма с запросом.
+        overlap: Counter = Counter()
+        for word in query_words:
+            for gram in _trigrams(word, pad_end=False):
+                for position in self._postings.get(gram, ()):
+                    overlap[position] += 1
+
+        ranked: List[Tuple[int, int, int, SearchEntry]] = []
+        for position, shared in overlap.items():
+            entry = self.entries[position]
+            if allowed is not None and entry.type not in allowed:
+                continue
+            score = self._score(entry, normalized, query_words)
+            if score:
+                ranked.append((score, shared, -len(entry.key), entry))
+
+        ranked.sort(key=lambda item: (item[0], item[1], item[2]), reverse=True)
+        return [entry.to_dict(score) for score, _, _, entry in ranked[:limit]]
+
+
+def build_search_index(db: Session) -> SearchIndex:
+    entries: List[SearchEntry] = []
+    for group_id, number, name in db.query(GroupDB.id, GroupDB.number, GroupDB.name):
+        entries.append(SearchEntry("group", group_id, name, number))
+    for teacher_id, name in db.query(TeacherDB.id, TeacherDB.name):
+        entries.append(SearchEntry("teacher", teacher_id, name))
+    for subject_id, name in db.query(SubjectDB.id, SubjectDB.name):
+        entries.append(SearchEntry("subject", subject_id, name))
+    for place_id, name in db.query(PlaceDB.id, PlaceDB.name):
+        entries.append(SearchEntry("place", place_id, name))
+    return SearchIndex(entries)
+
+
+_search_index: Snapshot[SearchIndex] = Snapshot(build_search_index)
+
+
+def rebuild_search_index(db: Session) -> SearchIndex:
+    """Перестраивает поисковый индекс по текущему содержимому базы."""
+    return _search_index.rebuild(db)
+
+
+def get_search_index(db: Session) -> SearchIndex:
+    """Возвращает поисковый индекс, перестраивая его, если расписание в базе сменилось."""
+    return _search_index.get(db)
@@ -0,0 +1,131 @@
+import json
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+try:
+    import msgpack
+except ImportError:  # msgpack необязателен: без него доступен только compact JSON
+    msgpack = None
+
+COMPACT_MEDIA_TYPE = "application/vnd.idearelease.timetable+json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+FORMATS = ("json", "compact", "msgpack")
+
+# Порядок полей в кортеже пары. Названия дня недели и типа недели
+# не передаются: клиент восстанавливает их из weekday и parity.
+COMPACT_FIELDS = [
+    "id", "subject", "teachers", "places", "groups",
+    "weekday", "number", "start_time", "end_time", "parity", "date"
+]
+
+
+class StringTable:
+    def __init__(self):
+        self.values: List[str] = []
+        self._positions: Dict[str, int] = {}
+
+    def ref(self, value: Optional[str]) -> int:
+        value = value or ""
+        position = self._positions.get(value)
+        if position is None:
+            position = self._positions[value] = len(self.values)
+            self.values.append(value)
+        return position
+
+
+def encode_compact(lessons: List[dict]) -> dict:
+    """
+    Кодирует список пар словарем строк: каждая строка (предмет, ФИО,
+    аудитория, группа, время, дата) передается один раз, а пары —
+    кортежами целых чисел в порядке COMPACT_FIELDS.
+    """
+    strings = StringTable()
+    rows = []
+    for lesson in lessons:
+        parity = (1 if lesson["odd_week"] else 0) | (2 if lesson["even_week"] else 0)
+        date = lesson.get("date")
+        rows.append([
+            lesson["id"],
+            strings.ref(lesson["subject"]),
+            [strings.ref(name) for name in lesson["teachers"]],
+            [strings.ref(name) for name in lesson["places"]],
+            [strings.ref(name) for name in lesson.get("groups", [])],
+            lesson["weekday"],
+            lesson["number"],
+            strings.ref(lesson["start_time"]),
+            strings.ref(lesson["end_time"]),
+            parity,
+            strings.ref(date) if date else -1,
+        ])
+    return {"format": "compact-v1", "fields": COMPACT_FIELDS, "strings": strings.values, "lessons": rows}
+
+
+def accept_qualities(accept: str) -> Dict[str, float]:
+    """
+    Разбирает заголовок Accept в {media type: q}. q=0 означает, что
+    клиент такой тип не принимает; некорректный q считается нулем.
+    """
+    qualities: Dict[str, float] = {}
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_type = media_type.lower()
+        qualities[media_type] = max(quality, qualities.get(media_type, 0.0))
+    return qualities
+
+
+def negotiate_format(request: Request) -> str:
+    """
+    Выбирает формат ответа: явный параметр ?format= важнее заголовка Accept,
+    из Accept берется тип с наибольшим q. По умолчанию — обычный JSON.
+    """
+    requested = request.query_params.get("format")
+    if requested:
+        if requested not in FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Неизвестный формат: {requested}. Допустимые: {', '.join(FORMATS)}"
+            )
+        if requested == "msgpack" and msgpack is None:
+            raise HTTPException(
+                status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                detail="MessagePack недоступен на сервере"
+            )
+        return requested
+
+    qualities = accept_qualities(request.headers.get("accept", ""))
+    candidates = []
+    if msgpack is not None:
+        candidates.append(("msgpack", max(qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)))
+    candidates.append(("compact", qualities.get(COMPACT_MEDIA_TYPE, 0.0)))
+    candidates.append(("json", qualities.get("application/json", 0.0)))
+    # При равных q побеждает более компактный формат (первый в списке)
+    response_format, quality = max(candidates, key=lambda candidate: candidate[1])
+    return response_format if quality > 0 else "json"
+
+
+def timetable_response(request: Request, lessons: List[dict]):
+    """
+    Отдает список пар в согласованном формате. Для обычного JSON
+    возвращает сам список, чтобы ответ строился как раньше.
+    """
+    response_format = negotiate_format(request)
+    if response_format == "json":
+        return lessons
+
+    headers = {"Vary": "Accept"}
+    payload = encode_compact(lessons)
+    if response_format == "msgpack":
+        return Response(msgpack.packb(payload), media_type=MSGPACK_MEDIA_TYPES[0], headers=headers)
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return Response(body, media_type=COMPACT_MEDIA_TYPE, headers=headers)